@@ -9,6 +9,8 @@ from alembic import context
 from app.core.config import settings
 from app.core.database import Base
 from app.models.user import User  # Import all models here
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_token import RevokedToken
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
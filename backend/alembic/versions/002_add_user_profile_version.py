@@ -0,0 +1,28 @@
+"""Add profile_version to users
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Incremented on every profile change; embedded in profile-claim tokens
+    op.add_column(
+        'users',
+        sa.Column('profile_version', sa.Integer(), server_default='1', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'profile_version')
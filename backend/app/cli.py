@@ -0,0 +1,64 @@
+"""
+Administrative command line for the backend.
+
+Run from the backend directory:
+
+    python -m app.cli import-users users.ndjson
+    python -m app.cli import-users users.csv --batch-size 5000
+    python -m app.cli export-users users.csv
+    python -m app.cli export-users - --format ndjson > users.ndjson
+"""
+import argparse
+import json
+import sys
+
+from app.core.database import SessionLocal
+from app.services import user_transfer
+
+
+def import_users(args) -> int:
+    fmt = args.format or user_transfer.format_for_path(args.path)
+    with SessionLocal() as db:
+        if args.path == "-":
+            result = user_transfer.import_users(db, sys.stdin, fmt, args.batch_size)
+        else:
+            with open(args.path, encoding="utf-8", newline="") as stream:
+                result = user_transfer.import_users(db, stream, fmt, args.batch_size)
+    print(json.dumps(result.as_dict(), indent=2), file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+def export_users(args) -> int:
+    fmt = args.format or user_transfer.format_for_path(args.path)
+    with SessionLocal() as db:
+        if args.path == "-":
+            sys.stdout.writelines(user_transfer.export_users(db, fmt, args.batch_size))
+        else:
+            with open(args.path, "w", encoding="utf-8", newline="") as stream:
+                stream.writelines(user_transfer.export_users(db, fmt, args.batch_size))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Backend administration")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, handler, help_text in (
+        ("import-users", import_users, "create or update users from a file"),
+        ("export-users", export_users, "write all users to a file"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path", help="file path, or - for stdin/stdout")
+        command.add_argument("--format", choices=sorted(user_transfer.FORMATS), help="default: from the file extension")
+        command.add_argument("--batch-size", type=int, default=None, help="rows per batch")
+        command.set_defaults(handler=handler)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
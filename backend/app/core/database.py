@@ -1,9 +1,113 @@
+from typing import Optional, Tuple
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .config import settings
+from .metrics import instrument_queries
+from .pool_stats import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, PoolStats, instrument_engine
+
+# Async drivers used when deriving the async URL from DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_pool_limits(workers: int) -> Tuple[int, int]:
+    """
+    Pool size and overflow of one worker's engine.
+
+    Without ``DB_MAX_CONNECTIONS`` every worker gets ``DB_POOL_SIZE`` and
+    ``DB_MAX_OVERFLOW``. With it, the budget is split evenly across
+    ``workers``: each worker keeps up to ``DB_POOL_SIZE`` of its share
+    pooled and may open the rest as overflow, so the instance never holds
+    more than the budget.
+
+    Args:
+        workers: Worker processes of this instance
+
+    Returns:
+        Tuple of (pool_size, max_overflow)
+    """
+    if settings.DB_MAX_CONNECTIONS <= 0:
+        return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    share = max(1, settings.DB_MAX_CONNECTIONS // max(1, workers))
+    pool_size = min(settings.DB_POOL_SIZE, share)
+    return pool_size, min(settings.DB_MAX_OVERFLOW, share - pool_size)
+
+
+def get_pool_options(url: str, async_driver: bool = False) -> dict:
+    """
+    Build connection pool arguments for ``create_engine`` from settings.
+
+    SQLite keeps SQLAlchemy's default pool, which is chosen per database
+    type (file or memory) and does not accept these sizing arguments.
+
+    Args:
+        url: Database URL the engine is created for
+        async_driver: Whether the engine uses an async driver
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Returns:
+        Keyword arguments for ``create_engine``/``create_async_engine``
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    pool_size, max_overflow = get_pool_limits(settings.WEB_WORKERS or 1)
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if async_driver else InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO,
+    }
+
+
+engine = create_engine(settings.DATABASE_URL, **get_pool_options(settings.DATABASE_URL))
+engine_pool_stats = instrument_engine(engine)
+if settings.METRICS_ENABLED:
+    instrument_queries(engine, "sync")
+# Objects stay loaded after commit so callers do not pay a reload query
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Derive an async driver URL from a sync database URL.
+
+    Args:
+        url: Sync SQLAlchemy database URL
+
+    Returns:
+        The same URL using the matching async driver
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# The async engine exists only when it is used (DATABASE_ASYNC) or explicitly
+# configured, so a sync-only deployment needs neither an async driver nor a
+# backend listed in ASYNC_DRIVERS
+async_engine: Optional[AsyncEngine] = None
+async_engine_pool_stats: Optional[PoolStats] = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+if settings.DATABASE_ASYNC or settings.ASYNC_DATABASE_URL:
+    _async_database_url = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(
+        _async_database_url, **get_pool_options(_async_database_url, async_driver=True)
+    )
+    async_engine_pool_stats = instrument_engine(async_engine.sync_engine)
+    if settings.METRICS_ENABLED:
+        instrument_queries(async_engine.sync_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
 
 
 class Base(DeclarativeBase):
@@ -17,3 +121,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("No async database engine; set DATABASE_ASYNC or ASYNC_DATABASE_URL")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -3,21 +3,103 @@ Reusable dependencies for FastAPI endpoints
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from app.core.database import get_db
-from app.core.security import verify_token
-from app.models.user import User
-from app.services.auth_service import AuthService
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
+from app.core.metrics import auth_stage
+from app.core.security import user_from_profile_claims, verify_token
+from app.core.user_cache import CachedUser, user_cache
+from app.services.auth_service import AsyncAuthService, AuthService
 
 security = HTTPBearer()
 
+# Stages of current-user resolution, exported as auth_stage_duration_seconds
+TOKEN_VERIFY_STAGE = auth_stage("get_current_user", "token_verify")
+USER_LOAD_STAGE = auth_stage("get_current_user", "user_load")
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _verify_credentials(credentials: HTTPAuthorizationCredentials) -> Dict[str, Any]:
+    """
+    Verify the bearer token and return its payload.
+
+    Args:
+        credentials: HTTP Bearer token credentials
+
+    Returns:
+        dict: The verified token payload
+
+    Raises:
+        HTTPException: If the token is invalid
+    """
+    payload = verify_token(credentials.credentials)
+    if not payload:
+        raise _credentials_exception()
+    return payload
+
+
+def _get_user_id(payload: Dict[str, Any]) -> int:
+    """
+    Extract the user ID from a verified token payload.
+
+    Args:
+        payload: Verified token payload
+
+    Returns:
+        int: The user ID carried in the token's ``sub`` claim
+
+    Raises:
+        HTTPException: If the token has no usable subject
+    """
+    try:
+        return int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise _credentials_exception()
+
+
+def _ensure_user(user: Optional[CachedUser]) -> CachedUser:
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return user
+
+
+def get_token_payload(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Dict[str, Any]:
+    """
+    Dependency returning the verified payload of the bearer token.
+    
+    Args:
+        credentials: HTTP Bearer token credentials
+        
+    Returns:
+        dict: The verified token payload, with a usable ``sub`` claim
+        
+    Raises:
+        HTTPException: If the token is invalid or revoked
+    """
+    payload = _verify_credentials(credentials)
+    _get_user_id(payload)
+    return payload
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> CachedUser:
     """
     Dependency to get the current authenticated user.
     
@@ -26,55 +108,117 @@ def get_current_user(
         db: Database session
         
     Returns:
-        User: The authenticated user
+        CachedUser: Snapshot of the authenticated user
         
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    token = credentials.credentials
+    with TOKEN_VERIFY_STAGE.time():
+        user_id = _get_user_id(_verify_credentials(credentials))
     
-    # Verify the token
-    payload = verify_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    # Get user from database via service layer
+    auth_service = AuthService(db)
+    with USER_LOAD_STAGE.time():
+        user = auth_service.get_user_by_id(user_id)
+    return _ensure_user(user)
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> CachedUser:
+    """
+    Async variant of :func:`get_current_user` using the async database stack.
     
-    # Extract user ID from token
-    user_id = payload.get("sub")
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    Args:
+        credentials: HTTP Bearer token credentials
+        db: Async database session
+        
+    Returns:
+        CachedUser: Snapshot of the authenticated user
+        
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    with TOKEN_VERIFY_STAGE.time():
+        user_id = _get_user_id(_verify_credentials(credentials))
     
-    # Get user from database via service layer
-    try:
-        auth_service = AuthService(db)
-        user = auth_service.get_user_by_id(int(user_id))
-    except ValueError:
+    auth_service = AsyncAuthService(db)
+    with USER_LOAD_STAGE.time():
+        user = await auth_service.get_user_by_id(user_id)
+    return _ensure_user(user)
+
+
+async def get_token_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> CachedUser:
+    """
+    Dependency building the current user from the token's profile claims.
+    
+    Used when ``JWT_PROFILE_CLAIMS`` is enabled; it never opens a database
+    session, so the profile returned is the one the token was issued with
+    and may be up to ``ACCESS_TOKEN_EXPIRE_MINUTES`` old. Tokens without
+    profile claims are rejected. The stale-profile check is best-effort:
+    it only knows the versions in this worker's user cache, so a change
+    made through another worker, or one whose entry was evicted, is not
+    detected until the token expires.
+    
+    Args:
+        credentials: HTTP Bearer token credentials
+        
+    Returns:
+        CachedUser: Snapshot of the authenticated user
+        
+    Raises:
+        HTTPException: If the token is invalid, lacks profile claims or is
+            known to this worker to be stale
+    """
+    user = user_from_profile_claims(_verify_credentials(credentials))
+    if user is None:
+        raise _credentials_exception()
+    
+    cached = user_cache.get(user.id)
+    if cached is not None and cached.profile_version > user.profile_version:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
+            detail="Profile has changed, please sign in again",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return user
+
+
+# Database session and current-user dependencies for the configured stack
+get_session = get_async_db if settings.DATABASE_ASYNC else get_db
+get_authenticated_user = get_current_user_async if settings.DATABASE_ASYNC else get_current_user
+# /auth/me can be answered from the token alone in profile-claims mode
+get_profile_user = get_token_user if settings.JWT_PROFILE_CLAIMS else get_authenticated_user
+
+
+def require_admin(current_user: CachedUser = Depends(get_authenticated_user)) -> CachedUser:
+    """
+    Dependency restricting an endpoint to users listed in ``ADMIN_EMAILS``.
     
-    if not user:
+    Args:
+        current_user: Current authenticated user
+        
+    Returns:
+        CachedUser: The authenticated admin user
+        
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    if current_user.email.lower() not in settings.ADMIN_EMAILS:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
         )
-    
-    return user
+    return current_user
 
 
 def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     db: Session = Depends(get_db)
-) -> Optional[User]:
+) -> Optional[CachedUser]:
     """
     Optional dependency to get the current authenticated user.
     Returns None if no valid token is provided.
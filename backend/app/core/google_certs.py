@@ -0,0 +1,421 @@
+"""
+In-process cache for Google's OAuth2 signing certificates.
+
+Google publishes the certificates used to sign ID tokens at a public URL and
+advertises how long they may be cached via ``Cache-Control: max-age``. This
+module keeps the last good certificate set in memory, refreshes it in the
+background shortly before it expires and can persist it to a local file so
+a freshly started worker can verify tokens without a network round trip.
+The file is a trust root: it is only read when owned by this process's user
+and not writable by group or others, and its expiry is capped at fetch time
+plus ``MAX_CERTS_AGE``.
+
+The HTTP clients (``requests`` through google-auth, and ``httpx``) are
+imported on first use: a worker serving from the persisted certificate set
+never needs them, and they are a large share of the application's import
+time.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import stat
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional
+
+from google.auth import exceptions
+from google.auth import transport
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+# Longest a certificate set is trusted after its fetch, whatever the
+# response or the persisted file says
+MAX_CERTS_AGE = 24 * 3600
+
+
+def parse_max_age(headers: Mapping[str, str], default: int) -> int:
+    """
+    Extract the ``max-age`` directive from a ``Cache-Control`` header.
+
+    Args:
+        headers: HTTP response headers
+        default: Value to use when no usable directive is present
+
+    Returns:
+        Number of seconds the response may be cached
+    """
+    cache_control = headers.get("Cache-Control") or headers.get("cache-control") or ""
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    if not match:
+        return default
+    return int(match.group(1))
+
+
+class _CachedResponse(transport.Response):
+    """Minimal transport response served from the certificate cache."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    @property
+    def status(self):
+        return 200
+
+    @property
+    def headers(self):
+        return {"Content-Type": "application/json"}
+
+    @property
+    def data(self):
+        return self._data
+
+
+class CachedCertsRequest(transport.Request):
+    """
+    google-auth transport that answers certificate fetches from the cache.
+
+    Requests for the cached certificate URL never leave the process; anything
+    else is delegated to the cache's long-lived, keep-alive ``requests``
+    session.
+    """
+
+    def __init__(self, cache: "GoogleCertCache"):
+        self._cache = cache
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        if method == "GET" and url == self._cache.certs_url:
+            return _CachedResponse(json.dumps(self._cache.get_certs()).encode("utf-8"))
+        return self._cache.http_request(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+
+
+class GoogleCertCache:
+    """
+    Thread-safe cache of Google's ``{key id: x509 certificate}`` mapping.
+
+    Certificates are served from memory until the ``max-age`` announced by
+    Google runs out. Once a lookup lands within ``refresh_margin`` seconds of
+    expiry a single background refresh is started, so request threads never
+    wait on the network while the cache is warm. If a refresh fails the last
+    good set keeps being served.
+    """
+
+    def __init__(
+        self,
+        certs_url: str,
+        cache_file: Optional[str] = None,
+        refresh_margin: int = 300,
+        default_max_age: int = 3600,
+        timeout: float = 10.0,
+        http_request: Optional[transport.Request] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            certs_url: URL serving the certificate mapping
+            cache_file: Path used to persist the last good certificate set
+            refresh_margin: Seconds before expiry at which to refresh
+            default_max_age: TTL used when the response has no ``max-age``
+            timeout: Timeout for certificate fetches in seconds
+            http_request: google-auth transport used for fetches; defaults to
+                a ``requests`` session created on first use
+            clock: Source of wall-clock time, overridable for tests
+        """
+        self.certs_url = certs_url
+        self.cache_file = cache_file or None
+        self.refresh_margin = refresh_margin
+        self.default_max_age = default_max_age
+        self.timeout = timeout
+        self._http = http_request
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._certs: Optional[Dict[str, str]] = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._refresh_thread: Optional[threading.Thread] = None
+
+        # Async clients and locks belong to one event loop; they are created
+        # lazily and recreated if the cache is used from a different loop.
+        self._async_client: Optional["httpx.AsyncClient"] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._async_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+
+        self.request = CachedCertsRequest(self)
+        self._load_from_file()
+
+    def get_certs(self) -> Dict[str, str]:
+        """
+        Return the current certificate set, fetching it if necessary.
+
+        Returns:
+            Mapping of key id to PEM encoded x509 certificate
+
+        Raises:
+            google.auth.exceptions.TransportError: If no certificates are
+                cached and they cannot be fetched
+        """
+        now = self._clock()
+        certs = self._certs
+        if certs is not None and now < self._expires_at:
+            self.hits += 1
+            if now >= self._expires_at - self.refresh_margin:
+                self._refresh_in_background()
+            return certs
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._certs is not None and self._clock() < self._expires_at:
+                self.hits += 1
+                return self._certs
+
+            self.misses += 1
+            try:
+                return self._fetch()
+            except exceptions.TransportError:
+                if self._certs is None:
+                    raise
+                logger.warning("Serving stale Google certificates after failed refresh")
+                return self._certs
+
+    def refresh(self) -> Dict[str, str]:
+        """
+        Fetch the certificate set now, regardless of its expiry.
+
+        Returns:
+            The freshly fetched certificate mapping
+        """
+        with self._lock:
+            return self._fetch()
+
+    def invalidate(self) -> None:
+        """Drop the in-memory certificate set so the next lookup refetches."""
+        with self._lock:
+            self._expires_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hit, miss and fetch counters plus the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expires_in": max(0.0, self._expires_at - self._clock()),
+        }
+
+    async def get_certs_async(self) -> Dict[str, str]:
+        """
+        Async variant of :meth:`get_certs` for use on the event loop.
+
+        Cache hits return immediately; misses are fetched through a pooled,
+        keep-alive ``httpx.AsyncClient`` and concurrent misses share a single
+        fetch.
+
+        Returns:
+            Mapping of key id to PEM encoded x509 certificate
+        """
+        now = self._clock()
+        certs = self._certs
+        if certs is not None and now < self._expires_at:
+            self.hits += 1
+            if now >= self._expires_at - self.refresh_margin:
+                self._refresh_in_background()
+            return certs
+
+        async with self._get_async_lock():
+            if self._certs is not None and self._clock() < self._expires_at:
+                self.hits += 1
+                return self._certs
+
+            self.misses += 1
+            try:
+                return await self._fetch_async()
+            except exceptions.TransportError:
+                if self._certs is None:
+                    raise
+                logger.warning("Serving stale Google certificates after failed refresh")
+                return self._certs
+
+    async def aclose(self) -> None:
+        """Close the pooled async HTTP client, if one was opened."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+
+    @property
+    def http_request(self) -> transport.Request:
+        """The google-auth transport used for fetches, created on first use."""
+        if self._http is None:
+            import requests
+            from google.auth.transport import requests as google_requests
+
+            self._http = google_requests.Request(session=requests.Session())
+        return self._http
+
+    def _fetch(self) -> Dict[str, str]:
+        """Fetch, store and persist the certificate set. Caller holds the lock."""
+        self.fetches += 1
+        try:
+            response = self.http_request(self.certs_url, method="GET", timeout=self.timeout)
+        except exceptions.TransportError:
+            self.fetch_errors += 1
+            raise
+        return self._accept(response.status, response.headers, response.data)
+
+    async def _fetch_async(self) -> Dict[str, str]:
+        """Async counterpart of :meth:`_fetch`. Caller holds the async lock."""
+        import httpx
+
+        self.fetches += 1
+        try:
+            response = await self._get_async_client().get(self.certs_url)
+        except httpx.HTTPError as exc:
+            self.fetch_errors += 1
+            raise exceptions.TransportError(
+                "Could not fetch certificates at {}".format(self.certs_url)
+            ) from exc
+        return self._accept(response.status_code, response.headers, response.content)
+
+    def _accept(self, status: int, headers: Mapping[str, str], data: bytes) -> Dict[str, str]:
+        """Store and persist a fetched certificate response."""
+        if status != 200:
+            self.fetch_errors += 1
+            raise exceptions.TransportError(
+                "Could not fetch certificates at {}".format(self.certs_url)
+            )
+
+        certs = json.loads(data.decode("utf-8"))
+        max_age = min(parse_max_age(headers, self.default_max_age), MAX_CERTS_AGE)
+        self._fetched_at = self._clock()
+        self._store(certs, self._fetched_at + max_age)
+        self._save_to_file()
+        return certs
+
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        """Return the pooled client bound to the running event loop."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300),
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    def _get_async_lock(self) -> asyncio.Lock:
+        """Return the fetch lock bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_lock is None or self._async_lock_loop is not loop:
+            self._async_lock = asyncio.Lock()
+            self._async_lock_loop = loop
+        return self._async_lock
+
+    def _store(self, certs: Dict[str, str], expires_at: float) -> None:
+        self._certs = certs
+        self._expires_at = expires_at
+
+    def _refresh_in_background(self) -> None:
+        """Start a single background refresh unless one is already running."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._background_refresh, name="google-cert-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+        finally:
+            self._lock.release()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Background refresh of Google certificates failed")
+
+    def _load_from_file(self) -> None:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            # No symlinks, and only a file nobody else could have written
+            fd = os.open(self.cache_file, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+            with open(fd, "r", encoding="utf-8") as fh:
+                info = os.fstat(fh.fileno())
+                if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                    logger.warning(
+                        "Ignoring Google certificate cache file %s: not owned by this user "
+                        "or writable by others", self.cache_file,
+                    )
+                    return
+                snapshot = json.load(fh)
+            if snapshot.get("certs_url") != self.certs_url:
+                return
+            fetched_at = float(snapshot["fetched_at"])
+            if fetched_at > self._clock():
+                return
+            expires_at = min(float(snapshot["expires_at"]), fetched_at + MAX_CERTS_AGE)
+            self._fetched_at = fetched_at
+            self._store(snapshot["certs"], expires_at)
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Ignoring unreadable Google certificate cache file %s", self.cache_file)
+
+    def _save_to_file(self) -> None:
+        if not self.cache_file:
+            return
+        snapshot = {
+            "certs_url": self.certs_url,
+            "fetched_at": self._fetched_at,
+            "expires_at": self._expires_at,
+            "certs": self._certs,
+        }
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        tmp_path = None
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            # A fresh, exclusively created 0600 file, so a planted symlink or
+            # file at a predictable name cannot redirect the write
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".google-certs-", suffix=".tmp")
+            with open(fd, "w", encoding="utf-8") as fh:
+                json.dump(snapshot, fh)
+            # Atomic rename so concurrent workers never read a partial file
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            logger.warning("Could not persist Google certificates to %s", self.cache_file)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+google_cert_cache = GoogleCertCache(
+    certs_url=settings.GOOGLE_CERTS_URL,
+    cache_file=settings.GOOGLE_CERTS_CACHE_FILE,
+    refresh_margin=settings.GOOGLE_CERTS_REFRESH_MARGIN_SECONDS,
+)
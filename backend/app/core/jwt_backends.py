@@ -0,0 +1,488 @@
+"""
+Signing and verification backends for access tokens.
+
+Two interchangeable backends produce and accept standard compact JWS tokens:
+
+* ``native`` - signs with ``cryptography`` directly. Keys are parsed once
+  when the backend is built, and verification is a single HMAC, ECDSA or
+  Ed25519 operation plus two JSON decodes.
+* ``jose``   - the original ``python-jose`` path, kept for comparison and as a
+  fallback. It does not implement EdDSA.
+
+Supported algorithms are HS256/HS384/HS512 (shared ``SECRET_KEY``),
+ES256/ES384 and EdDSA (Ed25519). With an asymmetric algorithm only the
+service issuing tokens needs the private key; anything verifying them needs
+just the public key.
+
+Every backend holds a keyring: the current signing key plus any number of
+additional verification keys (the previous key while tokens signed with it
+are still in flight, or the next key published ahead of a rotation). Each
+key is identified by its RFC 7638 thumbprint, stamped as ``kid`` in token
+headers, and looked up by ``kid`` when verifying.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from calendar import timegm
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+
+HMAC_ALGORITHMS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+# Algorithm -> (curve, hash, size in bytes of each signature half)
+EC_ALGORITHMS = {
+    "ES256": (ec.SECP256R1, hashes.SHA256, 32),
+    "ES384": (ec.SECP384R1, hashes.SHA384, 48),
+}
+SUPPORTED_ALGORITHMS = (*HMAC_ALGORITHMS, *EC_ALGORITHMS, "EdDSA")
+
+_TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+class InvalidTokenError(ValueError):
+    """Raised when a token is malformed, badly signed or expired."""
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    try:
+        return base64.b64decode(data + "=" * (-len(data) % 4), altchars=b"-_", validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidTokenError("Invalid base64 segment") from exc
+
+
+def _json_segment(data: str) -> Dict[str, Any]:
+    try:
+        value = json.loads(_b64decode(data))
+    except ValueError as exc:
+        raise InvalidTokenError("Invalid JSON segment") from exc
+    if not isinstance(value, dict):
+        raise InvalidTokenError("Segment is not a JSON object")
+    return value
+
+
+def _normalize_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert datetime time claims to NumericDate, as python-jose does."""
+    claims = dict(claims)
+    for name in _TIME_CLAIMS:
+        if isinstance(claims.get(name), datetime):
+            claims[name] = timegm(claims[name].utctimetuple())
+    return claims
+
+
+def _check_key_type(algorithm: str, key: Any, private: bool) -> None:
+    if algorithm == "EdDSA":
+        expected = ed25519.Ed25519PrivateKey if private else ed25519.Ed25519PublicKey
+        if not isinstance(key, expected):
+            raise ValueError(f"Key type does not match algorithm {algorithm}")
+        return
+    curve = EC_ALGORITHMS[algorithm][0]
+    expected = ec.EllipticCurvePrivateKey if private else ec.EllipticCurvePublicKey
+    if not isinstance(key, expected) or not isinstance(key.curve, curve):
+        raise ValueError(f"{algorithm} requires a {curve.name} key")
+
+
+def load_verification_key(algorithm: str, key: str) -> Any:
+    """
+    Parse one additional verification key.
+
+    Args:
+        algorithm: JWS algorithm name
+        key: Shared secret for HMAC algorithms; otherwise a PEM public key
+            (a PEM private key is accepted and reduced to its public half)
+
+    Returns:
+        The verification key
+
+    Raises:
+        ValueError: If the key does not match the algorithm
+    """
+    if algorithm in HMAC_ALGORITHMS:
+        return key.encode("utf-8")
+    data = key.encode("utf-8")
+    if b"PRIVATE KEY" in data:
+        public_key = serialization.load_pem_private_key(data, password=None).public_key()
+    else:
+        public_key = serialization.load_pem_public_key(data)
+    _check_key_type(algorithm, public_key, private=False)
+    return public_key
+
+
+def _jwk_fields(key: Any) -> Dict[str, str]:
+    """Required JWK members of a verification key, as used for thumbprints."""
+    if isinstance(key, bytes):
+        return {"k": _b64encode(key).decode("ascii"), "kty": "oct"}
+    if isinstance(key, ed25519.Ed25519PublicKey):
+        raw = key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"crv": "Ed25519", "kty": "OKP", "x": _b64encode(raw).decode("ascii")}
+    numbers = key.public_numbers()
+    size = (key.curve.key_size + 7) // 8
+    return {
+        "crv": {"secp256r1": "P-256", "secp384r1": "P-384"}[key.curve.name],
+        "kty": "EC",
+        "x": _b64encode(numbers.x.to_bytes(size, "big")).decode("ascii"),
+        "y": _b64encode(numbers.y.to_bytes(size, "big")).decode("ascii"),
+    }
+
+
+def key_id(key: Any) -> str:
+    """
+    Get the RFC 7638 JWK thumbprint of a verification key, used as ``kid``.
+
+    Args:
+        key: Verification key from :func:`load_keys` or :func:`load_verification_key`
+
+    Returns:
+        Base64url SHA-256 thumbprint
+    """
+    canonical = json.dumps(_jwk_fields(key), separators=(",", ":"), sort_keys=True)
+    return _b64encode(hashlib.sha256(canonical.encode("utf-8")).digest()).decode("ascii")
+
+
+def load_keys(
+    algorithm: str,
+    secret: str = "",
+    private_key: str = "",
+    public_key: str = "",
+) -> Tuple[Any, Any]:
+    """
+    Parse the configured key material for ``algorithm``.
+
+    Args:
+        algorithm: JWS algorithm name
+        secret: Shared secret for HMAC algorithms
+        private_key: PEM private key for asymmetric algorithms (optional on
+            services that only verify tokens)
+        public_key: PEM public key; derived from the private key if empty
+
+    Returns:
+        Tuple of (signing key or None, verification key)
+
+    Raises:
+        ValueError: If the algorithm is unsupported or the keys do not match it
+    """
+    if algorithm in HMAC_ALGORITHMS:
+        if not secret:
+            raise ValueError(f"{algorithm} requires SECRET_KEY")
+        key = secret.encode("utf-8")
+        return key, key
+    if algorithm not in EC_ALGORITHMS and algorithm != "EdDSA":
+        raise ValueError(f"Unsupported JWT algorithm '{algorithm}'")
+
+    signing_key = None
+    if private_key:
+        signing_key = serialization.load_pem_private_key(private_key.encode("utf-8"), password=None)
+    if public_key:
+        verifying_key = serialization.load_pem_public_key(public_key.encode("utf-8"))
+    elif signing_key is not None:
+        verifying_key = signing_key.public_key()
+    else:
+        raise ValueError(f"{algorithm} requires JWT_PRIVATE_KEY or JWT_PUBLIC_KEY")
+
+    _check_key_type(algorithm, verifying_key, private=False)
+    if signing_key is not None:
+        _check_key_type(algorithm, signing_key, private=True)
+    return signing_key, verifying_key
+
+
+def public_jwk(algorithm: str, key: Any) -> Dict[str, str]:
+    """
+    Describe a public verification key as a JWK for the JWKS document.
+
+    Args:
+        algorithm: JWS algorithm the key is used with
+        key: Public verification key
+
+    Returns:
+        JWK dictionary including ``kid``, ``alg`` and ``use``
+    """
+    return {**_jwk_fields(key), "kid": key_id(key), "alg": algorithm, "use": "sig"}
+
+
+class JWTBackend(ABC):
+    """Signs and verifies compact JWS tokens with one algorithm and a keyring."""
+
+    name = ""
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: Any,
+        verifying_key: Any,
+        extra_verifying_keys: Iterable[Any] = (),
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            algorithm: JWS algorithm name
+            signing_key: Key from :func:`load_keys`; None for verify-only use
+            verifying_key: Key from :func:`load_keys`, matching ``signing_key``
+            extra_verifying_keys: Further keys accepted for verification
+                (retiring and upcoming keys)
+        """
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.kid = key_id(verifying_key)
+        self.verifying_keys: Dict[str, Any] = {self.kid: verifying_key}
+        for key in extra_verifying_keys:
+            self.verifying_keys.setdefault(key_id(key), key)
+
+        # Shared secrets are never published
+        keys: List[Dict[str, str]] = []
+        if algorithm not in HMAC_ALGORITHMS:
+            keys = [public_jwk(algorithm, key) for key in self.verifying_keys.values()]
+        self.jwks: Dict[str, Any] = {"keys": keys}
+
+    @property
+    def can_sign(self) -> bool:
+        return self.signing_key is not None
+
+    @abstractmethod
+    def encode(self, claims: Dict[str, Any], headers: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Sign a claims set with the current key.
+
+        Args:
+            claims: Claims to sign; datetime exp/iat/nbf become NumericDates
+            headers: Extra JOSE header fields
+
+        Returns:
+            The compact serialized token, with the signing key's ``kid``
+        """
+
+    @abstractmethod
+    def decode(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token's signature and time claims.
+
+        The key is selected by the header's ``kid``; tokens without one
+        (issued before kids were stamped) are checked against the current key.
+
+        Args:
+            token: Compact serialized token
+
+        Returns:
+            The verified claims
+
+        Raises:
+            InvalidTokenError: If the token is not valid
+        """
+
+
+class NativeJWTBackend(JWTBackend):
+    """Backend calling ``cryptography`` directly with pre-parsed keys."""
+
+    name = "native"
+
+    def __init__(self, algorithm: str, signing_key: Any, verifying_key: Any, extra_verifying_keys=()):
+        super().__init__(algorithm, signing_key, verifying_key, extra_verifying_keys)
+        if algorithm in HMAC_ALGORITHMS:
+            factory = self._hmac(HMAC_ALGORITHMS[algorithm])
+        elif algorithm in EC_ALGORITHMS:
+            factory = self._ecdsa(*EC_ALGORITHMS[algorithm][1:])
+        elif algorithm == "EdDSA":
+            factory = self._eddsa()
+        else:
+            raise ValueError(f"Unsupported JWT algorithm '{algorithm}'")
+        self._sign = None if signing_key is None else factory(signing_key)[0]
+        # kid -> verify(data, signature) for O(1) key selection
+        self._verifiers = {kid: factory(key)[1] for kid, key in self.verifying_keys.items()}
+
+    @staticmethod
+    def _hmac(digest):
+        def factory(key):
+            def sign(data: bytes) -> bytes:
+                return hmac.new(key, data, digest).digest()
+
+            def verify(data: bytes, signature: bytes) -> bool:
+                return hmac.compare_digest(hmac.new(key, data, digest).digest(), signature)
+
+            return sign, verify
+
+        return factory
+
+    @staticmethod
+    def _ecdsa(hash_class, size):
+        signature_algorithm = ec.ECDSA(hash_class())
+
+        def factory(key):
+            def sign(data: bytes) -> bytes:
+                r, s = decode_dss_signature(key.sign(data, signature_algorithm))
+                return r.to_bytes(size, "big") + s.to_bytes(size, "big")
+
+            def verify(data: bytes, signature: bytes) -> bool:
+                if len(signature) != 2 * size:
+                    return False
+                der = encode_dss_signature(
+                    int.from_bytes(signature[:size], "big"), int.from_bytes(signature[size:], "big")
+                )
+                try:
+                    key.verify(der, data, signature_algorithm)
+                except InvalidSignature:
+                    return False
+                return True
+
+            return sign, verify
+
+        return factory
+
+    @staticmethod
+    def _eddsa():
+        def factory(key):
+            def sign(data: bytes) -> bytes:
+                return key.sign(data)
+
+            def verify(data: bytes, signature: bytes) -> bool:
+                try:
+                    key.verify(signature, data)
+                except InvalidSignature:
+                    return False
+                return True
+
+            return sign, verify
+
+        return factory
+
+    def encode(self, claims: Dict[str, Any], headers: Optional[Dict[str, Any]] = None) -> str:
+        if self._sign is None:
+            raise ValueError("No private key configured for signing")
+        header = {"alg": self.algorithm, "kid": self.kid, "typ": "JWT", **(headers or {})}
+        signing_input = b".".join(
+            (
+                _b64encode(json.dumps(header, separators=(",", ":"), sort_keys=True).encode("utf-8")),
+                _b64encode(json.dumps(_normalize_claims(claims), separators=(",", ":")).encode("utf-8")),
+            )
+        )
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode("ascii")
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        parts = token.split(".")
+        if len(parts) != 3:
+            raise InvalidTokenError("Token must have three segments")
+        header = _json_segment(parts[0])
+        # Only the configured algorithm is accepted, never the token's choice
+        if header.get("alg") != self.algorithm:
+            raise InvalidTokenError("Unexpected token algorithm")
+        kid = header.get("kid", self.kid)
+        verify = self._verifiers.get(kid) if isinstance(kid, str) else None
+        if verify is None:
+            raise InvalidTokenError("Unknown signing key")
+        signing_input = f"{parts[0]}.{parts[1]}".encode("ascii", "replace")
+        if not verify(signing_input, _b64decode(parts[2])):
+            raise InvalidTokenError("Signature verification failed")
+
+        claims = _json_segment(parts[1])
+        now = time.time()
+        exp = claims.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise InvalidTokenError("Invalid exp claim")
+            if now >= exp:
+                raise InvalidTokenError("Token has expired")
+        nbf = claims.get("nbf")
+        if nbf is not None:
+            if not isinstance(nbf, (int, float)):
+                raise InvalidTokenError("Invalid nbf claim")
+            if now < nbf:
+                raise InvalidTokenError("Token is not yet valid")
+        return claims
+
+
+class JoseJWTBackend(JWTBackend):
+    """Backend delegating to ``python-jose`` with keys constructed once."""
+
+    name = "jose"
+
+    def __init__(self, algorithm: str, signing_key: Any, verifying_key: Any, extra_verifying_keys=()):
+        super().__init__(algorithm, signing_key, verifying_key, extra_verifying_keys)
+        if algorithm not in HMAC_ALGORITHMS and algorithm not in EC_ALGORITHMS:
+            raise ValueError(f"The jose backend does not support '{algorithm}'")
+        from jose import jwk
+
+        self._signing_jwk = None if signing_key is None else jwk.construct(self._pem(signing_key), algorithm)
+        self._verifying_jwks = {
+            kid: jwk.construct(self._pem(key), algorithm) for kid, key in self.verifying_keys.items()
+        }
+
+    @staticmethod
+    def _pem(key: Any) -> Any:
+        if isinstance(key, ec.EllipticCurvePrivateKey):
+            return key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        if isinstance(key, ec.EllipticCurvePublicKey):
+            return key.public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+        return key
+
+    def encode(self, claims: Dict[str, Any], headers: Optional[Dict[str, Any]] = None) -> str:
+        from jose import jwt
+
+        if not self.can_sign:
+            raise ValueError("No private key configured for signing")
+        return jwt.encode(
+            dict(claims), self._signing_jwk, algorithm=self.algorithm, headers={"kid": self.kid, **(headers or {})}
+        )
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        from jose import JWTError, jwt
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid", self.kid)
+            key = self._verifying_jwks.get(kid) if isinstance(kid, str) else None
+            if key is None:
+                raise InvalidTokenError("Unknown signing key")
+            return jwt.decode(token, key, algorithms=[self.algorithm])
+        except JWTError as exc:
+            raise InvalidTokenError(str(exc)) from exc
+
+
+BACKENDS = {backend.name: backend for backend in (NativeJWTBackend, JoseJWTBackend)}
+
+
+def build_backend(
+    backend: str,
+    algorithm: str,
+    secret: str = "",
+    private_key: str = "",
+    public_key: str = "",
+    verification_keys: Iterable[str] = (),
+) -> JWTBackend:
+    """
+    Build a backend from configuration values.
+
+    Args:
+        backend: Backend name (``native`` or ``jose``)
+        algorithm: JWS algorithm name
+        secret: Shared secret for HMAC algorithms
+        private_key: PEM private key for asymmetric algorithms
+        public_key: PEM public key for asymmetric algorithms
+        verification_keys: Additional secrets or PEM keys accepted for
+            verification during a rotation
+
+    Returns:
+        A ready-to-use backend
+
+    Raises:
+        ValueError: If the backend, algorithm or keys are invalid
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown JWT backend '{backend}'")
+    signing_key, verifying_key = load_keys(algorithm, secret, private_key, public_key)
+    extra = [load_verification_key(algorithm, key) for key in verification_keys]
+    return BACKENDS[backend](algorithm, signing_key, verifying_key, extra)
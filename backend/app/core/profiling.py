@@ -0,0 +1,224 @@
+"""
+On-demand stack-sampling profiles of live requests.
+
+With ``PROFILING_ENABLED``, a request is profiled when it carries the
+``X-Profile-Token`` header with the ``PROFILING_TOKEN`` secret, or by random
+choice at ``PROFILING_SAMPLE_RATE``. While it runs, a sampler thread records
+the stacks of every other thread every ``PROFILING_INTERVAL_MS``. That covers
+the event loop (token verification, pydantic, the Google client) as well as
+the threadpool where the sync stack runs its database driver, which
+``cProfile`` would miss since it only sees the thread it is enabled on.
+The sampler needs the GIL, so while other threads are busy in Python the
+effective interval stretches towards ``sys.getswitchinterval()`` (5 ms).
+
+Profiles are written in the collapsed-stack format read by flamegraph.pl and
+speedscope, one ``frame;frame;frame count`` line per distinct stack, to a
+ring of the newest ``PROFILING_MAX_FILES`` files in ``PROFILING_DIR``. Only
+one request per process is profiled at a time, and stacks of concurrent
+requests on the same process appear in its profile.
+"""
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_SUFFIX = ".folded"
+# Frames of threads parked waiting for work; their samples are dropped
+_IDLE_FILES = tuple(os.sep + name for name in ("threading.py", "queue.py", os.path.join("futures", "thread.py")))
+_NAME_PATTERN = re.compile(r"^[\w.-]+\.folded$")
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return "{}:{}".format(frame.f_globals.get("__name__", "?"), getattr(code, "co_qualname", code.co_name))
+
+
+class StackSampler:
+    """Counts the collapsed stacks of all other threads until stopped."""
+
+    def __init__(self, interval: float):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names: Dict[int, str] = {}
+        while not self._stopped.wait(self.interval):
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                if ident not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread-{}".format(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """The profile in collapsed-stack format, heaviest stacks first."""
+        return "".join("{} {}\n".format(stack, count) for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """A bounded directory of profile files, oldest removed first."""
+
+    def __init__(self, directory: str, max_files: int):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding the profiles (created on first write)
+            max_files: Most profiles kept
+        """
+        self.directory = directory
+        self.max_files = max_files
+
+    def write(self, name: str, content: str) -> str:
+        """
+        Save a profile and drop the oldest beyond ``max_files``.
+
+        Returns:
+            The file name of the saved profile
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        for stale in self.list()[self.max_files:]:
+            try:
+                os.unlink(os.path.join(self.directory, stale["name"]))
+            except FileNotFoundError:
+                # Trimmed by another worker
+                pass
+        return name
+
+    def list(self) -> List[Dict[str, object]]:
+        """Profiles on disk, newest first."""
+        try:
+            names = [name for name in os.listdir(self.directory) if _NAME_PATTERN.match(name)]
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for name in sorted(names, reverse=True):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            profiles.append({"name": name, "size": stat.st_size, "created_at": stat.st_mtime})
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        """Path of a stored profile, or None for unknown or unsafe names."""
+        if not _NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^\w-]+", "_", value).strip("_") or "root"
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling selected requests into a :class:`ProfileStore`.
+
+    Requests that are not selected pay one header scan and one random draw.
+    """
+
+    def __init__(self, app, store: ProfileStore, token: str = "", sample_rate: float = 0.0, interval: float = 0.001):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            store: Where profiles are written
+            token: Secret that selects a request via ``X-Profile-Token``; empty disables the header
+            sample_rate: Fraction of other requests to profile
+            interval: Seconds between stack samples
+        """
+        self.app = app
+        self.store = store
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._busy = threading.Lock()
+
+    def _selected(self, scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        start = time.perf_counter()
+        try:
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                sampler.stop()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            route = getattr(scope.get("route"), "path", scope["path"])
+            now = time.time()
+            name = "{}.{:03d}-{}-{}-{}-{}-{}ms{}".format(
+                time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)), int(now * 1000) % 1000, os.getpid(),
+                scope["method"], _slug(route), status, int(elapsed_ms), PROFILE_SUFFIX,
+            )
+            try:
+                await run_in_threadpool(self.store.write, name, sampler.collapsed())
+            except OSError:
+                logger.exception("Could not write request profile %s", name)
+        finally:
+            self._busy.release()
+
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
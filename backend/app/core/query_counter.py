@@ -0,0 +1,103 @@
+"""
+Per-request SQL statement counting.
+
+A ``before_cursor_execute`` listener on every engine adds each statement to
+the :class:`QueryCounter` active in the current context. Counters are kept
+in a context variable, which follows a request onto the event loop, into
+the threadpool that runs sync endpoints and dependencies, and through the
+greenlets of the async driver.
+
+:class:`QueryCountMiddleware` reports each request's total in
+``X-Query-Count`` when ``QUERY_COUNT_HEADER`` is enabled. Tests put a
+budget on endpoints with :func:`count_queries` (see ``tests/query_budget.py``).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+QUERY_COUNT_HEADER = b"x-query-count"
+
+_current: ContextVar[Optional["QueryCounter"]] = ContextVar("query_counter", default=None)
+
+
+class QueryCounter:
+    """Statements executed while the counter is active, including nested counters."""
+
+    __slots__ = ("count", "statements", "_parent")
+
+    def __init__(self, record: bool = False, parent: Optional["QueryCounter"] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            record: Keep the SQL of every statement, not just the count
+            parent: Enclosing counter that also receives the statements
+        """
+        self.count = 0
+        self.statements: Optional[List[str]] = [] if record else None
+        self._parent = parent
+
+    def add(self, statement: str) -> None:
+        counter = self
+        while counter is not None:
+            counter.count += 1
+            if counter.statements is not None:
+                counter.statements.append(statement)
+            counter = counter._parent
+
+
+@contextmanager
+def count_queries(record: bool = False) -> Iterator[QueryCounter]:
+    """
+    Count the statements executed inside the block.
+
+    Args:
+        record: Keep the SQL of every statement
+
+    Yields:
+        The active QueryCounter
+    """
+    counter = QueryCounter(record, parent=_current.get())
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.add(statement)
+
+
+class QueryCountMiddleware:
+    """
+    Pure ASGI middleware adding ``X-Query-Count`` while ``QUERY_COUNT_HEADER`` is on.
+
+    The count covers statements issued before the response starts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_COUNT_HEADER:
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as counter:
+            async def send_with_count(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER, str(counter.count).encode()))
+                    message = dict(message, headers=headers)
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
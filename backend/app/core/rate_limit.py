@@ -0,0 +1,254 @@
+"""
+Rate limits and admission control for the expensive sign-in endpoint.
+
+``POST /auth/google`` verifies an RSA signature, writes to the database and
+signs a JWT, so a credential-stuffing burst or a client retry storm would
+otherwise tie up the threadpool and the connection pool for everyone.
+
+* :class:`RateLimitMiddleware` answers ``429`` with ``Retry-After`` from a
+  per-client-IP token bucket before the request body is even read, and
+  ``503`` once ``RATE_LIMIT_MAX_IN_FLIGHT`` sign-ins are already running in
+  the worker.
+* The route checks a per-email bucket once the Google token is verified
+  (the email is only trustworthy then) and before any database work.
+
+Buckets hold ``burst`` tokens and refill at ``per_minute``; each request
+takes one. They live in a :class:`RateLimitBackend`. The in-memory backend
+keeps the ``RATE_LIMIT_MAX_KEYS`` most recently used buckets per worker,
+so memory stays bounded whatever the number of clients; a shared store
+(Redis, for instance) implements :meth:`RateLimitBackend.acquire` and is
+added to ``BACKENDS``. A backend error lets the request through.
+
+Rejections are counted in ``rate_limited_requests_total{route, reason}``.
+"""
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Tuple
+
+from .config import settings
+from .metrics import RATE_LIMITED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(NamedTuple):
+    """Token bucket parameters: sustained requests per minute and burst size."""
+
+    per_minute: float
+    burst: int
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets, shared by whoever shares the backend."""
+
+    name = ""
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """
+        Take one token from the bucket of ``key``.
+
+        Args:
+            key: Bucket key, such as ``ip:203.0.113.7``
+            limit: Bucket parameters
+
+        Returns:
+            0.0 if a token was taken, otherwise the seconds until one is
+            available (nothing is taken then)
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets in a bounded LRU."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the backend.
+
+        Args:
+            maxsize: Most buckets kept; the least recently used is dropped
+                (a dropped bucket starts full again)
+            clock: Source of time, overridable for tests
+        """
+        self.maxsize = maxsize
+        self._clock = clock
+        # key -> (tokens left, time of the last update)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def take(self, key: str, limit: RateLimit) -> float:
+        """Synchronous :meth:`acquire`."""
+        rate = limit.per_minute / 60
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            tokens = limit.burst if bucket is None else min(limit.burst, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate if rate > 0 else math.inf
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        return wait
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        return self.take(key, limit)
+
+    def clear(self) -> None:
+        """Remove all buckets."""
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "keys": len(self._buckets), "maxsize": self.maxsize, "evictions": self.evictions}
+
+
+BACKENDS = {backend.name: backend for backend in (MemoryRateLimitBackend,)}
+
+
+def build_backend(name: str, max_keys: int) -> RateLimitBackend:
+    """
+    Build a rate limit backend from configuration values.
+
+    Args:
+        name: Backend name (``memory``)
+        max_keys: Most buckets an in-memory backend keeps
+
+    Returns:
+        A ready-to-use backend
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown rate limit backend '{name}'")
+    return BACKENDS[name](max_keys)
+
+
+def retry_after_header(seconds: float) -> str:
+    """``Retry-After`` value: whole seconds, at least one."""
+    return str(max(1, math.ceil(seconds)))
+
+
+class RateLimiter:
+    """The sign-in limits applied to one backend."""
+
+    def __init__(self, backend: RateLimitBackend, ip_limit: RateLimit, email_limit: RateLimit, enabled: bool = True):
+        """
+        Initialize the limiter.
+
+        Args:
+            backend: Where the buckets live
+            ip_limit: Bucket per client IP
+            email_limit: Bucket per verified email
+            enabled: When false every check passes
+        """
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.enabled = enabled
+
+    async def _check(self, key: str, limit: RateLimit, route: str, reason: str) -> float:
+        if not self.enabled:
+            return 0.0
+        try:
+            wait = await self.backend.acquire(key, limit)
+        except Exception as exc:
+            logger.warning("Rate limit backend failed, letting the request through: %s", exc)
+            return 0.0
+        if wait > 0:
+            RATE_LIMITED_REQUESTS.labels(route, reason).inc()
+        return wait
+
+    async def check_ip(self, ip: str, route: str) -> float:
+        """Take a token for a client IP; returns the seconds to wait, 0.0 if allowed."""
+        return await self._check("ip:" + ip, self.ip_limit, route, "ip")
+
+    async def check_email(self, email: str, route: str) -> float:
+        """Take a token for a verified email; returns the seconds to wait, 0.0 if allowed."""
+        return await self._check("email:" + email.lower(), self.email_limit, route, "email")
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware applying the per-IP limit and the in-flight cap to
+    ``POST`` requests on ``paths``.
+
+    The client IP is ``scope["client"]``; behind a proxy, uvicorn rewrites it
+    from ``X-Forwarded-For`` for the proxies listed in ``FORWARDED_ALLOW_IPS``
+    (``gunicorn.conf.py``). An unlisted proxy puts every client in its bucket.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, paths: Iterable[str], max_in_flight: int = 0):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            limiter: Limiter holding the per-IP bucket settings
+            paths: Exact request paths to protect
+            max_in_flight: Most protected requests running at once in this
+                worker; 0 means no cap
+        """
+        self.app = app
+        self.limiter = limiter
+        self.paths = frozenset(paths)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        client = scope.get("client")
+        wait = await self.limiter.check_ip(client[0] if client else "unknown", path)
+        if wait > 0:
+            await self._reject(send, 429, b"Too many requests", wait)
+            return
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            RATE_LIMITED_REQUESTS.labels(path, "in_flight").inc()
+            await self._reject(send, 503, b"Server busy, try again shortly", 1)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    async def _reject(send, status: int, detail: bytes, wait: float) -> None:
+        body = b'{"detail":"' + detail + b'"}'
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry_after_header(wait).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+rate_limiter = RateLimiter(
+    build_backend(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_MAX_KEYS),
+    ip_limit=RateLimit(settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST),
+    email_limit=RateLimit(settings.RATE_LIMIT_EMAIL_PER_MINUTE, settings.RATE_LIMIT_EMAIL_BURST),
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,24 @@
+"""
+JSON responses without FastAPI's second validation pass.
+
+When a route returns an object, FastAPI validates it again against the
+route's ``response_model``, converts it to plain Python with
+``jsonable_encoder`` and only then encodes it. :class:`ModelResponse` skips
+all of that for a model that was validated when it was built: pydantic-core
+serializes it straight to JSON bytes. Routes keep ``response_model`` for the
+OpenAPI schema.
+
+Everything else (plain dicts such as ``/health``) is encoded by orjson
+through ``ORJSONResponse``, the application's default response class.
+"""
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class ModelResponse(Response):
+    """JSON response rendered directly from a pydantic model instance."""
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
@@ -0,0 +1,157 @@
+"""
+In-process list of revoked access tokens.
+
+Access tokens are verified without the database, so revocations (logout,
+admin revoke) are stored in the ``revoked_tokens`` table and every worker
+keeps a copy of the live ones in memory. ``verify_token`` checks a payload
+with one or two dict lookups: its ``jti`` against revoked tokens, and its
+``sub`` against users whose tokens were all revoked at some point (tokens
+issued at or before that point are rejected).
+
+Entries are dropped once the tokens they cover have expired, so the list
+never holds more than ``ACCESS_TOKEN_EXPIRE_MINUTES`` worth of revocations.
+Workers pull new rows incrementally (``app/services/revocation_sync.py``).
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+
+class Revocation(NamedTuple):
+    """One row of ``revoked_tokens``; ``jti`` is None for a user-wide revocation."""
+
+    jti: Optional[str]
+    user_id: int
+    revoked_at: datetime
+    expires_at: datetime
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class RevocationList:
+    """
+    Revoked token ids and users, each kept until the tokens it covers expire.
+
+    Lookups take no lock: writers update the dicts in place and pruning
+    swaps in new ones, both atomic under the GIL.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """
+        Initialize an empty list.
+
+        Args:
+            clock: Source of time, overridable for tests
+        """
+        self._clock = clock
+        # jti -> expiry timestamp
+        self._tokens: Dict[str, float] = {}
+        # sub -> (revoked_at, expiry) timestamps
+        self._users: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        # Latest revoked_at applied, where the next incremental pull starts
+        self.cursor: Optional[datetime] = None
+        self.last_sync: Optional[float] = None
+        self.rejected = 0
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """
+        Check a verified token payload against the list.
+
+        Args:
+            payload: Verified token payload
+
+        Returns:
+            True if the token's ``jti`` or its user was revoked
+        """
+        jti = payload.get("jti")
+        if jti is not None and jti in self._tokens:
+            self.rejected += 1
+            return True
+        if self._users:
+            entry = self._users.get(payload.get("sub"))
+            if entry is not None:
+                iat = payload.get("iat")
+                # iat carries microseconds (create_access_token); tokens
+                # with a whole-second iat from the revocation's second are
+                # rejected, as they may predate it
+                if not isinstance(iat, (int, float)) or iat <= entry[0]:
+                    self.rejected += 1
+                    return True
+        return False
+
+    def apply(self, revocations: Iterable[Revocation]) -> None:
+        """
+        Add revocations, from this worker or pulled from the database.
+
+        Applying a revocation twice has no effect, so pulls may overlap.
+
+        Args:
+            revocations: Rows with ``jti``, ``user_id``, ``revoked_at`` and ``expires_at``
+        """
+        now = self._clock()
+        with self._lock:
+            for revocation in revocations:
+                revoked_at = _as_utc(revocation.revoked_at)
+                expires = _as_utc(revocation.expires_at).timestamp()
+                if self.cursor is None or revoked_at > self.cursor:
+                    self.cursor = revoked_at
+                if expires <= now:
+                    continue
+                if revocation.jti is not None:
+                    self._tokens[revocation.jti] = expires
+                    continue
+                sub = str(revocation.user_id)
+                entry = (revoked_at.timestamp(), expires)
+                previous = self._users.get(sub)
+                if previous is not None:
+                    entry = (max(entry[0], previous[0]), max(entry[1], previous[1]))
+                self._users[sub] = entry
+
+    def prune(self) -> int:
+        """
+        Drop entries whose tokens have all expired.
+
+        Returns:
+            Number of entries dropped
+        """
+        now = self._clock()
+        with self._lock:
+            tokens = {jti: expires for jti, expires in self._tokens.items() if expires > now}
+            users = {sub: entry for sub, entry in self._users.items() if entry[1] > now}
+            dropped = len(self._tokens) - len(tokens) + len(self._users) - len(users)
+            self._tokens, self._users = tokens, users
+        return dropped
+
+    def clear(self) -> None:
+        """Remove all entries and forget the sync position."""
+        with self._lock:
+            self._tokens, self._users = {}, {}
+            self.cursor = None
+            self.last_sync = None
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._users)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get list counters.
+
+        Returns:
+            Dictionary with the number of revoked tokens and users, the
+            sync position, seconds since the last sync and rejected tokens
+        """
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "cursor": self.cursor.isoformat() if self.cursor else None,
+            "seconds_since_sync": round(self._clock() - self.last_sync, 3) if self.last_sync else None,
+            "rejected": self.rejected,
+        }
+
+
+revocation_list = RevocationList()
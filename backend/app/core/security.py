@@ -1,19 +1,152 @@
+import hashlib
+import secrets
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
+from typing import Any, Dict, Optional
+from .cache import TTLCache
 from .config import settings
+from .jwt_backends import InvalidTokenError, JWTBackend, build_backend
+from .revocation import revocation_list
+from .user_cache import CachedUser
+
+# Schema version of the profile claim set embedded by JWT_PROFILE_CLAIMS
+PROFILE_CLAIMS_VERSION = 1
+
+
+_backend_lock = threading.Lock()
+_backend: Optional[JWTBackend] = None
+_backend_config: Optional[tuple] = None
+
+
+def get_jwt_backend() -> JWTBackend:
+    """
+    Get the JWT backend for the current settings.
+
+    Keys are parsed once and the backend is reused until one of the JWT
+    settings changes, so rotating a key only needs a settings update.
+    Tokens signed with a key listed in ``JWT_VERIFICATION_KEYS`` keep
+    verifying across the rotation.
+
+    Returns:
+        The configured JWTBackend
+    """
+    global _backend, _backend_config
+    config = (
+        settings.JWT_BACKEND,
+        settings.ALGORITHM,
+        settings.SECRET_KEY,
+        settings.JWT_PRIVATE_KEY,
+        settings.JWT_PUBLIC_KEY,
+        tuple(settings.JWT_VERIFICATION_KEYS),
+    )
+    backend = _backend
+    if backend is not None and _backend_config == config:
+        return backend
+    with _backend_lock:
+        if _backend is None or _backend_config != config:
+            _backend = build_backend(
+                settings.JWT_BACKEND,
+                settings.ALGORITHM,
+                secret=settings.SECRET_KEY,
+                private_key=settings.JWT_PRIVATE_KEY.replace("\\n", "\n"),
+                public_key=settings.JWT_PUBLIC_KEY.replace("\\n", "\n"),
+                verification_keys=[key.replace("\\n", "\n") for key in settings.JWT_VERIFICATION_KEYS],
+            )
+            _backend_config = config
+        return _backend
 
 
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # jti identifies the token for logout; iat dates it for user-wide
+    # revocation, to the microsecond so a token issued in the same second
+    # as a "revoke all" but after it is still accepted
+    to_encode.update({"exp": expire, "iat": now.timestamp(), "jti": secrets.token_hex(16)})
+    encoded_jwt = get_jwt_backend().encode(to_encode)
     return encoded_jwt
 
 
+# Verified payloads keyed by token digest, each kept until the token's exp.
+# Entries remember the backend (and so the key) they were verified with, so
+# rotating keys or switching algorithm bypasses them.
+access_token_cache = TTLCache(maxsize=settings.ACCESS_TOKEN_CACHE_SIZE)
+
+
 def verify_token(token: str):
+    key = hashlib.sha256(token.encode("utf-8", "surrogatepass")).digest()
+    backend = get_jwt_backend()
+    cached = access_token_cache.get(key)
+    if cached is not None and cached[0] is backend:
+        payload = cached[1]
+    else:
+        try:
+            payload = backend.decode(token)
+        except InvalidTokenError:
+            return None
+
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            access_token_cache.set(key, (backend, payload), ttl=exp - time.time())
+
+    # Checked on every call, cached or not, so a revocation applies at once
+    if revocation_list.is_revoked(payload):
+        return None
+    return dict(payload)
+
+
+def profile_claims(user: Any) -> Dict[str, Any]:
+    """
+    Build the versioned profile claims embedded in access tokens when
+    ``JWT_PROFILE_CLAIMS`` is enabled.
+
+    Args:
+        user: User ORM object or snapshot
+
+    Returns:
+        Claims to merge into the token payload
+    """
+    return {
+        "pv": user.profile_version or 1,
+        "profile": {
+            "v": PROFILE_CLAIMS_VERSION,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "profile_picture": user.profile_picture,
+            "google_id": user.google_id,
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+            "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+        },
+    }
+
+
+def user_from_profile_claims(payload: Dict[str, Any]) -> Optional[CachedUser]:
+    """
+    Rebuild a user snapshot from a verified token payload.
+
+    Args:
+        payload: Verified token payload
+
+    Returns:
+        CachedUser, or None if the token carries no usable profile claims
+        of the current schema version
+    """
+    profile = payload.get("profile")
+    if not isinstance(profile, dict) or profile.get("v") != PROFILE_CLAIMS_VERSION:
+        return None
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
+        return CachedUser(
+            id=int(payload["sub"]),
+            email=payload["email"],
+            first_name=profile.get("first_name"),
+            last_name=profile.get("last_name"),
+            profile_picture=profile.get("profile_picture"),
+            google_id=profile.get("google_id"),
+            created_at=datetime.fromisoformat(profile["created_at"]),
+            updated_at=datetime.fromisoformat(profile["updated_at"]) if profile.get("updated_at") else None,
+            profile_version=int(payload["pv"]),
+        )
+    except (KeyError, TypeError, ValueError):
         return None
@@ -0,0 +1,68 @@
+"""
+Worker sizing for the production server.
+
+``gunicorn.conf.py`` starts one uvicorn worker per CPU the container may
+use. ``os.cpu_count()`` reports the host's CPUs, so the count comes from
+the cgroup CPU quota (v2 ``cpu.max`` or v1 ``cpu.cfs_quota_us``) and the
+process's CPU affinity, whichever is lower.
+"""
+import math
+import os
+from typing import Optional
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_quota(root: str) -> Optional[float]:
+    """CPUs allowed by the cgroup quota, or None when unlimited or unknown."""
+    cpu_max = _read(os.path.join(root, "cpu.max"))
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+    else:
+        quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+        period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    try:
+        quota_us, period_us = int(quota), int(period)
+    except (TypeError, ValueError):
+        # "max" (v2) or missing files
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return quota_us / period_us
+
+
+def available_cpus(cgroup_root: str = CGROUP_ROOT) -> float:
+    """
+    CPUs this process can actually use.
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        The cgroup CPU quota, capped at the CPUs in the affinity mask
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = float(len(os.sched_getaffinity(0)))
+    else:
+        cpus = float(os.cpu_count() or 1)
+    quota = _cgroup_quota(cgroup_root)
+    return min(cpus, quota) if quota is not None else cpus
+
+
+def worker_count(cpus: float) -> int:
+    """
+    Worker processes for ``cpus`` CPUs: one each, and one for a fraction.
+
+    Every worker runs its own event loop, and the sync database stack
+    waits in its threadpool rather than on the CPU, so more workers than
+    CPUs would only add memory and connections.
+    """
+    return max(1, math.ceil(cpus))
@@ -0,0 +1,92 @@
+"""
+Read-through cache of user profiles for authenticated requests.
+
+Every authenticated request resolves its user by ID, and that data almost
+never changes. The cache keeps compact, detached snapshots (never live ORM
+objects, which are bound to a session) in a bounded LRU with a TTL. Writes
+through the repository refresh the entry in this process; the TTL bounds
+how long other worker processes may serve an older profile.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    """Immutable snapshot of a User row, readable like the ORM object."""
+
+    id: int
+    email: str
+    first_name: Optional[str]
+    last_name: Optional[str]
+    profile_picture: Optional[str]
+    google_id: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    profile_version: int = 1
+
+    @classmethod
+    def from_user(cls, user: Any) -> "CachedUser":
+        """Copy the column values of a User (or another snapshot)."""
+        return cls(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            profile_picture=user.profile_picture,
+            google_id=user.google_id,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            profile_version=user.profile_version or 1,
+        )
+
+
+class UserCache:
+    """Bounded LRU+TTL cache of :class:`CachedUser` snapshots keyed by user ID."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of users kept; 0 disables caching
+            ttl: Seconds a snapshot may be served
+        """
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        """Return the cached snapshot for ``user_id``, if any."""
+        return self._cache.get(user_id)
+
+    def put(self, user: Any) -> CachedUser:
+        """
+        Store a snapshot of ``user``, replacing any previous entry.
+
+        Args:
+            user: User ORM object or snapshot
+
+        Returns:
+            The stored snapshot
+        """
+        snapshot = CachedUser.from_user(user)
+        self._cache.set(snapshot.id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the entry for ``user_id``."""
+        self._cache.pop(user_id)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size, hit, miss and eviction counters plus the hit rate."""
+        return self._cache.stats()
+
+
+user_cache = UserCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
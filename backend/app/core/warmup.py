@@ -0,0 +1,164 @@
+"""
+Start-up warm-up and readiness.
+
+The first requests of a fresh worker would otherwise pay for opening
+database connections, fetching Google's signing certificates, importing
+the RSA code, parsing the JWT keys and running the response schemas for
+the first time, and would accept revoked tokens until the revocation list
+is loaded. The lifespan hook in ``app.main`` runs :func:`warm_up` in
+the background as soon as the worker starts; ``/ready`` answers 503 until
+it has finished, so a load balancer only routes traffic to warmed workers.
+``/health`` stays a plain liveness check.
+
+A failed step is logged and reported by ``/ready`` but does not keep the
+worker out of rotation: requests will retry whatever the step could not do.
+The exception is a step in ``REQUIRED_STEPS``: loading the revocation list
+is retried, with backoff, until it succeeds, since until then the worker
+would accept revoked tokens.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core import database
+from app.core.config import settings
+from app.core.google_verifier import google_token_verifier
+from app.core.security import get_jwt_backend
+from app.schemas.user import GoogleAuthResponse, UserResponse
+from app.services.revocation_sync import sync_revocations
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Progress of the warm-up, as reported by ``/ready``."""
+
+    def __init__(self):
+        self.ready = False
+        self.durations_ms: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "warm_up_ms": dict(self.durations_ms),
+            "errors": dict(self.errors),
+        }
+
+
+readiness = Readiness()
+
+
+def _open_sync_connections(count: int) -> None:
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(database.engine.connect())
+    finally:
+        # Closing returns them to the pool, where they stay open
+        for connection in connections:
+            connection.close()
+
+
+async def _open_async_connections(count: int) -> None:
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(await database.async_engine.connect())
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+async def open_db_connections(count: Optional[int] = None) -> None:
+    """Fill the pool of the configured stack with ``WARMUP_DB_CONNECTIONS`` connections."""
+    count = settings.WARMUP_DB_CONNECTIONS if count is None else count
+    if settings.DATABASE_ASYNC:
+        await _open_async_connections(count)
+    else:
+        await run_in_threadpool(_open_sync_connections, count)
+
+
+async def preload_google_certs() -> None:
+    """Fetch (or load from disk) the certificates and parse their keys."""
+    await google_token_verifier.preload_async()
+
+
+async def load_jwt_keys() -> None:
+    """Parse the JWT signing keys and sign one throwaway token."""
+    get_jwt_backend().encode({"sub": "warm-up", "exp": int(time.time()) + 60})
+
+
+async def exercise_schemas() -> None:
+    """Validate and serialize the sign-in responses once."""
+    user = UserResponse(
+        id=1,
+        email="warm-up@example.com",
+        first_name="Warm",
+        last_name="Up",
+        profile_picture=None,
+        created_at=datetime.now(timezone.utc),
+        updated_at=None,
+    )
+    response = GoogleAuthResponse(access_token="x", token_type="bearer", refresh_token="y", user=user)
+    GoogleAuthResponse.model_validate_json(response.model_dump_json())
+    # /auth/me and the services validate from ORM/cached objects
+    UserResponse.model_validate(SimpleNamespace(**user.model_dump())).model_dump_json()
+
+
+async def load_revocations() -> None:
+    """Load the live revocations into this worker's list."""
+    await sync_revocations()
+
+
+STEPS: List[Tuple[str, Callable[[], Awaitable[None]]]] = [
+    ("db_connections", open_db_connections),
+    ("revocations", load_revocations),
+    ("google_certs", preload_google_certs),
+    ("jwt_keys", load_jwt_keys),
+    ("schemas", exercise_schemas),
+]
+# Steps retried until they succeed before the worker is marked ready
+REQUIRED_STEPS = frozenset({"revocations"})
+# First retry delay of a required step, doubled after each failure up to the maximum
+RETRY_SECONDS = 0.5
+RETRY_MAX_SECONDS = 30.0
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable[None]], state: Readiness) -> None:
+    delay = RETRY_SECONDS
+    while True:
+        try:
+            await step()
+            state.errors.pop(name, None)
+            return
+        except Exception as exc:
+            logger.warning("Warm-up step %s failed: %s", name, exc)
+            state.errors[name] = str(exc) or type(exc).__name__
+        if name not in REQUIRED_STEPS:
+            return
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, RETRY_MAX_SECONDS)
+
+
+async def warm_up(state: Readiness = readiness) -> None:
+    """
+    Run every warm-up step, then mark the worker ready.
+
+    Required steps are retried until they succeed, so the worker stays
+    not ready while, for instance, the database is unreachable.
+
+    Args:
+        state: Readiness record updated with step durations and errors
+    """
+    for name, step in STEPS:
+        start = time.perf_counter()
+        await _run_step(name, step, state)
+        state.durations_ms[name] = round((time.perf_counter() - start) * 1000, 2)
+    state.ready = True
+    logger.info("Warm-up finished: %s", state.durations_ms)
@@ -1,17 +1,60 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.routes import auth
+from app.core.google_certs import google_cert_cache
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware, profile_store
+from app.core.query_counter import QueryCountMiddleware
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.warmup import readiness, warm_up
+from app.routes import auth, internal, users, well_known
+from app.services.revocation_sync import run_sync_loop
 
 # Note: Database tables are now managed by Alembic migrations
 # Run: alembic upgrade head
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so /health answers at once; /ready waits for it
+    warm_up_task = asyncio.create_task(warm_up()) if settings.WARMUP_ENABLED else None
+    if warm_up_task is None:
+        readiness.ready = True
+    sync_task = None
+    if settings.REVOCATION_SYNC_SECONDS > 0:
+        # The warm-up loads the revocation list; without it the loop does
+        sync_task = asyncio.create_task(
+            run_sync_loop(settings.REVOCATION_SYNC_SECONDS, sync_first=warm_up_task is None)
+        )
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    if sync_task is not None:
+        sync_task.cancel()
+    await google_cert_cache.aclose()
+
+
 app = FastAPI(
     title="Google Sign-In API",
     description="FastAPI backend with Google OAuth authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Inside CORS, so rejections still carry the CORS headers browsers need
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        paths=["/auth/google"],
+        max_in_flight=settings.RATE_LIMIT_MAX_IN_FLIGHT,
+    )
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,8 +64,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Installed unconditionally; it passes requests straight through unless
+# QUERY_COUNT_HEADER is on, which can change at runtime in tests
+app.add_middleware(QueryCountMiddleware)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        interval=settings.PROFILING_INTERVAL_MS / 1000,
+    )
+
+# Outermost, so the latency covers CORS handling as well
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
+app.include_router(internal.router)
+app.include_router(users.router)
+app.include_router(well_known.router)
 
 
 @app.get("/")
@@ -37,3 +100,16 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    if not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness.as_dict()
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE)
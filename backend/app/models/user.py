@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    # Keyset pagination order of GET /users
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
+    # Server-generated timestamps come back through RETURNING on INSERT and
+    # UPDATE instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -12,5 +17,7 @@ class User(Base):
     last_name = Column(String, nullable=True)
     profile_picture = Column(String, nullable=True)
     google_id = Column(String, unique=True, index=True, nullable=True)
+    # Bumped whenever profile fields change; carried in profile-claim tokens
+    profile_version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,298 @@
+"""
+Repository layer for refresh tokens.
+
+Refresh tokens are opaque random strings handed to the client once; only
+their SHA-256 digest is stored. Each use rotates the token: the presented
+token is marked used and a new one is issued in the same family. Presenting
+a token that was already used means it leaked (or was replayed), so the
+whole family is revoked and the session has to sign in with Google again.
+
+Used and revoked rows are kept for ``REFRESH_TOKEN_REUSE_WINDOW_DAYS`` so a
+replay is still recognised as reuse, and expired rows are of no use at all;
+``purge_expired`` deletes both and runs hourly from the revocation sync loop.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+
+
+class InvalidRefreshTokenError(ValueError):
+    """Raised when a refresh token is unknown, expired, revoked or reused."""
+
+
+class RefreshTokenReuseError(InvalidRefreshTokenError):
+    """Raised when an already rotated refresh token is presented again."""
+
+
+def hash_refresh_token(token: str) -> str:
+    """Digest under which a refresh token is stored and looked up."""
+    return hashlib.sha256(token.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+_table = RefreshToken.__table__
+
+# Statements are built once and run as Core statements with bound values;
+# this path runs for every session renewal and skips ORM unit-of-work cost.
+_INSERT = insert(_table)
+# Marks a live token used and returns its owner, in one indexed statement
+_CLAIM = (
+    update(_table)
+    .where(
+        _table.c.token_hash == bindparam("claim_hash"),
+        _table.c.used_at.is_(None),
+        _table.c.revoked_at.is_(None),
+        _table.c.expires_at > bindparam("now"),
+    )
+    .values(used_at=bindparam("now"))
+    .returning(_table.c.user_id, _table.c.family_id)
+)
+_REVOKE_FAMILY = (
+    update(_table)
+    .where(_table.c.family_id == bindparam("family"), _table.c.revoked_at.is_(None))
+    .values(revoked_at=bindparam("now"))
+)
+# Revokes the family of a presented token, if it belongs to the given user
+_REVOKE_SESSION = (
+    update(_table)
+    .where(
+        _table.c.family_id == (
+            select(_table.c.family_id)
+            .where(_table.c.token_hash == bindparam("claim_hash"), _table.c.user_id == bindparam("owner"))
+            .scalar_subquery()
+        ),
+        _table.c.revoked_at.is_(None),
+    )
+    .values(revoked_at=bindparam("now"))
+)
+_REVOKE_USER = (
+    update(_table)
+    .where(_table.c.user_id == bindparam("owner"), _table.c.revoked_at.is_(None))
+    .values(revoked_at=bindparam("now"))
+)
+_FIND = select(_table.c.family_id, _table.c.used_at).where(_table.c.token_hash == bindparam("claim_hash"))
+# Expired rows, and rows used or revoked before the reuse-detection window
+_PURGE = delete(_table).where(
+    or_(
+        _table.c.expires_at <= bindparam("now"),
+        _table.c.used_at <= bindparam("cutoff"),
+        _table.c.revoked_at <= bindparam("cutoff"),
+    )
+)
+
+
+def _purge_params(now: Optional[datetime]) -> Dict[str, datetime]:
+    now = now or datetime.now(timezone.utc)
+    return {"now": now, "cutoff": now - timedelta(days=settings.REFRESH_TOKEN_REUSE_WINDOW_DAYS)}
+
+
+def _new_token(user_id: int, family_id: str, now: datetime) -> Tuple[str, Dict[str, Any]]:
+    token = secrets.token_urlsafe(32)
+    row = {
+        "user_id": user_id,
+        "token_hash": hash_refresh_token(token),
+        "family_id": family_id,
+        "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        "created_at": now,
+    }
+    return token, row
+
+
+class RefreshTokenRepository:
+    """Repository for refresh token database operations."""
+
+    def __init__(self, db: Session):
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+
+    def create(self, user_id: int, family_id: Optional[str] = None) -> str:
+        """
+        Issue a refresh token.
+
+        Args:
+            user_id: Owner of the token
+            family_id: Family to add the token to; a new family is started
+                when omitted (i.e. on sign-in)
+
+        Returns:
+            The opaque refresh token
+        """
+        token, row = _new_token(user_id, family_id or secrets.token_hex(16), datetime.now(timezone.utc))
+        self.db.execute(_INSERT, row)
+        self.db.commit()
+        return token
+
+    def rotate(self, token: str) -> Tuple[int, str]:
+        """
+        Exchange a refresh token for its successor.
+
+        The token is claimed with a single ``UPDATE ... RETURNING`` on the
+        unique hash index, so concurrent uses of one token cannot both win.
+
+        Args:
+            token: Refresh token presented by the client
+
+        Returns:
+            Tuple of (user ID, new refresh token)
+
+        Raises:
+            RefreshTokenReuseError: If the token had already been rotated;
+                its family is revoked
+            InvalidRefreshTokenError: If the token is unknown, expired or revoked
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = hash_refresh_token(token)
+        claimed = self.db.execute(_CLAIM, {"claim_hash": token_hash, "now": now}).first()
+        if claimed is None:
+            self.db.rollback()
+            self._reject(token_hash, now)
+
+        new_token, row = _new_token(claimed.user_id, claimed.family_id, now)
+        self.db.execute(_INSERT, row)
+        self.db.commit()
+        return claimed.user_id, new_token
+
+    def revoke_family(self, family_id: str) -> None:
+        """Revoke every token of a family."""
+        self.db.execute(_REVOKE_FAMILY, {"family": family_id, "now": datetime.now(timezone.utc)})
+        self.db.commit()
+
+    def revoke_session(self, token: str, user_id: int) -> None:
+        """Revoke the family of ``token`` (one login); ignored unless ``user_id`` owns it."""
+        self.db.execute(_REVOKE_SESSION, {
+            "claim_hash": hash_refresh_token(token), "owner": user_id, "now": datetime.now(timezone.utc),
+        })
+        self.db.commit()
+
+    def revoke_user(self, user_id: int) -> None:
+        """Revoke every refresh token of a user."""
+        self.db.execute(_REVOKE_USER, {"owner": user_id, "now": datetime.now(timezone.utc)})
+        self.db.commit()
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete expired tokens and those used or revoked before the
+        reuse-detection window.
+
+        A replay of a deleted token is rejected as invalid rather than
+        revoking its family as reuse.
+
+        Args:
+            now: Current time
+
+        Returns:
+            Number of rows deleted
+        """
+        result = self.db.execute(_PURGE, _purge_params(now))
+        self.db.commit()
+        return result.rowcount
+
+    def _reject(self, token_hash: str, now: datetime) -> None:
+        row = self.db.execute(_FIND, {"claim_hash": token_hash}).first()
+        if row is not None and row.used_at is not None:
+            self.db.execute(_REVOKE_FAMILY, {"family": row.family_id, "now": now})
+            self.db.commit()
+            raise RefreshTokenReuseError("Refresh token reused")
+        raise InvalidRefreshTokenError("Invalid or expired refresh token")
+
+
+class AsyncRefreshTokenRepository:
+    """Repository for refresh token operations on an AsyncSession."""
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with an async database session.
+
+        Args:
+            db: SQLAlchemy async database session
+        """
+        self.db = db
+
+    async def create(self, user_id: int, family_id: Optional[str] = None) -> str:
+        """
+        Issue a refresh token.
+
+        See :meth:`RefreshTokenRepository.create`.
+
+        Args:
+            user_id: Owner of the token
+            family_id: Family to add the token to; a new family when omitted
+
+        Returns:
+            The opaque refresh token
+        """
+        token, row = _new_token(user_id, family_id or secrets.token_hex(16), datetime.now(timezone.utc))
+        await self.db.execute(_INSERT, row)
+        await self.db.commit()
+        return token
+
+    async def rotate(self, token: str) -> Tuple[int, str]:
+        """
+        Exchange a refresh token for its successor.
+
+        See :meth:`RefreshTokenRepository.rotate`.
+
+        Args:
+            token: Refresh token presented by the client
+
+        Returns:
+            Tuple of (user ID, new refresh token)
+
+        Raises:
+            RefreshTokenReuseError: If the token had already been rotated
+            InvalidRefreshTokenError: If the token is unknown, expired or revoked
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = hash_refresh_token(token)
+        claimed = (await self.db.execute(_CLAIM, {"claim_hash": token_hash, "now": now})).first()
+        if claimed is None:
+            await self.db.rollback()
+            await self._reject(token_hash, now)
+
+        new_token, row = _new_token(claimed.user_id, claimed.family_id, now)
+        await self.db.execute(_INSERT, row)
+        await self.db.commit()
+        return claimed.user_id, new_token
+
+    async def revoke_family(self, family_id: str) -> None:
+        """Revoke every token of a family."""
+        await self.db.execute(_REVOKE_FAMILY, {"family": family_id, "now": datetime.now(timezone.utc)})
+        await self.db.commit()
+
+    async def revoke_session(self, token: str, user_id: int) -> None:
+        """Revoke the family of ``token`` (one login); ignored unless ``user_id`` owns it."""
+        await self.db.execute(_REVOKE_SESSION, {
+            "claim_hash": hash_refresh_token(token), "owner": user_id, "now": datetime.now(timezone.utc),
+        })
+        await self.db.commit()
+
+    async def revoke_user(self, user_id: int) -> None:
+        """Revoke every refresh token of a user."""
+        await self.db.execute(_REVOKE_USER, {"owner": user_id, "now": datetime.now(timezone.utc)})
+        await self.db.commit()
+
+    async def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Delete expired tokens and those used or revoked before the reuse-detection window."""
+        result = await self.db.execute(_PURGE, _purge_params(now))
+        await self.db.commit()
+        return result.rowcount
+
+    async def _reject(self, token_hash: str, now: datetime) -> None:
+        row = (await self.db.execute(_FIND, {"claim_hash": token_hash})).first()
+        if row is not None and row.used_at is not None:
+            await self.db.execute(_REVOKE_FAMILY, {"family": row.family_id, "now": now})
+            await self.db.commit()
+            raise RefreshTokenReuseError("Refresh token reused")
+        raise InvalidRefreshTokenError("Invalid or expired refresh token")
@@ -0,0 +1,154 @@
+"""
+Repository layer for revoked access tokens.
+
+A row revokes one access token by its ``jti``, or every access token of a
+user issued up to ``revoked_at`` when ``jti`` is NULL. Rows are kept until
+``expires_at``, when the last token they cover has expired, and workers
+read them incrementally by ``revoked_at`` into their in-memory list
+(``app/core/revocation.py``).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.revocation import Revocation
+from app.models.revoked_token import RevokedToken
+
+_table = RevokedToken.__table__
+
+_INSERT = insert(_table)
+# Rows revoked since a point in time whose tokens are still live
+_CHANGES = select(_table.c.jti, _table.c.user_id, _table.c.revoked_at, _table.c.expires_at).where(
+    _table.c.revoked_at >= bindparam("since"),
+    _table.c.expires_at > bindparam("now"),
+)
+_PURGE = delete(_table).where(_table.c.expires_at <= bindparam("now"))
+
+
+def _user_revocation(user_id: int) -> Revocation:
+    # Every token issued until now expires within ACCESS_TOKEN_EXPIRE_MINUTES
+    now = datetime.now(timezone.utc)
+    return Revocation(None, user_id, now, now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+
+
+class RevocationRepository:
+    """Repository for revoked access tokens."""
+
+    def __init__(self, db: Session):
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+
+    def _insert(self, revocation: Revocation) -> Revocation:
+        try:
+            self.db.execute(_INSERT, revocation._asdict())
+            self.db.commit()
+        except IntegrityError:
+            # The token was already revoked (by another worker)
+            self.db.rollback()
+        return revocation
+
+    def revoke_token(self, jti: str, user_id: int, expires_at: datetime) -> Revocation:
+        """
+        Revoke one access token.
+
+        Args:
+            jti: The token's ``jti`` claim
+            user_id: The token's user
+            expires_at: The token's expiry
+
+        Returns:
+            The stored revocation
+        """
+        return self._insert(Revocation(jti, user_id, datetime.now(timezone.utc), expires_at))
+
+    def revoke_user(self, user_id: int) -> Revocation:
+        """
+        Revoke every access token of a user issued until now.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            The stored revocation
+        """
+        return self._insert(_user_revocation(user_id))
+
+    def changes_since(self, since: datetime, now: Optional[datetime] = None) -> List[Revocation]:
+        """
+        Get the live revocations made at or after ``since``.
+
+        Args:
+            since: Earliest ``revoked_at`` returned
+            now: Current time; revocations that expired by then are skipped
+
+        Returns:
+            Revocations in no particular order
+        """
+        now = now or datetime.now(timezone.utc)
+        rows = self.db.execute(_CHANGES, {"since": since, "now": now}).all()
+        return [Revocation(*row) for row in rows]
+
+    def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """
+        Delete revocations whose tokens have all expired.
+
+        Args:
+            now: Current time
+
+        Returns:
+            Number of rows deleted
+        """
+        result = self.db.execute(_PURGE, {"now": now or datetime.now(timezone.utc)})
+        self.db.commit()
+        return result.rowcount
+
+
+class AsyncRevocationRepository:
+    """Repository for revoked access tokens on an AsyncSession."""
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with an async database session.
+
+        Args:
+            db: SQLAlchemy async database session
+        """
+        self.db = db
+
+    async def _insert(self, revocation: Revocation) -> Revocation:
+        try:
+            await self.db.execute(_INSERT, revocation._asdict())
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+        return revocation
+
+    async def revoke_token(self, jti: str, user_id: int, expires_at: datetime) -> Revocation:
+        """Revoke one access token; see :meth:`RevocationRepository.revoke_token`."""
+        return await self._insert(Revocation(jti, user_id, datetime.now(timezone.utc), expires_at))
+
+    async def revoke_user(self, user_id: int) -> Revocation:
+        """Revoke every access token of a user issued until now."""
+        return await self._insert(_user_revocation(user_id))
+
+    async def changes_since(self, since: datetime, now: Optional[datetime] = None) -> List[Revocation]:
+        """Get the live revocations made at or after ``since``."""
+        now = now or datetime.now(timezone.utc)
+        rows = (await self.db.execute(_CHANGES, {"since": since, "now": now})).all()
+        return [Revocation(*row) for row in rows]
+
+    async def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """Delete revocations whose tokens have all expired."""
+        result = await self.db.execute(_PURGE, {"now": now or datetime.now(timezone.utc)})
+        await self.db.commit()
+        return result.rowcount
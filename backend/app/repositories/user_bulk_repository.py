@@ -0,0 +1,236 @@
+"""
+Repository layer for bulk user import and export.
+
+Imports apply the same upsert rules as a Google login, batch by batch:
+rows are matched on ``email``, only non-empty fields overwrite stored
+values, unchanged rows are not written, and changed rows get a new
+``profile_version``. PostgreSQL batches are loaded with ``COPY`` into a
+temporary staging table and merged with one ``INSERT ... SELECT ... ON
+CONFLICT``; other dialects use an executemany of the same upsert.
+
+Exports walk the table in primary-key order one bounded chunk at a time,
+so memory use does not grow with the table.
+"""
+import csv
+import io
+from typing import Any, Dict, Iterator, List, Sequence
+
+from sqlalchemy import and_, column, func, or_, select, table
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.repositories.user_repository import _UPSERT_INSERTS, UserRepository
+
+# Columns an import may set; rows are matched on email
+IMPORT_COLUMNS = ("email", "google_id", "first_name", "last_name", "profile_picture")
+CLAIM_COLUMNS = IMPORT_COLUMNS[1:]
+EXPORT_COLUMNS = (
+    "id",
+    "email",
+    "google_id",
+    "first_name",
+    "last_name",
+    "profile_picture",
+    "created_at",
+    "updated_at",
+)
+
+_users = User.__table__
+# Per-session staging table for COPY; emptied by every commit
+_STAGING = table("user_import", *(column(name) for name in IMPORT_COLUMNS))
+_CREATE_STAGING = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS user_import "
+    "(email text, google_id text, first_name text, last_name text, profile_picture text) "
+    "ON COMMIT DELETE ROWS"
+)
+
+
+def _on_conflict(stmt):
+    """Apply login upsert semantics to a dialect INSERT for many rows at once."""
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[_users.c.email],
+        set_={
+            **{name: func.coalesce(excluded[name], _users.c[name]) for name in CLAIM_COLUMNS},
+            "updated_at": func.now(),
+            "profile_version": _users.c.profile_version + 1,
+        },
+        where=or_(
+            *(
+                and_(excluded[name].is_not(None), _users.c[name].is_distinct_from(excluded[name]))
+                for name in CLAIM_COLUMNS
+            )
+        ),
+    )
+
+
+class UserBulkRepository:
+    """Repository for bulk user operations on a sync Session."""
+
+    def __init__(self, db: Session):
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+
+    @property
+    def dialect_name(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def upsert_batch(self, records: Sequence[Dict[str, Any]]) -> int:
+        """
+        Upsert one batch of users and commit it.
+
+        Args:
+            records: Rows keyed by :data:`IMPORT_COLUMNS`, unique by email
+
+        Returns:
+            Number of rows inserted or updated
+
+        Raises:
+            IntegrityError: If the batch conflicts on ``google_id``
+        """
+        if not records:
+            return 0
+        insert_fn = _UPSERT_INSERTS.get(self.dialect_name)
+        if insert_fn is None:
+            return self._upsert_rows(records)
+        try:
+            if self.supports_copy:
+                written = self._copy_upsert(insert_fn, records)
+            else:
+                written = self.db.execute(_on_conflict(insert_fn(_users)), list(records)).rowcount
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return max(written, 0)
+
+    def upsert_rows(self, records: Sequence[Dict[str, Any]]) -> List[Any]:
+        """
+        Upsert rows one at a time, isolating failures.
+
+        Used after a batch failed, to find the offending rows.
+
+        Args:
+            records: Rows keyed by :data:`IMPORT_COLUMNS`
+
+        Returns:
+            Per-row outcome: True if written, False if unchanged, or the
+            exception that rejected the row
+        """
+        repo = UserRepository(self.db)
+        outcomes: List[Any] = []
+        for record in records:
+            try:
+                before = repo.get_user_by_email(record["email"])
+                version = None if before is None else before.profile_version
+                user = repo.upsert_from_google(**record)
+                outcomes.append(before is None or user.profile_version != version)
+            except IntegrityError as exc:
+                self.db.rollback()
+                outcomes.append(exc)
+        return outcomes
+
+    def _upsert_rows(self, records: Sequence[Dict[str, Any]]) -> int:
+        written = 0
+        for outcome in self.upsert_rows(records):
+            if isinstance(outcome, Exception):
+                raise outcome
+            written += bool(outcome)
+        return written
+
+    @property
+    def supports_copy(self) -> bool:
+        """Whether the connection can stream rows with PostgreSQL COPY."""
+        return self.dialect_name == "postgresql" and self.db.get_bind().dialect.driver == "psycopg2"
+
+    def _copy_upsert(self, insert_fn, records: Sequence[Dict[str, Any]]) -> int:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            # Unquoted empty fields are NULL in COPY's CSV format
+            writer.writerow(["" if record[name] is None else record[name] for name in IMPORT_COLUMNS])
+        buffer.seek(0)
+
+        cursor = self.db.connection().connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(_CREATE_STAGING)
+            cursor.copy_expert(
+                "COPY user_import ({}) FROM STDIN WITH (FORMAT csv)".format(", ".join(IMPORT_COLUMNS)),
+                buffer,
+            )
+        finally:
+            cursor.close()
+        stmt = insert_fn(_users).from_select(
+            list(IMPORT_COLUMNS), select(*(_STAGING.c[name] for name in IMPORT_COLUMNS))
+        )
+        return self.db.execute(_on_conflict(stmt)).rowcount
+
+    def iter_chunks(self, batch_size: int) -> Iterator[List[Any]]:
+        """
+        Yield all users in primary-key order, one chunk of rows at a time.
+
+        Each chunk is a keyset query (``WHERE id > last ORDER BY id LIMIT``)
+        on the primary key, so every chunk costs the same.
+
+        Args:
+            batch_size: Rows per chunk
+
+        Yields:
+            Lists of rows with :data:`EXPORT_COLUMNS`
+        """
+        stmt = select(*(_users.c[name] for name in EXPORT_COLUMNS)).order_by(_users.c.id).limit(batch_size)
+        last_id = 0
+        while True:
+            rows = self.db.execute(stmt.where(_users.c.id > last_id)).all()
+            self.db.commit()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+
+    def copy_csv_chunks(self, batch_size: int) -> Iterator[str]:
+        """
+        Yield all users as CSV text produced by PostgreSQL ``COPY ... TO``.
+
+        Each chunk covers an ID range of at most ``batch_size`` rows, found
+        with an index-only boundary lookup. Timestamps are ISO 8601, as in
+        the other export paths.
+
+        Args:
+            batch_size: Rows per chunk
+
+        Yields:
+            CSV text (without header) for one chunk
+        """
+        boundary = select(_users.c.id).order_by(_users.c.id).offset(batch_size - 1).limit(1)
+        columns = ", ".join(
+            "to_json({0}) #>> '{{}}'".format(name) if name.endswith("_at") else name for name in EXPORT_COLUMNS
+        )
+        last_id = 0
+        while True:
+            upper = self.db.execute(boundary.where(_users.c.id > last_id)).scalar()
+            cursor = self.db.connection().connection.dbapi_connection.cursor()
+            try:
+                query = "SELECT {} FROM users WHERE id > %s{} ORDER BY id".format(
+                    columns, "" if upper is None else " AND id <= %s"
+                )
+                params = (last_id,) if upper is None else (last_id, upper)
+                buffer = io.StringIO()
+                cursor.copy_expert(
+                    "COPY ({}) TO STDOUT WITH (FORMAT csv)".format(cursor.mogrify(query, params).decode()),
+                    buffer,
+                )
+            finally:
+                cursor.close()
+            self.db.commit()
+            if buffer.tell():
+                yield buffer.getvalue()
+            if upper is None:
+                return
+            last_id = upper
@@ -1,12 +1,190 @@
 """
 Repository layer for User model database operations.
 Handles all database queries and mutations for users.
+
+Every write refreshes the process-wide user cache, so reads served from it
+reflect changes made through this repository immediately.
 """
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from sqlalchemy import Integer, String, any_, bindparam, func, or_, select, tuple_, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
+from app.core.user_cache import user_cache
 from app.models.user import User
 
+# Dialects with INSERT ... ON CONFLICT ... RETURNING support
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Keys per IN (...) on dialects without array parameters; stays well below
+# SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# One statement, one bound array: the plan does not depend on the batch size
+_BY_IDS = select(User).where(User.id == any_(bindparam("ids", type_=postgresql.ARRAY(Integer))))
+_BY_GOOGLE_IDS = select(User).where(
+    User.google_id == any_(bindparam("ids", type_=postgresql.ARRAY(String)))
+)
+
+
+def _lookup_statements(dialect_name: str, column, keys: Sequence[Any]) -> Iterator[Any]:
+    """
+    Build the statements resolving many users by ``id`` or ``google_id``.
+
+    PostgreSQL gets a single ``WHERE column = ANY(:ids)``; other dialects
+    get one ``IN (...)`` per :data:`LOOKUP_CHUNK_SIZE` keys.
+
+    Args:
+        dialect_name: Name of the session's database dialect
+        column: ``User.id`` or ``User.google_id``
+        keys: Distinct values to look up
+
+    Yields:
+        Tuples of (statement, parameters)
+    """
+    if dialect_name == "postgresql":
+        yield (_BY_IDS if column is User.id else _BY_GOOGLE_IDS), {"ids": list(keys)}
+        return
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        yield select(User).where(column.in_(keys[start:start + LOOKUP_CHUNK_SIZE])), {}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _keyset_column(dialect_name: str):
+    """
+    Expression the ``created_at`` half of the page key is read and compared as.
+
+    SQLite stores timestamps as text, in one format when the server default
+    writes them and another when SQLAlchemy does, so compared datetimes can
+    be off by the formatting. There the raw stored text is used instead;
+    the SQL (and the index it uses) is the same.
+    """
+    if dialect_name == "sqlite":
+        return type_coerce(User.created_at, String)
+    return User.created_at
+
+
+def _bound_timestamp(dialect_name: str, value: datetime) -> Any:
+    """Convert a filter bound to what :func:`_keyset_column` compares against."""
+    if dialect_name != "sqlite":
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    # CURRENT_TIMESTAMP format; sorts correctly against SQLAlchemy's too
+    return value.strftime("%Y-%m-%d %H:%M:%S") + (".%06d" % value.microsecond if value.microsecond else "")
+
+
+def encode_cursor(key: Any, user_id: int) -> str:
+    """Encode a page key as an opaque URL-safe cursor."""
+    key = key.isoformat() if isinstance(key, datetime) else key
+    raw = json.dumps([key, user_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(dialect_name: str, cursor: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor from :func:`encode_cursor`.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, user_id = json.loads(raw)
+        if not isinstance(key, str) or not isinstance(user_id, int):
+            raise ValueError(cursor)
+        return (key if dialect_name == "sqlite" else datetime.fromisoformat(key)), user_id
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _list_statement(
+    dialect_name: str,
+    limit: int,
+    cursor: Optional[str],
+    created_after: Optional[datetime],
+    created_before: Optional[datetime],
+):
+    """
+    Build the keyset query for one page of users, newest first.
+
+    Pages seek on the ``(created_at, id)`` index instead of skipping rows
+    with OFFSET, so every page costs the same however deep it is. One extra
+    row is fetched to tell whether another page follows.
+    """
+    key = _keyset_column(dialect_name)
+    stmt = (
+        select(User, key.label("page_key"))
+        .where(User.created_at.is_not(None))
+        .order_by(User.created_at.desc(), User.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        stmt = stmt.where(tuple_(key, User.id) < tuple_(*decode_cursor(dialect_name, cursor)))
+    if created_after is not None:
+        stmt = stmt.where(key >= _bound_timestamp(dialect_name, created_after))
+    if created_before is not None:
+        stmt = stmt.where(key < _bound_timestamp(dialect_name, created_before))
+    return stmt
+
+
+def _page(rows: Sequence[Any], limit: int) -> Tuple[List[User], Optional[str]]:
+    """Split fetched rows into a page of users and the next cursor."""
+    users = [row[0] for row in rows[:limit]]
+    if len(rows) <= limit:
+        return users, None
+    return users, encode_cursor(rows[limit - 1][1], users[-1].id)
+
+
+def _claims_changed(user: User, claims: Dict[str, Any]) -> bool:
+    """Whether applying the non-empty Google claims would modify ``user``."""
+    return any(value is not None and getattr(user, key) != value for key, value in claims.items())
+
+
+def _build_upsert(dialect_name: str, email: str, claims: Dict[str, Any]):
+    """
+    Build ``INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING`` for a login.
+
+    Only claims that are present overwrite stored values, and the update is
+    skipped when none of them differ, so a concurrent identical login does not
+    write the row twice.
+
+    Args:
+        dialect_name: Name of the session's database dialect
+        email: User's email address (the conflict target)
+        claims: Google profile claims keyed by User column name
+
+    Returns:
+        ORM-enabled upsert statement returning the User, or None if the
+        dialect has no ON CONFLICT support
+    """
+    insert = _UPSERT_INSERTS.get(dialect_name)
+    if insert is None:
+        return None
+
+    stmt = insert(User).values(email=email, **claims)
+    updates = {key: stmt.excluded[key] for key, value in claims.items() if value is not None}
+    if updates:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={**updates, "updated_at": func.now(), "profile_version": User.profile_version + 1},
+            where=or_(*(getattr(User, key).is_distinct_from(value) for key, value in updates.items())),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[User.email])
+    return stmt.returning(User).execution_options(populate_existing=True)
+
 
 class UserRepository:
     """Repository for User model database operations."""
@@ -56,6 +234,111 @@ class UserRepository:
         """
         return self.db.query(User).filter(User.google_id == google_id).first()
 
+    def get_users_by_ids(self, user_ids: Sequence[int]) -> List[User]:
+        """
+        Get many users by ID with one query (one per chunk on SQLite).
+
+        Args:
+            user_ids: User IDs; duplicates are ignored
+
+        Returns:
+            Users found, in no particular order
+        """
+        return self._get_users_by(User.id, user_ids)
+
+    def get_users_by_google_ids(self, google_ids: Sequence[str]) -> List[User]:
+        """
+        Get many users by Google ID with one query (one per chunk on SQLite).
+
+        Args:
+            google_ids: Google IDs; duplicates are ignored
+
+        Returns:
+            Users found, in no particular order
+        """
+        return self._get_users_by(User.google_id, google_ids)
+
+    def _get_users_by(self, column, keys: Sequence[Any]) -> List[User]:
+        users: List[User] = []
+        for stmt, params in _lookup_statements(self.db.get_bind().dialect.name, column, list(dict.fromkeys(keys))):
+            users.extend(self.db.scalars(stmt, params))
+        return users
+
+    def list_users(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        Get one page of users, newest first.
+
+        Args:
+            limit: Page size
+            cursor: Cursor returned with the previous page; None for the first
+            created_after: Only users created at or after this time
+            created_before: Only users created before this time
+
+        Returns:
+            Tuple of (users, cursor of the next page or None on the last page)
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        dialect_name = self.db.get_bind().dialect.name
+        stmt = _list_statement(dialect_name, limit, cursor, created_after, created_before)
+        return _page(self.db.execute(stmt).all(), limit)
+
+    def upsert_from_google(
+        self,
+        email: str,
+        google_id: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        profile_picture: Optional[str] = None,
+    ) -> User:
+        """
+        Create or update a user from Google profile claims.
+
+        Returning users whose claims are unchanged cost a single read-only
+        query. Otherwise one ``INSERT ... ON CONFLICT (email) DO UPDATE
+        RETURNING`` writes and returns the row, so simultaneous first logins
+        for the same email cannot race into an IntegrityError.
+
+        Args:
+            email: User's email address
+            google_id: Google ID
+            first_name: User's first name
+            last_name: User's last name
+            profile_picture: URL to user's profile picture
+
+        Returns:
+            The stored User object
+        """
+        claims = {
+            "google_id": google_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "profile_picture": profile_picture,
+        }
+        user = self.get_user_by_email(email)
+        if user is not None and not _claims_changed(user, claims):
+            return user
+
+        stmt = _build_upsert(self.db.get_bind().dialect.name, email, claims)
+        if stmt is None:
+            if user is None:
+                return self.create_user(email=email, **claims)
+            return self.update_user(user=user, **claims)
+
+        upserted = self.db.scalars(stmt).first()
+        self.db.commit()
+        # No row is returned when a concurrent login already stored these claims
+        user = upserted if upserted is not None else self.get_user_by_email(email)
+        user_cache.put(user)
+        return user
+
     def create_user(
         self,
         email: str,
@@ -83,10 +366,12 @@ class UserRepository:
             first_name=first_name,
             last_name=last_name,
             profile_picture=profile_picture,
+            # Set so reading it after the INSERT needs no extra SELECT
+            updated_at=None,
         )
         self.db.add(user)
         self.db.commit()
-        self.db.refresh(user)
+        user_cache.put(user)
         return user
 
     def update_user(
@@ -110,15 +395,245 @@ class UserRepository:
         Returns:
             Updated User object
         """
-        if google_id is not None:
-            user.google_id = google_id
-        if first_name is not None:
-            user.first_name = first_name
-        if last_name is not None:
-            user.last_name = last_name
-        if profile_picture is not None:
-            user.profile_picture = profile_picture
+        claims = {
+            "google_id": google_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "profile_picture": profile_picture,
+        }
+        if _claims_changed(user, claims):
+            for key, value in claims.items():
+                if value is not None:
+                    setattr(user, key, value)
+            user.profile_version = (user.profile_version or 1) + 1
 
         self.db.commit()
-        self.db.refresh(user)
+        user_cache.put(user)
+        return user
+
+
+class AsyncUserRepository:
+    """Repository for User model database operations on an AsyncSession."""
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the repository with an async database session.
+
+        Args:
+            db: SQLAlchemy async database session
+        """
+        self.db = db
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """
+        Get a user by email address.
+
+        Args:
+            email: User's email address
+
+        Returns:
+            User if found, None otherwise
+        """
+        result = await self.db.execute(select(User).where(User.email == email).limit(1))
+        return result.scalars().first()
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """
+        Get a user by ID.
+
+        Args:
+            user_id: User's ID
+
+        Returns:
+            User if found, None otherwise
+        """
+        result = await self.db.execute(select(User).where(User.id == user_id).limit(1))
+        return result.scalars().first()
+
+    async def get_user_by_google_id(self, google_id: str) -> Optional[User]:
+        """
+        Get a user by Google ID.
+
+        Args:
+            google_id: User's Google ID
+
+        Returns:
+            User if found, None otherwise
+        """
+        result = await self.db.execute(select(User).where(User.google_id == google_id).limit(1))
+        return result.scalars().first()
+
+    async def get_users_by_ids(self, user_ids: Sequence[int]) -> List[User]:
+        """
+        Get many users by ID with one query (one per chunk on SQLite).
+
+        Args:
+            user_ids: User IDs; duplicates are ignored
+
+        Returns:
+            Users found, in no particular order
+        """
+        return await self._get_users_by(User.id, user_ids)
+
+    async def get_users_by_google_ids(self, google_ids: Sequence[str]) -> List[User]:
+        """
+        Get many users by Google ID with one query (one per chunk on SQLite).
+
+        Args:
+            google_ids: Google IDs; duplicates are ignored
+
+        Returns:
+            Users found, in no particular order
+        """
+        return await self._get_users_by(User.google_id, google_ids)
+
+    async def _get_users_by(self, column, keys: Sequence[Any]) -> List[User]:
+        users: List[User] = []
+        for stmt, params in _lookup_statements(self.db.bind.dialect.name, column, list(dict.fromkeys(keys))):
+            users.extend(await self.db.scalars(stmt, params))
+        return users
+
+    async def list_users(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> Tuple[List[User], Optional[str]]:
+        """
+        Get one page of users, newest first.
+
+        See :meth:`UserRepository.list_users`.
+
+        Args:
+            limit: Page size
+            cursor: Cursor returned with the previous page; None for the first
+            created_after: Only users created at or after this time
+            created_before: Only users created before this time
+
+        Returns:
+            Tuple of (users, cursor of the next page or None on the last page)
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        stmt = _list_statement(self.db.bind.dialect.name, limit, cursor, created_after, created_before)
+        return _page((await self.db.execute(stmt)).all(), limit)
+
+    async def upsert_from_google(
+        self,
+        email: str,
+        google_id: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        profile_picture: Optional[str] = None,
+    ) -> User:
+        """
+        Create or update a user from Google profile claims.
+
+        See :meth:`UserRepository.upsert_from_google`.
+
+        Args:
+            email: User's email address
+            google_id: Google ID
+            first_name: User's first name
+            last_name: User's last name
+            profile_picture: URL to user's profile picture
+
+        Returns:
+            The stored User object
+        """
+        claims = {
+            "google_id": google_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "profile_picture": profile_picture,
+        }
+        user = await self.get_user_by_email(email)
+        if user is not None and not _claims_changed(user, claims):
+            return user
+
+        stmt = _build_upsert(self.db.bind.dialect.name, email, claims)
+        if stmt is None:
+            if user is None:
+                return await self.create_user(email=email, **claims)
+            return await self.update_user(user=user, **claims)
+
+        upserted = (await self.db.scalars(stmt)).first()
+        await self.db.commit()
+        # No row is returned when a concurrent login already stored these claims
+        user = upserted if upserted is not None else await self.get_user_by_email(email)
+        user_cache.put(user)
+        return user
+
+    async def create_user(
+        self,
+        email: str,
+        google_id: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        profile_picture: Optional[str] = None,
+    ) -> User:
+        """
+        Create a new user.
+
+        Args:
+            email: User's email address
+            google_id: Google ID
+            first_name: User's first name
+            last_name: User's last name
+            profile_picture: URL to user's profile picture
+
+        Returns:
+            Created User object
+        """
+        user = User(
+            email=email,
+            google_id=google_id,
+            first_name=first_name,
+            last_name=last_name,
+            profile_picture=profile_picture,
+            # Set so reading it after the INSERT needs no extra SELECT
+            updated_at=None,
+        )
+        self.db.add(user)
+        await self.db.commit()
+        user_cache.put(user)
+        return user
+
+    async def update_user(
+        self,
+        user: User,
+        google_id: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        profile_picture: Optional[str] = None,
+    ) -> User:
+        """
+        Update an existing user.
+
+        Args:
+            user: User object to update
+            google_id: Google ID
+            first_name: User's first name
+            last_name: User's last name
+            profile_picture: URL to user's profile picture
+
+        Returns:
+            Updated User object
+        """
+        claims = {
+            "google_id": google_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "profile_picture": profile_picture,
+        }
+        if _claims_changed(user, claims):
+            for key, value in claims.items():
+                if value is not None:
+                    setattr(user, key, value)
+            user.profile_version = (user.profile_version or 1) + 1
+
+        await self.db.commit()
+        user_cache.put(user)
         return user
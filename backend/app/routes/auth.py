@@ -1,41 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from typing import Any, Dict, Optional, Union
 import logging
 
-from app.core.database import get_db
-from app.core.config import settings
-from app.core.dependencies import get_current_user
-from app.models.user import User
-from app.schemas.user import GoogleAuthResponse, GoogleTokenRequest, UserResponse
-from app.services.auth_service import AuthService
+from app.core.google_verifier import google_token_verifier
+from app.core.dependencies import get_profile_user, get_session, get_token_payload
+from app.core.metrics import auth_stage
+from app.core.rate_limit import rate_limiter, retry_after_header
+from app.core.responses import ModelResponse
+from app.core.user_cache import CachedUser
+from app.repositories.refresh_token_repository import InvalidRefreshTokenError, RefreshTokenReuseError
+from app.schemas.user import (
+    GoogleAuthResponse,
+    GoogleTokenRequest,
+    LogoutRequest,
+    RefreshTokenRequest,
+    TokenResponse,
+    UserResponse,
+)
+from app.services.auth_service import AsyncAuthService, AuthService
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+# Stages of a sign-in, exported as auth_stage_duration_seconds
+VERIFY_STAGE = auth_stage("google_auth", "verify_google_token")
+UPSERT_STAGE = auth_stage("google_auth", "user_upsert")
+TOKEN_STAGE = auth_stage("google_auth", "token_issue")
+SERIALIZE_STAGE = auth_stage("google_auth", "serialize")
+
 
 @router.post("/google", response_model=GoogleAuthResponse)
-def google_auth(token_request: GoogleTokenRequest, db: Session = Depends(get_db)):
+async def google_auth(
+    token_request: GoogleTokenRequest,
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
     """
     Authenticate user with Google OAuth token
     
+    Token verification runs on the event loop. Database work is awaited on
+    the async stack, or handed to the threadpool on the sync stack. Each
+    stage is timed into ``auth_stage_duration_seconds``.
+    
     Args:
         token_request: Google OAuth token request
-        db: Database session
+        db: Database session (sync or async, per ``DATABASE_ASYNC``)
         
     Returns:
         GoogleAuthResponse: Access token and user information
     """
     try:
-        # Verify the Google token
-        idinfo = id_token.verify_oauth2_token(
-            token_request.token, 
-            google_requests.Request(), 
-            settings.GOOGLE_CLIENT_ID
-        )
+        # Verify the Google token against the cached signing certificates
+        with VERIFY_STAGE.time():
+            idinfo = await google_token_verifier.verify_async(token_request.token)
         
         # Extract user information
         google_id = idinfo.get("sub")
@@ -51,17 +72,46 @@ def google_auth(token_request: GoogleTokenRequest, db: Session = Depends(get_db)
                 detail="Email not found in Google token"
             )
         
+        # Per-account limit, before any database work
+        wait = await rate_limiter.check_email(email, "/auth/google")
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many sign-in attempts",
+                headers={"Retry-After": retry_after_header(wait)}
+            )
+        
         # Use auth service to handle user creation/update and token generation
-        auth_service = AuthService(db)
-        user = auth_service.get_or_create_user(
-            email=email,
-            google_id=google_id,
-            first_name=first_name,
-            last_name=last_name,
-            profile_picture=profile_picture
-        )
+        if isinstance(db, AsyncSession):
+            auth_service = AsyncAuthService(db)
+            with UPSERT_STAGE.time():
+                user = await auth_service.get_or_create_user(
+                    email=email,
+                    google_id=google_id,
+                    first_name=first_name,
+                    last_name=last_name,
+                    profile_picture=profile_picture
+                )
+            with TOKEN_STAGE.time():
+                result = await auth_service.authenticate_user(user)
+        else:
+            auth_service = AuthService(db)
+            with UPSERT_STAGE.time():
+                user = await run_in_threadpool(
+                    auth_service.get_or_create_user,
+                    email=email,
+                    google_id=google_id,
+                    first_name=first_name,
+                    last_name=last_name,
+                    profile_picture=profile_picture
+                )
+            with TOKEN_STAGE.time():
+                result = await run_in_threadpool(auth_service.authenticate_user, user)
         
-        return auth_service.authenticate_user(user)
+        # Serialized here (not by FastAPI) so the stage can be timed, and
+        # without validating the response a second time
+        with SERIALIZE_STAGE.time():
+            return ModelResponse(result)
         
     except ValueError as e:
         # Invalid token - log detailed error but return generic message
@@ -82,8 +132,72 @@ def google_auth(token_request: GoogleTokenRequest, db: Session = Depends(get_db)
         )
 
 
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(
+    token_request: RefreshTokenRequest,
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    Exchange a refresh token for a new access token
+    
+    The refresh token is rotated: the response carries its successor and
+    the presented token stops working. Presenting a rotated token again
+    revokes the whole session.
+    
+    Args:
+        token_request: Refresh token request
+        db: Database session (sync or async, per ``DATABASE_ASYNC``)
+        
+    Returns:
+        TokenResponse: New access token and refresh token
+    """
+    try:
+        if isinstance(db, AsyncSession):
+            result = await AsyncAuthService(db).refresh_session(token_request.refresh_token)
+        else:
+            result = await run_in_threadpool(AuthService(db).refresh_session, token_request.refresh_token)
+    except RefreshTokenReuseError:
+        logger.warning("Refresh token reuse detected; session revoked")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    except InvalidRefreshTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    return ModelResponse(result)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    logout_request: Optional[LogoutRequest] = None,
+    payload: Dict[str, Any] = Depends(get_token_payload),
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    Sign out: revoke the access token the request was made with
+    
+    The token is rejected by this worker at once and by the others after
+    their next sync (``REVOCATION_SYNC_SECONDS``). When the body carries
+    the session's refresh token, it is revoked too.
+    
+    Args:
+        logout_request: Optional refresh token of the session
+        payload: Verified access token payload (injected by dependency)
+        db: Database session (sync or async, per ``DATABASE_ASYNC``)
+    """
+    refresh_token = logout_request.refresh_token if logout_request else None
+    if isinstance(db, AsyncSession):
+        await AsyncAuthService(db).logout(payload, refresh_token)
+    else:
+        await run_in_threadpool(AuthService(db).logout, payload, refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CachedUser = Depends(get_profile_user)):
     """
     Get current authenticated user information
     
@@ -93,4 +207,4 @@ def get_me(current_user: User = Depends(get_current_user)):
     Returns:
         UserResponse: Current user information
     """
-    return UserResponse.model_validate(current_user)
+    return ModelResponse(UserResponse.model_validate(current_user))
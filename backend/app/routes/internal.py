@@ -0,0 +1,147 @@
+import codecs
+import io
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.database import async_engine, async_engine_pool_stats, engine, engine_pool_stats, get_db
+from app.core.dependencies import require_admin
+from app.core.google_certs import google_cert_cache
+from app.core.google_verifier import google_token_verifier
+from app.core.profiling import profile_store
+from app.core.rate_limit import rate_limiter
+from app.core.revocation import revocation_list
+from app.core.security import access_token_cache
+from app.core.user_cache import user_cache
+from app.services import user_transfer
+
+# Request bodies larger than this are spooled to disk during an import
+IMPORT_SPOOL_BYTES = 1024 * 1024
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/stats")
+async def get_stats():
+    """
+    Runtime statistics for sizing pools and caches (admin only)
+    
+    Returns:
+        dict: Connection pool gauges, checkout wait histograms and cache counters
+    """
+    return {
+        "db_pool": {
+            "sync": engine_pool_stats.snapshot(engine.pool),
+            # None unless the async engine is configured
+            "async": (
+                async_engine_pool_stats.snapshot(async_engine.sync_engine.pool)
+                if async_engine is not None else None
+            ),
+        },
+        "google_certs": google_cert_cache.stats(),
+        "google_id_tokens": google_token_verifier.stats(),
+        "access_tokens": access_token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "revocations": revocation_list.stats(),
+        "rate_limit": rate_limiter.backend.stats(),
+    }
+
+
+@router.get("/profiles")
+def list_profiles():
+    """
+    Recent request profiles, newest first (admin only)
+    
+    Profiles are recorded when ``PROFILING_ENABLED`` is set; each worker
+    writes to the shared ``PROFILING_DIR``.
+    
+    Returns:
+        dict: Name, size and creation time of every stored profile
+    """
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    """
+    Download one request profile in collapsed-stack format (admin only)
+    
+    Args:
+        name: Profile file name from ``/internal/profiles``
+        
+    Returns:
+        FileResponse: The profile, readable by flamegraph.pl or speedscope
+    """
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
+@router.get("/users/export")
+def export_users(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Stream every user as NDJSON or CSV (admin only)
+    
+    The body is produced after the route returns, so it reads through a
+    session of its own rather than the request's (sync stack only).
+    
+    Args:
+        format: ``ndjson`` (default) or ``csv``
+        
+    Returns:
+        StreamingResponse: The export, produced one chunk at a time
+    """
+    def stream():
+        db = database.SessionLocal()
+        try:
+            yield from user_transfer.export_users(db, format)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=user_transfer.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+@router.post("/users/import")
+async def import_users(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Create or update users from an NDJSON or CSV request body (admin only)
+    
+    The body must be UTF-8. It is spooled (to disk beyond 1 MiB) and
+    imported in batches with the same upsert rules as a Google login.
+    
+    Args:
+        request: Request whose body is the file to import
+        format: ``ndjson`` (default) or ``csv``
+        db: Database session
+        
+    Returns:
+        dict: Row counters and the first errors
+    """
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        # Checked while spooling so a bad body is rejected before any batch is written
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            async for chunk in request.stream():
+                decoder.decode(chunk)
+                spool.write(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request body is not valid UTF-8")
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        result = await run_in_threadpool(user_transfer.import_users, db, text, format)
+        text.detach()
+    return result.as_dict()
@@ -0,0 +1,120 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional, Union
+
+from app.core.dependencies import get_authenticated_user, get_session, require_admin
+from app.core.responses import ModelResponse
+from app.repositories.user_repository import InvalidCursorError
+from app.schemas.user import UserBatchRequest, UserBatchResponse, UserPage
+from app.services.auth_service import AsyncAuthService, AuthService
+from app.services.user_service import AsyncUserService, UserService
+
+# Largest page GET /users returns
+MAX_PAGE_SIZE = 500
+
+router = APIRouter(prefix="/users", tags=["users"], dependencies=[Depends(get_authenticated_user)])
+
+
+@router.post("/batch", response_model=UserBatchResponse, dependencies=[Depends(require_admin)])
+async def get_users_batch(
+    batch_request: UserBatchRequest,
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    Look up many users by ID and/or Google ID (admin only)
+    
+    Replaces one request per user for callers rendering lists of users.
+    Responses carry emails and Google IDs, so like ``GET /users`` this is
+    restricted to ``ADMIN_EMAILS``.
+    
+    Users come back in request order (IDs first, then Google IDs), each
+    once; keys that match no user are listed in ``missing_ids`` and
+    ``missing_google_ids``.
+    
+    Each user is validated once, when the response is built; the response
+    is then serialized directly, without FastAPI's second validation pass.
+    
+    Args:
+        batch_request: IDs and Google IDs to resolve (``USER_BATCH_MAX_IDS`` at most)
+        db: Database session (sync or async, per ``DATABASE_ASYNC``)
+        
+    Returns:
+        UserBatchResponse: Users found and the keys that were not
+    """
+    if isinstance(db, AsyncSession):
+        result = await AsyncUserService(db).get_users_batch(batch_request.ids, batch_request.google_ids)
+    else:
+        result = await run_in_threadpool(
+            UserService(db).get_users_batch, batch_request.ids, batch_request.google_ids
+        )
+    return ModelResponse(result)
+
+
+@router.get("", response_model=UserPage, dependencies=[Depends(require_admin)])
+async def list_users(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    created_after: Optional[datetime] = Query(None, description="Only users created at or after this time"),
+    created_before: Optional[datetime] = Query(None, description="Only users created before this time"),
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    List users, newest first (admin only)
+    
+    Pages are keyed on ``(created_at, id)``: pass the ``next_cursor`` of a
+    page to get the one after it, with the same filters. Deep pages cost
+    as much as the first one. ``next_cursor`` is null on the last page.
+    
+    Args:
+        limit: Page size
+        cursor: Opaque cursor from the previous page
+        created_after: Lower bound on creation time (inclusive)
+        created_before: Upper bound on creation time (exclusive)
+        db: Database session (sync or async, per ``DATABASE_ASYNC``)
+        
+    Returns:
+        UserPage: One page of users and the cursor of the next
+    """
+    try:
+        if isinstance(db, AsyncSession):
+            page = await AsyncUserService(db).list_users(limit, cursor, created_after, created_before)
+        else:
+            page = await run_in_threadpool(
+                UserService(db).list_users, limit, cursor, created_after, created_before
+            )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return ModelResponse(page)
+
+
+@router.post("/{user_id}/revoke", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
+async def revoke_user(
+    user_id: int,
+    db: Union[Session, AsyncSession] = Depends(get_session)
+):
+    """
+    Revoke every access token and refresh token of a user (admin only)
+    
+    Tokens issued until now stop working on every worker within
+    ``REVOCATION_SYNC_SECONDS``; the user can sign in again afterwards.
+    
+    Args:
+        user_id: User whose tokens are revoked
+        db: Database session (sync or async, per ``DATABASE_ASYNC``)
+    """
+    if isinstance(db, AsyncSession):
+        found = await AsyncAuthService(db).revoke_user(user_id)
+    else:
+        found = await run_in_threadpool(AuthService(db).revoke_user, user_id)
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
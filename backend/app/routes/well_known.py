@@ -0,0 +1,49 @@
+import hashlib
+import json
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Header, Response
+
+from app.core.config import settings
+from app.core.jwt_backends import JWTBackend
+from app.core.security import get_jwt_backend
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+# (backend, body, etag) of the last rendered document; rebuilt on rotation
+_document: Optional[Tuple[JWTBackend, bytes, str]] = None
+
+
+def _render(backend: JWTBackend) -> Tuple[bytes, str]:
+    global _document
+    document = _document
+    if document is None or document[0] is not backend:
+        body = json.dumps(backend.jwks, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        document = (backend, body, '"{}"'.format(hashlib.sha256(body).hexdigest()[:32]))
+        _document = document
+    return document[1], document[2]
+
+
+@router.get("/jwks.json")
+async def get_jwks(if_none_match: Optional[str] = Header(default=None)):
+    """
+    Public keys for verifying access tokens locally
+    
+    Lists the current signing key and any retiring or upcoming keys, each
+    under the ``kid`` stamped in token headers. Shared HS* secrets are never
+    published, so the set is empty for HMAC algorithms.
+    
+    Args:
+        if_none_match: ETag from a previous response
+        
+    Returns:
+        Response: JWK Set, or 304 if the client's copy is current
+    """
+    body, etag = _render(get_jwt_backend())
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        "ETag": etag,
+    }
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
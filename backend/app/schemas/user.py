@@ -1,6 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, conint, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from app.core.config import settings
 
 
 class UserBase(BaseModel):
@@ -31,4 +33,48 @@ class GoogleTokenRequest(BaseModel):
 class GoogleAuthResponse(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
     user: UserResponse
+
+
+class RefreshTokenRequest(BaseModel):
+    """Request schema for exchanging a refresh token"""
+    refresh_token: str = Field(..., min_length=1, description="Refresh token from sign-in or the last refresh")
+
+
+class LogoutRequest(BaseModel):
+    """Request schema for signing out"""
+    refresh_token: Optional[str] = Field(None, description="Refresh token of the session to end as well")
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str
+    refresh_token: str
+
+
+# users.id is a 32-bit integer column
+UserId = conint(ge=1, le=2**31 - 1)
+
+
+class UserBatchRequest(BaseModel):
+    """Request schema for looking up many users at once"""
+    ids: List[UserId] = Field(default_factory=list, description="User IDs")
+    google_ids: List[str] = Field(default_factory=list, description="Google IDs")
+
+    @model_validator(mode="after")
+    def check_size(self):
+        if len(self.ids) + len(self.google_ids) > settings.USER_BATCH_MAX_IDS:
+            raise ValueError(f"At most {settings.USER_BATCH_MAX_IDS} ids and google_ids per request")
+        return self
+
+
+class UserBatchResponse(BaseModel):
+    users: List[UserResponse]
+    missing_ids: List[int]
+    missing_google_ids: List[str]
+
+
+class UserPage(BaseModel):
+    users: List[UserResponse]
+    next_cursor: Optional[str] = None
@@ -3,19 +3,50 @@ Service layer for authentication business logic.
 Orchestrates user repository and token creation.
 """
 import logging
-from typing import Dict, Any
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.repositories.user_repository import UserRepository
+from app.repositories.refresh_token_repository import (
+    AsyncRefreshTokenRepository,
+    InvalidRefreshTokenError,
+    RefreshTokenRepository,
+)
+from app.repositories.revocation_repository import AsyncRevocationRepository, RevocationRepository
+from app.repositories.user_repository import AsyncUserRepository, UserRepository
 from app.models.user import User
-from app.schemas.user import GoogleAuthResponse, UserResponse
-from app.core.security import create_access_token
+from app.schemas.user import GoogleAuthResponse, TokenResponse, UserResponse
+from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.core.security import create_access_token, profile_claims
+from app.core.user_cache import CachedUser, user_cache
 
 logger = logging.getLogger(__name__)
 
 
-class AuthService:
+class _AccessTokenMixin:
+    """Helpers shared by the sync and async services; they do no I/O."""
+
+    @staticmethod
+    def create_user_access_token(user: Any) -> str:
+        """
+        Create an access token for a user.
+
+        Args:
+            user: User object or snapshot
+
+        Returns:
+            Signed access token
+        """
+        token_data = {"sub": str(user.id), "email": user.email}
+        if settings.JWT_PROFILE_CLAIMS:
+            token_data.update(profile_claims(user))
+        return create_access_token(data=token_data)
+
+
+class AuthService(_AccessTokenMixin):
     """Service for authentication operations."""
 
     def __init__(self, db: Session):
@@ -26,6 +57,8 @@ class AuthService:
             db: SQLAlchemy database session
         """
         self.user_repo = UserRepository(db)
+        self.refresh_repo = RefreshTokenRepository(db)
+        self.revocation_repo = RevocationRepository(db)
 
     def get_or_create_user(
         self,
@@ -36,7 +69,8 @@ class AuthService:
         profile_picture: str,
     ) -> User:
         """
-        Get an existing user or create a new one.
+        Get an existing user or create a new one, refreshing stored Google
+        profile claims when they changed.
 
         Args:
             email: User's email
@@ -48,57 +82,259 @@ class AuthService:
         Returns:
             User object
         """
-        user = self.user_repo.get_user_by_email(email)
+        return self.user_repo.upsert_from_google(
+            email=email,
+            google_id=google_id,
+            first_name=first_name,
+            last_name=last_name,
+            profile_picture=profile_picture,
+        )
 
-        if not user:
-            logger.info(f"Creating new user with email: {email}")
-            user = self.user_repo.create_user(
-                email=email,
-                google_id=google_id,
-                first_name=first_name,
-                last_name=last_name,
-                profile_picture=profile_picture,
-            )
+    def authenticate_user(self, user: User) -> GoogleAuthResponse:
+        """
+        Create an authentication response for a user, starting a new
+        refresh token family.
+
+        Args:
+            user: User object to authenticate
+
+        Returns:
+            GoogleAuthResponse with access token, refresh token and user data
+        """
+        return GoogleAuthResponse(
+            access_token=self.create_user_access_token(user),
+            token_type="bearer",
+            refresh_token=self.refresh_repo.create(user.id),
+            user=UserResponse.model_validate(user),
+        )
+
+    def refresh_session(self, refresh_token: str) -> TokenResponse:
+        """
+        Exchange a refresh token for a new access token and refresh token.
+
+        Costs one indexed write on the refresh token table; the user comes
+        from the user cache when possible. Google is not contacted.
+
+        Args:
+            refresh_token: Refresh token presented by the client
+
+        Returns:
+            TokenResponse with the new token pair
+
+        Raises:
+            InvalidRefreshTokenError: If the refresh token cannot be used
+        """
+        user_id, new_refresh_token = self.refresh_repo.rotate(refresh_token)
+        user = self.get_user_by_id(user_id)
+        if user is None:
+            raise InvalidRefreshTokenError("User no longer exists")
+        return TokenResponse(
+            access_token=self.create_user_access_token(user),
+            token_type="bearer",
+            refresh_token=new_refresh_token,
+        )
+
+    def logout(self, payload: Dict[str, Any], refresh_token: Optional[str] = None) -> None:
+        """
+        Revoke the access token a request was made with, and optionally the
+        session of a refresh token.
+
+        The revocation applies to this worker at once and reaches the
+        others with their next sync.
+
+        Args:
+            payload: Verified payload of the access token
+            refresh_token: Refresh token of the same session, if the client has one
+        """
+        user_id = int(payload["sub"])
+        jti, exp = payload.get("jti"), payload.get("exp")
+        if jti and isinstance(exp, (int, float)):
+            revocation = self.revocation_repo.revoke_token(jti, user_id, datetime.fromtimestamp(exp, timezone.utc))
         else:
-            logger.info(f"Updating existing user: {email}")
-            user = self.user_repo.update_user(
-                user=user,
-                google_id=google_id,
-                first_name=first_name,
-                last_name=last_name,
-                profile_picture=profile_picture,
-            )
+            # Tokens issued before they carried a jti can only be revoked together
+            revocation = self.revocation_repo.revoke_user(user_id)
+        revocation_list.apply([revocation])
+        if refresh_token:
+            self.refresh_repo.revoke_session(refresh_token, user_id)
 
-        return user
+    def revoke_user(self, user_id: int) -> bool:
+        """
+        Revoke every access token and refresh token of a user.
 
-    def authenticate_user(self, user: User) -> GoogleAuthResponse:
+        The user can sign in again with Google afterwards.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            False if the user does not exist
         """
-        Create an authentication response for a user.
+        if self.get_user_by_id(user_id) is None:
+            return False
+        revocation_list.apply([self.revocation_repo.revoke_user(user_id)])
+        self.refresh_repo.revoke_user(user_id)
+        return True
+
+    def get_user_by_id(self, user_id: int) -> Optional[CachedUser]:
+        """
+        Get a user by ID, served from the user cache when possible.
 
         Args:
-            user: User object to authenticate
+            user_id: User ID
 
         Returns:
-            GoogleAuthResponse with access token and user data
+            Detached snapshot of the user, or None if not found
         """
-        access_token = create_access_token(
-            data={"sub": str(user.id), "email": user.email}
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        user = self.user_repo.get_user_by_id(user_id)
+        return user_cache.put(user) if user is not None else None
+
+
+class AsyncAuthService(_AccessTokenMixin):
+    """
+    Service for authentication operations on the async database stack.
+
+    Mirrors :class:`AuthService` with coroutine methods; it is not a
+    subclass, so it cannot be passed where a sync service is expected.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the service with an async database session.
+
+        Args:
+            db: SQLAlchemy async database session
+        """
+        self.user_repo = AsyncUserRepository(db)
+        self.refresh_repo = AsyncRefreshTokenRepository(db)
+        self.revocation_repo = AsyncRevocationRepository(db)
+
+    async def get_or_create_user(
+        self,
+        email: str,
+        google_id: str,
+        first_name: str,
+        last_name: str,
+        profile_picture: str,
+    ) -> User:
+        """
+        Get an existing user or create a new one, refreshing stored Google
+        profile claims when they changed.
+
+        Args:
+            email: User's email
+            google_id: User's Google ID
+            first_name: User's first name
+            last_name: User's last name
+            profile_picture: User's profile picture URL
+
+        Returns:
+            User object
+        """
+        return await self.user_repo.upsert_from_google(
+            email=email,
+            google_id=google_id,
+            first_name=first_name,
+            last_name=last_name,
+            profile_picture=profile_picture,
         )
 
+    async def authenticate_user(self, user: User) -> GoogleAuthResponse:
+        """
+        Create an authentication response for a user, starting a new
+        refresh token family.
+
+        Args:
+            user: User object to authenticate
+
+        Returns:
+            GoogleAuthResponse with access token, refresh token and user data
+        """
         return GoogleAuthResponse(
-            access_token=access_token,
+            access_token=self.create_user_access_token(user),
             token_type="bearer",
+            refresh_token=await self.refresh_repo.create(user.id),
             user=UserResponse.model_validate(user),
         )
 
-    def get_user_by_id(self, user_id: int) -> User:
+    async def refresh_session(self, refresh_token: str) -> TokenResponse:
         """
-        Get a user by ID.
+        Exchange a refresh token for a new access token and refresh token.
+
+        See :meth:`AuthService.refresh_session`.
+
+        Args:
+            refresh_token: Refresh token presented by the client
+
+        Returns:
+            TokenResponse with the new token pair
+
+        Raises:
+            InvalidRefreshTokenError: If the refresh token cannot be used
+        """
+        user_id, new_refresh_token = await self.refresh_repo.rotate(refresh_token)
+        user = await self.get_user_by_id(user_id)
+        if user is None:
+            raise InvalidRefreshTokenError("User no longer exists")
+        return TokenResponse(
+            access_token=self.create_user_access_token(user),
+            token_type="bearer",
+            refresh_token=new_refresh_token,
+        )
+
+    async def logout(self, payload: Dict[str, Any], refresh_token: Optional[str] = None) -> None:
+        """
+        Revoke the access token a request was made with, and optionally the
+        session of a refresh token.
+
+        See :meth:`AuthService.logout`.
+
+        Args:
+            payload: Verified payload of the access token
+            refresh_token: Refresh token of the same session, if the client has one
+        """
+        user_id = int(payload["sub"])
+        jti, exp = payload.get("jti"), payload.get("exp")
+        if jti and isinstance(exp, (int, float)):
+            revocation = await self.revocation_repo.revoke_token(
+                jti, user_id, datetime.fromtimestamp(exp, timezone.utc)
+            )
+        else:
+            revocation = await self.revocation_repo.revoke_user(user_id)
+        revocation_list.apply([revocation])
+        if refresh_token:
+            await self.refresh_repo.revoke_session(refresh_token, user_id)
+
+    async def revoke_user(self, user_id: int) -> bool:
+        """
+        Revoke every access token and refresh token of a user.
 
         Args:
             user_id: User ID
 
         Returns:
-            User object
+            False if the user does not exist
+        """
+        if await self.get_user_by_id(user_id) is None:
+            return False
+        revocation_list.apply([await self.revocation_repo.revoke_user(user_id)])
+        await self.refresh_repo.revoke_user(user_id)
+        return True
+
+    async def get_user_by_id(self, user_id: int) -> Optional[CachedUser]:
+        """
+        Get a user by ID, served from the user cache when possible.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Detached snapshot of the user, or None if not found
         """
-        return self.user_repo.get_user_by_id(user_id)
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        user = await self.user_repo.get_user_by_id(user_id)
+        return user_cache.put(user) if user is not None else None
@@ -0,0 +1,123 @@
+"""
+Keeps this worker's revocation list in step with the database.
+
+Every ``REVOCATION_SYNC_SECONDS`` the worker reads only the revocations made
+since the last one it applied, minus a small overlap for rows committed
+late or stamped by a worker whose clock is slightly behind; re-applying a
+row is harmless. The first sync (a warm-up step) loads every live row.
+Expired entries are pruned from memory on each sync and deleted from the
+table about once an hour, together with spent refresh tokens.
+
+A revocation made on another worker is therefore honoured here within one
+sync interval; the worker that made it applies it at once.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core import database
+from app.core.config import settings
+from app.core.revocation import Revocation, RevocationList, revocation_list
+from app.repositories.refresh_token_repository import AsyncRefreshTokenRepository, RefreshTokenRepository
+from app.repositories.revocation_repository import AsyncRevocationRepository, RevocationRepository
+
+logger = logging.getLogger(__name__)
+
+# Re-read window before the newest revocation already applied
+SYNC_OVERLAP = timedelta(seconds=60)
+# Seconds between deletions of expired revocations and refresh tokens
+PURGE_INTERVAL = 3600
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _changes_since(since: datetime, now: datetime) -> List[Revocation]:
+    with database.SessionLocal() as db:
+        return RevocationRepository(db).changes_since(since, now)
+
+
+def _purge_expired() -> int:
+    with database.SessionLocal() as db:
+        return RevocationRepository(db).purge_expired()
+
+
+def _purge_refresh_tokens() -> int:
+    with database.SessionLocal() as db:
+        return RefreshTokenRepository(db).purge_expired()
+
+
+async def sync_revocations(state: RevocationList = revocation_list) -> int:
+    """
+    Apply the revocations made since the last sync and prune expired ones.
+
+    Args:
+        state: Revocation list to update
+
+    Returns:
+        Number of rows read
+    """
+    now = datetime.now(timezone.utc)
+    since = state.cursor - SYNC_OVERLAP if state.cursor is not None else _EPOCH
+    if settings.DATABASE_ASYNC:
+        async with database.AsyncSessionLocal() as db:
+            revocations = await AsyncRevocationRepository(db).changes_since(since, now)
+    else:
+        revocations = await run_in_threadpool(_changes_since, since, now)
+    state.apply(revocations)
+    state.prune()
+    state.last_sync = time.time()
+    return len(revocations)
+
+
+async def purge_expired_revocations() -> int:
+    """
+    Delete revocations whose tokens have all expired.
+
+    Returns:
+        Number of rows deleted
+    """
+    if settings.DATABASE_ASYNC:
+        async with database.AsyncSessionLocal() as db:
+            return await AsyncRevocationRepository(db).purge_expired()
+    return await run_in_threadpool(_purge_expired)
+
+
+async def purge_refresh_tokens() -> int:
+    """
+    Delete refresh tokens that are expired or were used or revoked before
+    the reuse-detection window.
+
+    Returns:
+        Number of rows deleted
+    """
+    if settings.DATABASE_ASYNC:
+        async with database.AsyncSessionLocal() as db:
+            return await AsyncRefreshTokenRepository(db).purge_expired()
+    return await run_in_threadpool(_purge_refresh_tokens)
+
+
+async def run_sync_loop(interval: float, sync_first: bool = False) -> None:
+    """
+    Sync every ``interval`` seconds until cancelled; failures are logged
+    and retried at the next interval.
+
+    Args:
+        interval: Seconds between syncs
+        sync_first: Sync before the first wait (when the warm-up does not)
+    """
+    last_purge = time.monotonic()
+    if not sync_first:
+        await asyncio.sleep(interval)
+    while True:
+        try:
+            await sync_revocations()
+            if time.monotonic() - last_purge >= PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                await purge_expired_revocations()
+                await purge_refresh_tokens()
+        except Exception as exc:
+            logger.warning("Revocation sync failed: %s", exc)
+        await asyncio.sleep(interval)
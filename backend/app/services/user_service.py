@@ -0,0 +1,180 @@
+"""
+Service layer for looking up and listing users.
+
+Lists of users (comment authors, activity feeds) are resolved with one
+batch request instead of one request per user: cached users are served from
+the user cache and the rest are loaded with a single query. The admin user
+listing is paginated with opaque keyset cursors.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.user_cache import CachedUser, user_cache
+from app.repositories.user_repository import AsyncUserRepository, UserRepository
+from app.schemas.user import UserBatchResponse, UserPage, UserResponse
+
+
+def _split_cached(user_ids: Sequence[int]) -> Tuple[Dict[int, CachedUser], List[int]]:
+    """Serve what the user cache holds and return the IDs still to load."""
+    found: Dict[int, CachedUser] = {}
+    misses: List[int] = []
+    for user_id in dict.fromkeys(user_ids):
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            found[user_id] = cached
+        else:
+            misses.append(user_id)
+    return found, misses
+
+
+def _batch_response(
+    user_ids: Sequence[int],
+    google_ids: Sequence[str],
+    by_id: Dict[int, CachedUser],
+    loaded_by_google_id: Iterable[CachedUser],
+) -> UserBatchResponse:
+    """
+    Assemble the response in request order: IDs first, then Google IDs.
+
+    A user requested several times (or by both keys) is returned once.
+    """
+    by_google_id = {user.google_id: user for user in loaded_by_google_id}
+    users: List[UserResponse] = []
+    seen = set()
+    for user in [by_id.get(user_id) for user_id in user_ids] + [by_google_id.get(gid) for gid in google_ids]:
+        if user is not None and user.id not in seen:
+            seen.add(user.id)
+            users.append(UserResponse.model_validate(user))
+    return UserBatchResponse(
+        users=users,
+        missing_ids=[user_id for user_id in dict.fromkeys(user_ids) if user_id not in by_id],
+        missing_google_ids=[gid for gid in dict.fromkeys(google_ids) if gid not in by_google_id],
+    )
+
+
+class UserService:
+    """Service for user lookups."""
+
+    def __init__(self, db: Session):
+        """
+        Initialize the service with a database session.
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.user_repo = UserRepository(db)
+
+    def get_users_batch(self, user_ids: Sequence[int], google_ids: Sequence[str]) -> UserBatchResponse:
+        """
+        Resolve many users by ID and Google ID.
+
+        Args:
+            user_ids: User IDs, in the order the caller wants them back
+            google_ids: Google IDs, returned after the users found by ID
+
+        Returns:
+            UserBatchResponse with the users found and the keys that were not
+        """
+        by_id, misses = _split_cached(user_ids)
+        if misses:
+            by_id.update((user.id, user_cache.put(user)) for user in self.user_repo.get_users_by_ids(misses))
+        loaded = (
+            [user_cache.put(user) for user in self.user_repo.get_users_by_google_ids(google_ids)]
+            if google_ids else []
+        )
+        return _batch_response(user_ids, google_ids, by_id, loaded)
+
+    def list_users(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> UserPage:
+        """
+        Get one page of users, newest first.
+
+        Args:
+            limit: Page size
+            cursor: ``next_cursor`` of the previous page; None for the first
+            created_after: Only users created at or after this time
+            created_before: Only users created before this time
+
+        Returns:
+            UserPage with the users and the cursor of the next page
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        users, next_cursor = self.user_repo.list_users(limit, cursor, created_after, created_before)
+        return UserPage(users=[UserResponse.model_validate(user) for user in users], next_cursor=next_cursor)
+
+
+class AsyncUserService:
+    """
+    Service for user lookups on the async database stack.
+
+    Mirrors :class:`UserService` with coroutine methods and shares its
+    module-level helpers; it is not a subclass.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the service with an async database session.
+
+        Args:
+            db: SQLAlchemy async database session
+        """
+        self.user_repo = AsyncUserRepository(db)
+
+    async def get_users_batch(self, user_ids: Sequence[int], google_ids: Sequence[str]) -> UserBatchResponse:
+        """
+        Resolve many users by ID and Google ID.
+
+        See :meth:`UserService.get_users_batch`.
+
+        Args:
+            user_ids: User IDs, in the order the caller wants them back
+            google_ids: Google IDs, returned after the users found by ID
+
+        Returns:
+            UserBatchResponse with the users found and the keys that were not
+        """
+        by_id, misses = _split_cached(user_ids)
+        if misses:
+            by_id.update((user.id, user_cache.put(user)) for user in await self.user_repo.get_users_by_ids(misses))
+        loaded = (
+            [user_cache.put(user) for user in await self.user_repo.get_users_by_google_ids(google_ids)]
+            if google_ids else []
+        )
+        return _batch_response(user_ids, google_ids, by_id, loaded)
+
+    async def list_users(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> UserPage:
+        """
+        Get one page of users, newest first.
+
+        See :meth:`UserService.list_users`.
+
+        Args:
+            limit: Page size
+            cursor: ``next_cursor`` of the previous page; None for the first
+            created_after: Only users created at or after this time
+            created_before: Only users created before this time
+
+        Returns:
+            UserPage with the users and the cursor of the next page
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        users, next_cursor = await self.user_repo.list_users(limit, cursor, created_after, created_before)
+        return UserPage(users=[UserResponse.model_validate(user) for user in users], next_cursor=next_cursor)
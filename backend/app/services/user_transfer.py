@@ -0,0 +1,236 @@
+"""
+Streaming bulk import and export of users as NDJSON or CSV.
+
+Input is read record by record and written in batches of
+``USER_TRANSFER_BATCH_SIZE``; output is produced one chunk at a time. Memory
+use is bounded by the batch size, not by the size of the file or table.
+"""
+import csv
+import io
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.repositories.user_bulk_repository import EXPORT_COLUMNS, IMPORT_COLUMNS, UserBulkRepository
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Error messages kept in an import result; the counters cover every row
+MAX_REPORTED_ERRORS = 100
+# The rules UserResponse applies when a stored user is read back
+_EMAIL = TypeAdapter(EmailStr)
+
+
+class InvalidRecord(ValueError):
+    """A parsed record with a value the API could not serve; counted as failed."""
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import."""
+
+    rows: int = 0
+    written: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def add_error(self, message: str) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def format_for_path(path: str) -> str:
+    """Guess the transfer format from a file name (defaults to NDJSON)."""
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def _normalize(record: Any) -> Dict[str, Optional[str]]:
+    """Validate one input record and keep the importable columns."""
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    values = {}
+    for name in IMPORT_COLUMNS:
+        value = record.get(name)
+        value = None if value is None else str(value).strip()
+        values[name] = value or None
+    if not values["email"]:
+        raise ValueError("missing email")
+    try:
+        _EMAIL.validate_python(values["email"])
+    except ValidationError:
+        raise InvalidRecord(f"invalid email {values['email']!r}") from None
+    return values
+
+
+Record = Tuple[int, Union[Dict[str, Optional[str]], ValueError]]
+
+
+def _iter_csv(stream: TextIO) -> Iterator[Record]:
+    reader = csv.DictReader(stream)
+    for record in reader:
+        try:
+            yield reader.line_num, _normalize(record)
+        except ValueError as exc:
+            yield reader.line_num, exc
+
+
+def _iter_ndjson(stream: TextIO) -> Iterator[Record]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, _normalize(json.loads(line))
+        except ValueError as exc:
+            yield line_number, exc
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Record]:
+    """
+    Parse an input stream lazily.
+
+    Input that cannot be decoded ends the stream with one error, numbered
+    after the last line read (the text stream decodes in blocks, so lines
+    just before the bad bytes may not have been read).
+
+    Args:
+        stream: Text stream of NDJSON lines or CSV with a header row
+        fmt: ``ndjson`` or ``csv``
+
+    Yields:
+        Tuples of (line number, normalized record or the error rejecting it)
+    """
+    records = _iter_csv(stream) if fmt == "csv" else _iter_ndjson(stream)
+    line_number = 0
+    while True:
+        try:
+            line_number, record = next(records)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as exc:
+            yield line_number + 1, ValueError(f"not valid {exc.encoding}, import stopped")
+            return
+        yield line_number, record
+
+
+def import_users(
+    db: Session,
+    stream: TextIO,
+    fmt: str = "ndjson",
+    batch_size: Optional[int] = None,
+) -> ImportResult:
+    """
+    Create or update users from an NDJSON or CSV stream.
+
+    Rows follow the login upsert rules (see :mod:`app.repositories.user_bulk_repository`).
+    Repeated emails within a batch are merged in file order, as consecutive
+    logins would be. A batch rejected by the database (a ``google_id``
+    already owned by another email) is retried row by row so only the
+    offending rows fail. Rows whose email ``UserResponse`` would reject fail
+    too and are never written; unreadable rows are skipped.
+
+    Args:
+        db: Database session
+        stream: Input text stream
+        fmt: ``ndjson`` or ``csv``
+        batch_size: Rows per batch; defaults to ``USER_TRANSFER_BATCH_SIZE``
+
+    Returns:
+        ImportResult with row counters and the first errors
+    """
+    repo = UserBulkRepository(db)
+    batch_size = batch_size or settings.USER_TRANSFER_BATCH_SIZE
+    result = ImportResult()
+    batch: Dict[str, Dict[str, Optional[str]]] = {}
+
+    def flush() -> None:
+        records = list(batch.values())
+        batch.clear()
+        try:
+            result.written += repo.upsert_batch(records)
+            return
+        except IntegrityError:
+            logger.warning("User import batch rejected; retrying %d rows individually", len(records))
+        for record, outcome in zip(records, repo.upsert_rows(records)):
+            if isinstance(outcome, Exception):
+                result.failed += 1
+                result.add_error(f"{record['email']}: conflicts with an existing user")
+            else:
+                result.written += bool(outcome)
+
+    for line_number, record in iter_records(stream, fmt):
+        result.rows += 1
+        if isinstance(record, InvalidRecord):
+            result.failed += 1
+            result.add_error(f"line {line_number}: {record}")
+            continue
+        if isinstance(record, ValueError):
+            result.skipped += 1
+            result.add_error(f"line {line_number}: {record}")
+            continue
+        previous = batch.get(record["email"])
+        if previous is not None:
+            record = {name: record[name] if record[name] is not None else previous[name] for name in record}
+        batch[record["email"]] = record
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if result.written:
+        # IDs of updated users are not known here
+        user_cache.clear()
+    return result
+
+
+def _value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def export_users(db: Session, fmt: str = "ndjson", batch_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Stream all users as NDJSON or CSV.
+
+    Args:
+        db: Database session
+        fmt: ``ndjson`` or ``csv``
+        batch_size: Rows per chunk; defaults to ``USER_TRANSFER_BATCH_SIZE``
+
+    Yields:
+        Text chunks of the export
+    """
+    repo = UserBulkRepository(db)
+    batch_size = batch_size or settings.USER_TRANSFER_BATCH_SIZE
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+        if repo.supports_copy:
+            yield from repo.copy_csv_chunks(batch_size)
+            return
+        for rows in repo.iter_chunks(batch_size):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([_value(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+        return
+
+    for rows in repo.iter_chunks(batch_size):
+        yield "".join(
+            json.dumps({name: _value(value) for name, value in zip(EXPORT_COLUMNS, row)}) + "\n"
+            for row in rows
+        )
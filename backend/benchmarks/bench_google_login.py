@@ -0,0 +1,101 @@
+"""
+Concurrent-login throughput of Google ID token verification.
+
+Compares three ways of verifying a burst of concurrent logins against a local
+fake issuer whose certificate endpoint adds artificial network latency:
+
+* ``sync``         - the original path: ``id_token.verify_token`` with a fresh
+                     ``google_requests.Request()`` per login, run in the anyio
+                     threadpool like a sync ``def`` route
+* ``sync-cached``  - the same threadpool path using the certificate cache
+* ``async``        - ``GoogleTokenVerifier.verify_async`` on the event loop
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_google_login --logins 2000 --latency 0.02
+"""
+import argparse
+import asyncio
+import time
+
+import anyio
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+
+from app.core.google_certs import GoogleCertCache
+from app.core.google_verifier import GoogleTokenVerifier
+from tests.fake_google import FakeCertServer, FakeGoogleIssuer
+
+AUDIENCE = "bench-client-id"
+
+
+async def _run_burst(verify, tokens, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(token):
+        async with semaphore:
+            await verify(token)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(t) for t in tokens))
+    return time.perf_counter() - start
+
+
+def bench_sync(server, tokens, concurrency):
+    def verify(token):
+        return id_token.verify_token(token, google_requests.Request(), AUDIENCE, certs_url=server.url)
+
+    async def run():
+        return await _run_burst(lambda t: anyio.to_thread.run_sync(verify, t), tokens, concurrency)
+
+    return asyncio.run(run())
+
+
+def bench_sync_cached(server, tokens, concurrency):
+    cache = GoogleCertCache(server.url, refresh_margin=0)
+
+    def verify(token):
+        return id_token.verify_token(token, cache.request, AUDIENCE, certs_url=server.url)
+
+    async def run():
+        return await _run_burst(lambda t: anyio.to_thread.run_sync(verify, t), tokens, concurrency)
+
+    return asyncio.run(run())
+
+
+def bench_async(server, tokens, concurrency):
+    cache = GoogleCertCache(server.url, refresh_margin=0)
+    verifier = GoogleTokenVerifier(cache, audience=AUDIENCE)
+
+    async def run():
+        try:
+            return await _run_burst(verifier.verify_async, tokens, concurrency)
+        finally:
+            await cache.aclose()
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=1000, help="logins per run")
+    parser.add_argument("--concurrency", type=int, default=200, help="in-flight logins")
+    parser.add_argument("--latency", type=float, default=0.02, help="cert endpoint latency (s)")
+    args = parser.parse_args()
+
+    issuer = FakeGoogleIssuer(audience=AUDIENCE)
+    tokens = [issuer.mint(email="user{}@example.com".format(i)) for i in range(args.logins)]
+
+    print("{:<12} {:>10} {:>14}".format("path", "seconds", "logins/sec"))
+    with FakeCertServer(certs=issuer.certs, latency=args.latency) as server:
+        for name, bench in (
+            ("sync", bench_sync),
+            ("sync-cached", bench_sync_cached),
+            ("async", bench_async),
+        ):
+            elapsed = bench(server, tokens, args.concurrency)
+            print("{:<12} {:>10.3f} {:>14.1f}".format(name, elapsed, args.logins / elapsed))
+
+
+if __name__ == "__main__":
+    main()
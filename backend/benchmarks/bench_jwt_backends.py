@@ -0,0 +1,68 @@
+"""
+Sign and verify throughput of the JWT backends.
+
+Measures operations per second for every backend and algorithm pair with a
+claim set shaped like our access tokens. Keys are generated per run.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_jwt_backends --seconds 1
+"""
+import argparse
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from app.core.jwt_backends import build_backend
+
+ALGORITHMS = ("HS256", "ES256", "EdDSA")
+
+
+def _keys(algorithm):
+    if algorithm.startswith("HS"):
+        return {"secret": "bench-secret-" + "x" * 32}
+    private_key = ec.generate_private_key(ec.SECP256R1()) if algorithm == "ES256" else (
+        ed25519.Ed25519PrivateKey.generate()
+    )
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return {"private_key": pem.decode()}
+
+
+def _rate(operation, seconds):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            operation()
+        count += 50
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    args = parser.parse_args()
+
+    claims = {"sub": "12345", "email": "user@example.com", "exp": int(time.time()) + 1800}
+
+    print("{:<8} {:<8} {:>12} {:>12}".format("backend", "alg", "sign/sec", "verify/sec"))
+    for algorithm in ALGORITHMS:
+        keys = _keys(algorithm)
+        for name in ("jose", "native"):
+            try:
+                backend = build_backend(name, algorithm, **keys)
+            except ValueError:
+                print("{:<8} {:<8} {:>12} {:>12}".format(name, algorithm, "n/a", "n/a"))
+                continue
+            token = backend.encode(claims)
+            sign = _rate(lambda: backend.encode(claims), args.seconds)
+            verify = _rate(lambda: backend.decode(token), args.seconds)
+            print("{:<8} {:<8} {:>12.0f} {:>12.0f}".format(name, algorithm, sign, verify))
+
+
+if __name__ == "__main__":
+    main()
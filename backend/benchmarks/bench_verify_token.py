@@ -0,0 +1,50 @@
+"""
+Per-request cost of access token verification.
+
+Simulates single-page-app traffic: a pool of signed-in clients, each sending
+its bearer token many times. Compares ``verify_token`` with the decoded
+token cache disabled (a full ``jwt.decode`` per request) and enabled.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_verify_token --clients 100 --requests 20000
+"""
+import argparse
+import random
+import time
+
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.security import create_access_token, verify_token
+
+
+def bench(tokens, requests, cache_size):
+    security.access_token_cache = TTLCache(maxsize=cache_size)
+    rng = random.Random(0)
+    order = [rng.choice(tokens) for _ in range(requests)]
+
+    start = time.perf_counter()
+    for token in order:
+        verify_token(token)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=100, help="distinct tokens in use")
+    parser.add_argument("--requests", type=int, default=20000, help="verifications per run")
+    args = parser.parse_args()
+
+    tokens = [
+        create_access_token(data={"sub": str(i), "email": "user{}@example.com".format(i)})
+        for i in range(args.clients)
+    ]
+
+    print("{:<10} {:>10} {:>14}".format("cache", "seconds", "us/request"))
+    for name, size in (("off", 0), ("on", 10000)):
+        elapsed = bench(tokens, args.requests, size)
+        print("{:<10} {:>10.3f} {:>14.2f}".format(name, elapsed, elapsed / args.requests * 1e6))
+
+
+if __name__ == "__main__":
+    main()
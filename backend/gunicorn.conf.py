@@ -0,0 +1,70 @@
+"""
+Gunicorn configuration for production.
+
+Run from the backend directory:
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+* ``WEB_WORKERS`` uvicorn workers, one per CPU of the container's quota
+  when 0 (``app/core/server.py``).
+* The app is imported once in the master and forked, so workers share its
+  code and data copy-on-write; the master's heap is frozen out of the
+  garbage collector first so collections in the workers do not dirty it.
+* uvicorn picks uvloop and httptools when they are installed (they come
+  with ``uvicorn[standard]``) and falls back to asyncio and h11.
+* Workers are recycled gracefully after ``WEB_MAX_REQUESTS`` requests, plus
+  a random jitter, to bound memory drift.
+* Each worker's connection pool is its share of ``DB_MAX_CONNECTIONS``
+  (``app/core/database.py``).
+* ``FORWARDED_ALLOW_IPS`` lists the proxies whose ``X-Forwarded-For`` is
+  trusted as the client IP (``app/core/rate_limit.py``).
+
+``PORT`` (default 8000) sets the listening port; any setting here can be
+overridden on the command line.
+"""
+import gc
+import importlib.util
+import os
+
+from app.core.config import settings
+from app.core.server import available_cpus, worker_count
+
+bind = "0.0.0.0:" + os.environ.get("PORT", "8000")
+workers = settings.WEB_WORKERS or worker_count(available_cpus())
+# Pool sizing reads the worker count when app.core.database is imported,
+# which happens after this file, in the master (preload) or in each worker
+settings.WEB_WORKERS = workers
+os.environ["WEB_WORKERS"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+# Seconds a recycled or stopped worker gets to finish in-flight requests
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+# Proxies trusted for X-Forwarded-For, which sets the client IP of the
+# per-IP sign-in rate limit
+forwarded_allow_ips = settings.FORWARDED_ALLOW_IPS
+
+
+def when_ready(server):
+    server.log.info(
+        "%d workers, event loop: %s, HTTP parser: %s",
+        workers,
+        "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "httptools" if importlib.util.find_spec("httptools") else "h11",
+    )
+    # Everything the preloaded app allocated stays shared with the workers
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections are per process; drop any the master opened without
+    # closing them, since the master still owns them
+    from app.core import database
+
+    database.engine.dispose(close=False)
+    if database.async_engine is not None:
+        database.async_engine.sync_engine.dispose(close=False)
@@ -0,0 +1,57 @@
+"""
+Shared fixtures: an in-memory SQLite database and test clients using it.
+
+Test modules seed the database by overriding ``session_factory`` and add
+their own dependency overrides or clean-up by overriding ``client``.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.dependencies import get_current_user
+from app.core.user_cache import user_cache
+from app.main import app
+from app.models.user import User
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    # The user cache holds rows of this database, so it starts and ends empty
+    user_cache.clear()
+    yield sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    user_cache.clear()
+
+
+@pytest.fixture
+def client(session_factory):
+    """Test client whose requests use ``session_factory``; overrides are restored afterwards."""
+    def override_get_db():
+        with session_factory() as db:
+            yield db
+
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+
+
+@pytest.fixture
+def admin_client(client, monkeypatch):
+    """Test client signed in as admin@example.com, an admin."""
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="admin@example.com")
+    return client
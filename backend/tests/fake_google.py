@@ -0,0 +1,138 @@
+"""
+Local stand-ins for Google's ID token issuer and certificate endpoint.
+
+``FakeCertServer`` serves a ``{key id: certificate}`` mapping over real HTTP
+with a configurable ``Cache-Control`` header and artificial latency, and
+counts how many requests reach it. ``FakeGoogleIssuer`` mints RS256 ID tokens
+whose signing certificate can be served by it. Together they let us exercise
+and measure token verification without network access.
+"""
+import datetime
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt
+from google.auth import jwt as google_jwt
+
+
+class FakeGoogleIssuer:
+    """Signs ID tokens the way Google does, with a freshly generated RSA key."""
+
+    def __init__(self, audience: str = "test-client-id", issuer: str = "https://accounts.google.com"):
+        self.audience = audience
+        self.issuer = issuer
+        self.key_id = uuid.uuid4().hex
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        self._signer = crypt.RSASigner.from_string(private_pem, key_id=self.key_id)
+
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "fake-google-issuer")])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        certificate = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(private_key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=30))
+            .sign(private_key, hashes.SHA256())
+        )
+        self.certificate_pem = certificate.public_bytes(serialization.Encoding.PEM).decode("ascii")
+
+    @property
+    def certs(self) -> Dict[str, str]:
+        """Certificate mapping in the format of Google's v1 certs endpoint."""
+        return {self.key_id: self.certificate_pem}
+
+    def mint(self, email: str = "user@example.com", lifetime: int = 3600, **claims: Any) -> str:
+        """Return a signed ID token for ``email``; extra claims override defaults."""
+        now = int(time.time())
+        payload = {
+            "iss": self.issuer,
+            "aud": self.audience,
+            "sub": "fake-" + email,
+            "email": email,
+            "email_verified": True,
+            "iat": now,
+            "exp": now + lifetime,
+        }
+        payload.update(claims)
+        return google_jwt.encode(self._signer, payload).decode("ascii")
+
+
+class FakeCertServer:
+    """Threaded HTTP server that mimics ``https://www.googleapis.com/oauth2/v1/certs``."""
+
+    def __init__(
+        self,
+        certs: Optional[Dict[str, str]] = None,
+        max_age: int = 3600,
+        latency: float = 0.0,
+    ):
+        self.certs = certs if certs is not None else {"fake-kid": "fake-certificate"}
+        self.max_age = max_age
+        self.latency = latency
+        self.status = 200
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/oauth2/v1/certs".format(host, port)
+
+    def start(self) -> "FakeCertServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                body = json.dumps(fake.certs).encode("utf-8")
+                self.send_response(fake.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "public, max-age={}".format(fake.max_age))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeCertServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,40 @@
+"""
+SQL statement budgets for endpoint tests.
+
+``max_queries`` works as a context manager around client calls or as a
+decorator on a test, and fails with the offending statements listed:
+
+    with max_queries(2):
+        client.get("/auth/me", headers=headers)
+
+    @max_queries(4)
+    def test_login(): ...
+
+Requests made through ``TestClient`` run in a copy of the test's context,
+so their statements reach the counter.
+"""
+from contextlib import ContextDecorator
+
+from app.core.query_counter import count_queries
+
+
+class max_queries(ContextDecorator):
+    """Fail if more than ``limit`` SQL statements run inside the block."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.counter = None
+
+    def __enter__(self):
+        self._context = count_queries(record=True)
+        self.counter = self._context.__enter__()
+        return self.counter
+
+    def __exit__(self, exc_type, exc, tb):
+        self._context.__exit__(exc_type, exc, tb)
+        if exc_type is None and self.counter.count > self.limit:
+            listing = "\n".join("  {}. {}".format(i, sql) for i, sql in enumerate(self.counter.statements, 1))
+            raise AssertionError(
+                "{} SQL statements executed, budget is {}:\n{}".format(self.counter.count, self.limit, listing)
+            )
+        return False
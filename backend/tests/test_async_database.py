@@ -0,0 +1,179 @@
+"""
+Test cases for the async database stack (AsyncSession repository, service
+and dependencies), run against SQLite through aiosqlite.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, get_async_database_url, get_async_db, get_db
+from app.core.dependencies import get_current_user, get_current_user_async
+from app.core.security import create_access_token
+from app.core.user_cache import user_cache
+from app.main import app
+from app.repositories.user_repository import AsyncUserRepository
+from app.services.auth_service import AsyncAuthService, AuthService
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def async_session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def async_client(async_session_factory):
+    """Test client whose auth routes run entirely on the async stack."""
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_async_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = get_current_user_async
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+    user_cache.clear()
+
+
+def test_get_async_database_url():
+    """Test async driver URLs derived from sync URLs."""
+    assert (
+        get_async_database_url("postgresql://user:pass@db:5432/app")
+        == "postgresql+asyncpg://user:pass@db:5432/app"
+    )
+    assert (
+        get_async_database_url("postgresql+psycopg2://user:pass@db/app")
+        == "postgresql+asyncpg://user:pass@db/app"
+    )
+    assert get_async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+    with pytest.raises(ValueError):
+        get_async_database_url("mysql://user:pass@db/app")
+
+
+def test_async_engine_only_when_configured():
+    """Test that a sync-only deployment never builds the async engine."""
+    code = (
+        "import json; import app.main; from app.core import database; from app.routes.internal import get_stats; "
+        "import asyncio; stats = asyncio.run(get_stats()); "
+        "print(json.dumps([database.async_engine is None, database.AsyncSessionLocal is None, "
+        "stats['db_pool']['async']]))"
+    )
+    env = dict(os.environ, DATABASE_URL="sqlite://", DATABASE_ASYNC="false", ASYNC_DATABASE_URL="")
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+
+    assert json.loads(output) == [True, True, None]
+
+
+def test_async_repository_create_and_get(async_session_factory):
+    """Test creating and fetching users through the async repository."""
+    async def scenario():
+        async with async_session_factory() as db:
+            repo = AsyncUserRepository(db)
+            user = await repo.create_user(email="async@example.com", google_id="g-1", first_name="Async")
+
+            assert user.id is not None
+            assert (await repo.get_user_by_id(user.id)).email == "async@example.com"
+            assert (await repo.get_user_by_email("async@example.com")).id == user.id
+            assert (await repo.get_user_by_google_id("g-1")).id == user.id
+            assert await repo.get_user_by_id(9999) is None
+
+    asyncio.run(scenario())
+
+
+def test_async_service_get_or_create_user(async_session_factory):
+    """Test that the async service creates then updates the same user."""
+    async def scenario():
+        async with async_session_factory() as db:
+            service = AsyncAuthService(db)
+            created = await service.get_or_create_user(
+                email="svc@example.com",
+                google_id="g-2",
+                first_name="Before",
+                last_name="User",
+                profile_picture=None,
+            )
+            updated = await service.get_or_create_user(
+                email="svc@example.com",
+                google_id="g-2",
+                first_name="After",
+                last_name="User",
+                profile_picture=None,
+            )
+
+            assert updated.id == created.id
+            assert (await service.get_user_by_id(created.id)).first_name == "After"
+
+    asyncio.run(scenario())
+    # Coroutine methods: not usable where a sync AuthService is expected
+    assert not issubclass(AsyncAuthService, AuthService)
+
+
+@patch('app.routes.auth.google_token_verifier.verify_async')
+def test_login_and_me_on_async_stack(mock_verify, async_client):
+    """Test /auth/google and /auth/me served from the async stack."""
+    mock_verify.return_value = {
+        "sub": "google_async_1",
+        "email": "asyncstack@example.com",
+        "given_name": "Async",
+        "family_name": "Stack",
+    }
+
+    auth_response = async_client.post("/auth/google", json={"token": "valid_google_token"})
+    assert auth_response.status_code == 200
+    access_token = auth_response.json()["access_token"]
+
+    response = async_client.get("/auth/me", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "asyncstack@example.com"
+
+
+def test_me_on_async_stack_with_unknown_user(async_client):
+    """Test that a valid token for a missing user returns 404."""
+    token = create_access_token(data={"sub": "4242", "email": "ghost@example.com"})
+    response = async_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 404
+
+
+def test_async_upsert_unchanged_claims_returns_same_user(async_session_factory):
+    """Test the async upsert for new and returning users."""
+    async def scenario():
+        async with async_session_factory() as db:
+            repo = AsyncUserRepository(db)
+            created = await repo.upsert_from_google(email="up@example.com", google_id="g-3", first_name="Up")
+            again = await repo.upsert_from_google(email="up@example.com", google_id="g-3", first_name="Up")
+            changed = await repo.upsert_from_google(email="up@example.com", google_id="g-3", first_name="Down")
+
+            assert again.id == created.id
+            assert changed.id == created.id
+            assert changed.first_name == "Down"
+
+    asyncio.run(scenario())
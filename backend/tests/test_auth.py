@@ -13,9 +13,11 @@ from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from pydantic.networks import validate_email
 from app.main import app
 from app.core.database import Base, get_db
 from app.core.security import create_access_token
+from app.core.user_cache import user_cache
 
 # Create test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -46,6 +48,7 @@ def cleanup_database():
     # Drop all tables and recreate
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    user_cache.clear()
 
 
 def test_root_endpoint():
@@ -102,7 +105,7 @@ def test_google_auth_with_empty_token():
     assert "detail" in data
 
 
-@patch('app.routes.auth.id_token.verify_oauth2_token')
+@patch('app.routes.auth.google_token_verifier.verify_async')
 def test_google_auth_with_valid_token_new_user(mock_verify):
     """Test /auth/google endpoint with valid token for new user."""
     # Mock Google token verification
@@ -127,7 +130,7 @@ def test_google_auth_with_valid_token_new_user(mock_verify):
     assert data["user"]["last_name"] == "User"
 
 
-@patch('app.routes.auth.id_token.verify_oauth2_token')
+@patch('app.routes.auth.google_token_verifier.verify_async')
 def test_google_auth_with_valid_token_existing_user(mock_verify):
     """Test /auth/google endpoint with valid token for existing user."""
     # Mock Google token verification
@@ -153,7 +156,7 @@ def test_google_auth_with_valid_token_existing_user(mock_verify):
     assert user_id_1 == user_id_2
 
 
-@patch('app.routes.auth.id_token.verify_oauth2_token')
+@patch('app.routes.auth.google_token_verifier.verify_async')
 def test_google_auth_with_invalid_google_token(mock_verify):
     """Test /auth/google endpoint with invalid Google token."""
     # Mock Google token verification to raise ValueError
@@ -167,7 +170,7 @@ def test_google_auth_with_invalid_google_token(mock_verify):
     assert "Invalid or expired Google token" in data["detail"]
 
 
-@patch('app.routes.auth.id_token.verify_oauth2_token')
+@patch('app.routes.auth.google_token_verifier.verify_async')
 def test_google_auth_without_email_in_token(mock_verify):
     """Test /auth/google endpoint when Google token doesn't contain email."""
     # Mock Google token verification without email
@@ -185,7 +188,7 @@ def test_google_auth_without_email_in_token(mock_verify):
     assert "Email not found" in data["detail"]
 
 
-@patch('app.routes.auth.id_token.verify_oauth2_token')
+@patch('app.routes.auth.google_token_verifier.verify_async')
 def test_get_me_with_valid_token(mock_verify):
     """Test /auth/me endpoint with valid token."""
     # First, create a user
@@ -215,6 +218,31 @@ def test_get_me_with_valid_token(mock_verify):
     assert data["last_name"] == "User"
 
 
+@patch('app.routes.auth.google_token_verifier.verify_async')
+def test_responses_are_validated_once(mock_verify):
+    """Test that stored users are validated when built, and not again by FastAPI."""
+    mock_verify.return_value = {"sub": "google_user_1000", "email": "once@example.com", "given_name": "Once"}
+
+    with patch("pydantic.networks.validate_email", wraps=validate_email) as email_check:
+        auth_response = client.post("/auth/google", json={"token": "valid_google_token"})
+        assert auth_response.status_code == 200
+        assert auth_response.json()["user"]["email"] == "once@example.com"
+        assert email_check.call_count == 1
+
+        response = client.get(
+            "/auth/me",
+            headers={"Authorization": f"Bearer {auth_response.json()['access_token']}"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == auth_response.json()["user"]
+        assert email_check.call_count == 2
+
+        response = client.post("/auth/refresh", json={"refresh_token": auth_response.json()["refresh_token"]})
+        assert response.status_code == 200
+        assert set(response.json()) == {"access_token", "token_type", "refresh_token"}
+
+
 def test_jwt_token_creation():
     """Test JWT token creation."""
     token_data = {"sub": "123", "email": "test@example.com"}
@@ -0,0 +1,39 @@
+"""
+Test cases for the benchmark suite's baseline comparison.
+"""
+
+import json
+
+from benchmarks import suite
+
+
+def result(min_us):
+    return {"median_us": min_us, "min_us": min_us, "number": 1, "repeat": 1}
+
+
+def test_compare_flags_slowdowns_past_threshold():
+    """Test that only benchmarks slower than the threshold regress."""
+    baseline = {"results": {"a": result(10.0), "b": result(10.0), "c": result(10.0)}}
+    current = {"results": {"a": result(12.0), "b": result(13.0), "c": result(5.0), "d": result(1.0)}}
+
+    rows, regressions = suite.compare(baseline, current, threshold=0.25)
+
+    assert regressions == ["b"]
+    assert [row[-1] for row in rows] == ["ok", "SLOWER", "faster", "new"]
+
+
+def test_save_and_compare(tmp_path, capsys):
+    """Test the CLI round trip, and that a regression fails the run."""
+    database_url = "sqlite:///" + str(tmp_path / "suite.db")
+    baseline = tmp_path / "baseline.json"
+    args = ["--database-url", database_url, "--users", "20", "--repeat", "2", "-k", "schemas"]
+
+    assert suite.main(args + ["--save", str(baseline)]) == 0
+    saved = json.loads(baseline.read_text())
+    assert list(saved["results"]) == ["schemas.UserResponse"]
+    assert saved["environment"]["database"] == "sqlite+pysqlite"
+
+    saved["results"]["schemas.UserResponse"]["min_us"] = 0.001
+    baseline.write_text(json.dumps(saved))
+    assert suite.main(args + ["--compare", str(baseline)]) == 1
+    assert "schemas.UserResponse" in capsys.readouterr().err
@@ -88,3 +88,70 @@ def test_google_oauth_settings():
     assert settings.GOOGLE_CLIENT_ID == "test_client_id"
     assert settings.GOOGLE_CLIENT_SECRET == "test_client_secret"
     assert settings.GOOGLE_REDIRECT_URI == "http://localhost:3000/auth/google/callback"
+
+
+def test_admin_emails_as_string():
+    """Test ADMIN_EMAILS parsing from a comma-separated string."""
+    settings = Settings(ADMIN_EMAILS="Admin@Example.com, ops@example.com,")
+    
+    assert settings.ADMIN_EMAILS == ["admin@example.com", "ops@example.com"]
+
+
+def test_jwt_verification_keys_from_string():
+    """Test JWT_VERIFICATION_KEYS parsing from a comma-separated string."""
+    settings = Settings(JWT_VERIFICATION_KEYS="old-secret, next-secret,")
+    
+    assert settings.JWT_VERIFICATION_KEYS == ["old-secret", "next-secret"]
+
+
+def test_default_pool_settings():
+    """Test connection pool defaults."""
+    settings = Settings()
+    
+    assert settings.DB_POOL_SIZE == 5
+    assert settings.DB_MAX_OVERFLOW == 10
+    assert settings.DB_POOL_PRE_PING is True
+
+
+def test_google_issuers_from_string():
+    """Test GOOGLE_ISSUERS parsing, as used to point the verifier at a fake issuer."""
+    settings = Settings(GOOGLE_ISSUERS="https://fake-google.invalid, ")
+    
+    assert settings.GOOGLE_ISSUERS == ["https://fake-google.invalid"]
+    assert Settings().GOOGLE_ISSUERS == ["accounts.google.com", "https://accounts.google.com"]
+
+
+def test_google_issuers_validation_in_production():
+    """Test that non-Google issuers are refused in production."""
+    from importlib import reload
+    import app.core.config as config_module
+    original = config_module.settings
+    os.environ.update(
+        ENVIRONMENT="production", SECRET_KEY="a-real-secret", GOOGLE_ISSUERS="https://fake-google.invalid"
+    )
+    
+    try:
+        with pytest.raises(ValueError, match="GOOGLE_ISSUERS"):
+            reload(config_module)
+    finally:
+        for name in ("ENVIRONMENT", "SECRET_KEY", "GOOGLE_ISSUERS"):
+            os.environ.pop(name, None)
+        config_module.settings = original
+
+
+def test_google_certs_url_validation_in_production():
+    """Test that certificates from anywhere but Google are refused in production."""
+    from importlib import reload
+    import app.core.config as config_module
+    original = config_module.settings
+    os.environ.update(
+        ENVIRONMENT="production", SECRET_KEY="a-real-secret", GOOGLE_CERTS_URL="http://127.0.0.1:9999/certs"
+    )
+    
+    try:
+        with pytest.raises(ValueError, match="GOOGLE_CERTS_URL"):
+            reload(config_module)
+    finally:
+        for name in ("ENVIRONMENT", "SECRET_KEY", "GOOGLE_CERTS_URL"):
+            os.environ.pop(name, None)
+        config_module.settings = original
@@ -0,0 +1,194 @@
+"""
+Test cases for the Google signing-certificate cache.
+
+These run against a local fake certificate server, so both the cache hit
+rate and the latency saved by the cache can be observed offline.
+"""
+
+import json
+import os
+import time
+
+import pytest
+from google.auth import exceptions
+
+from app.core.google_certs import MAX_CERTS_AGE, GoogleCertCache, parse_max_age
+from tests.fake_google import FakeCertServer
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def cert_server():
+    with FakeCertServer(max_age=600) as server:
+        yield server
+
+
+def test_parse_max_age():
+    """Test Cache-Control parsing."""
+    assert parse_max_age({"Cache-Control": "public, max-age=19800, must-revalidate"}, 60) == 19800
+    assert parse_max_age({"cache-control": "max-age=5"}, 60) == 5
+    assert parse_max_age({"Cache-Control": "no-store"}, 60) == 0
+    assert parse_max_age({}, 60) == 60
+
+
+def test_repeated_lookups_hit_cache(cert_server):
+    """Test that only the first lookup reaches the certificate server."""
+    cache = GoogleCertCache(cert_server.url, refresh_margin=0)
+
+    for _ in range(100):
+        certs = cache.get_certs()
+
+    assert certs == cert_server.certs
+    assert cert_server.request_count == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 99
+    assert stats["hit_rate"] == pytest.approx(0.99)
+
+
+def test_cache_hit_skips_network_latency():
+    """Test that cached lookups avoid the latency of the certificate server."""
+    with FakeCertServer(latency=0.05) as server:
+        cache = GoogleCertCache(server.url, refresh_margin=0)
+
+        start = time.perf_counter()
+        cache.get_certs()
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            cache.get_certs()
+        warm = (time.perf_counter() - start) / 1000
+
+    assert cold >= 0.05
+    assert warm < cold / 100
+
+
+def test_refetches_after_max_age(cert_server):
+    """Test that the certificate set is refetched once max-age elapses."""
+    clock = FakeClock()
+    cache = GoogleCertCache(cert_server.url, refresh_margin=0, clock=clock)
+
+    cache.get_certs()
+    clock.now += 599
+    cache.get_certs()
+    assert cert_server.request_count == 1
+
+    clock.now += 2
+    cache.get_certs()
+    assert cert_server.request_count == 2
+
+
+def test_background_refresh_before_expiry(cert_server):
+    """Test that a lookup close to expiry refreshes without blocking."""
+    clock = FakeClock()
+    cache = GoogleCertCache(cert_server.url, refresh_margin=60, clock=clock)
+    cache.get_certs()
+
+    cert_server.certs = {"rotated-kid": "rotated-certificate"}
+    clock.now += 570
+
+    # Still served from the cache while the refresh runs in the background
+    assert "fake-kid" in cache.get_certs()
+    cache._refresh_thread.join(timeout=5)
+
+    assert cert_server.request_count == 2
+    assert "rotated-kid" in cache.get_certs()
+    assert cache.stats()["misses"] == 1
+
+
+def test_persisted_certs_warm_new_worker(cert_server, tmp_path):
+    """Test that a new cache instance starts from the persisted file."""
+    cache_file = str(tmp_path / "certs.json")
+    first = GoogleCertCache(cert_server.url, cache_file=cache_file, refresh_margin=0)
+    first.get_certs()
+    assert cert_server.request_count == 1
+
+    second = GoogleCertCache(cert_server.url, cache_file=cache_file, refresh_margin=0)
+    assert second.get_certs() == cert_server.certs
+    assert cert_server.request_count == 1
+    assert second.stats()["misses"] == 0
+
+
+def test_untrusted_cache_file_is_ignored(cert_server, tmp_path):
+    """Test that a cache file others could have written is not loaded."""
+    cache_file = tmp_path / "certs.json"
+    GoogleCertCache(cert_server.url, cache_file=str(cache_file), refresh_margin=0).get_certs()
+    assert os.stat(cache_file).st_mode & 0o077 == 0
+
+    os.chmod(cache_file, 0o666)
+    planted = GoogleCertCache(cert_server.url, cache_file=str(cache_file), refresh_margin=0)
+    assert planted.stats()["expires_in"] == 0.0
+
+    os.chmod(cache_file, 0o600)
+    link = tmp_path / "link.json"
+    link.symlink_to(cache_file)
+    linked = GoogleCertCache(cert_server.url, cache_file=str(link), refresh_margin=0)
+    assert linked.stats()["expires_in"] == 0.0
+
+
+def test_cache_file_expiry_is_capped(cert_server, tmp_path):
+    """Test that a far-future expiry in the file is cut to fetch time plus MAX_CERTS_AGE."""
+    clock = FakeClock()
+    cache_file = tmp_path / "certs.json"
+    snapshot = {
+        "certs_url": cert_server.url,
+        "fetched_at": clock.now - 60,
+        "expires_at": clock.now + 10 * 365 * 86400,
+        "certs": {"planted-kid": "planted-certificate"},
+    }
+    cache_file.write_text(json.dumps(snapshot))
+    os.chmod(cache_file, 0o600)
+
+    cache = GoogleCertCache(cert_server.url, cache_file=str(cache_file), refresh_margin=0, clock=clock)
+    assert cache.stats()["expires_in"] == MAX_CERTS_AGE - 60
+
+    # Snapshots without a fetch time (or from the future) are not trusted
+    for fetched_at in (None, clock.now + 60):
+        cache_file.write_text(json.dumps(dict(snapshot, fetched_at=fetched_at)))
+        cache = GoogleCertCache(cert_server.url, cache_file=str(cache_file), refresh_margin=0, clock=clock)
+        assert cache.stats()["expires_in"] == 0.0
+
+
+def test_serves_stale_certs_when_refresh_fails():
+    """Test that the last good set is used when a refresh fails."""
+    clock = FakeClock()
+    with FakeCertServer(max_age=10) as server:
+        cache = GoogleCertCache(server.url, refresh_margin=0, timeout=1, clock=clock)
+        certs = cache.get_certs()
+        server.status = 503
+
+        clock.now += 11
+        assert cache.get_certs() == certs
+        assert cache.stats()["fetch_errors"] == 1
+
+
+def test_fetch_failure_without_cached_certs():
+    """Test that a cold cache surfaces fetch failures."""
+    server = FakeCertServer().start()
+    url = server.url
+    server.stop()
+
+    cache = GoogleCertCache(url, timeout=1)
+    with pytest.raises(exceptions.TransportError):
+        cache.get_certs()
+
+
+def test_transport_serves_certs_from_cache(cert_server):
+    """Test the google-auth transport adapter used by the login route."""
+    cache = GoogleCertCache(cert_server.url, refresh_margin=0)
+
+    for _ in range(10):
+        response = cache.request(cert_server.url, method="GET")
+        assert response.status == 200
+
+    assert cert_server.request_count == 1
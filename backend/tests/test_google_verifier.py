@@ -0,0 +1,176 @@
+"""
+Test cases for Google ID token verification.
+
+Tokens are minted by a local fake issuer whose certificate is served by the
+fake certificate server, so the full RS256 path runs offline.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core.google_certs import GoogleCertCache
+from app.core.google_verifier import GoogleTokenVerifier
+from tests.fake_google import FakeCertServer, FakeGoogleIssuer
+
+
+@pytest.fixture(scope="module")
+def issuer():
+    return FakeGoogleIssuer(audience="test-client-id")
+
+
+@pytest.fixture
+def verifier(issuer):
+    with FakeCertServer(certs=issuer.certs) as server:
+        cache = GoogleCertCache(server.url, refresh_margin=0)
+        yield GoogleTokenVerifier(cache, audience="test-client-id")
+
+
+def test_verify_valid_token(verifier, issuer):
+    """Test that a correctly signed token is accepted."""
+    claims = verifier.verify(issuer.mint(email="valid@example.com", given_name="Valid"))
+
+    assert claims["email"] == "valid@example.com"
+    assert claims["given_name"] == "Valid"
+
+
+def test_verify_async_valid_token(verifier, issuer):
+    """Test the async verification path."""
+    claims = asyncio.run(verifier.verify_async(issuer.mint(email="async@example.com")))
+
+    assert claims["email"] == "async@example.com"
+
+
+def test_verify_async_concurrent_logins_share_one_fetch(issuer):
+    """Test that concurrent cold-cache verifications fetch certificates once."""
+    with FakeCertServer(certs=issuer.certs, latency=0.05) as server:
+        cache = GoogleCertCache(server.url, refresh_margin=0)
+        verifier = GoogleTokenVerifier(cache, audience="test-client-id")
+        tokens = [issuer.mint(email="user{}@example.com".format(i)) for i in range(50)]
+
+        async def verify_all():
+            try:
+                return await asyncio.gather(*(verifier.verify_async(t) for t in tokens))
+            finally:
+                await cache.aclose()
+
+        results = asyncio.run(verify_all())
+
+    assert len(results) == 50
+    assert server.request_count == 1
+
+
+def test_verify_rejects_wrong_audience(verifier, issuer):
+    """Test that tokens for another client are rejected."""
+    with pytest.raises(ValueError, match="audience"):
+        verifier.verify(issuer.mint(aud="someone-else"))
+
+
+def test_verify_rejects_wrong_issuer(verifier, issuer):
+    """Test that tokens from an unexpected issuer are rejected."""
+    with pytest.raises(ValueError, match="issuer"):
+        verifier.verify(issuer.mint(iss="https://evil.example.com"))
+
+
+def test_verify_accepts_configured_issuer():
+    """Test that GOOGLE_ISSUERS-style issuers let a local fake issuer sign in."""
+    fake = FakeGoogleIssuer(audience="test-client-id", issuer="https://fake-google.invalid")
+    with FakeCertServer(certs=fake.certs) as server:
+        cache = GoogleCertCache(server.url, refresh_margin=0)
+        verifier = GoogleTokenVerifier(cache, audience="test-client-id", issuers=["https://fake-google.invalid"])
+
+        assert verifier.verify(fake.mint(email="load@example.com"))["email"] == "load@example.com"
+        with pytest.raises(ValueError, match="Wrong issuer"):
+            verifier.verify(fake.mint(email="load@example.com", iss="https://accounts.google.com"))
+
+
+def test_verify_rejects_expired_token(verifier, issuer):
+    """Test that expired tokens are rejected."""
+    now = int(time.time())
+    with pytest.raises(ValueError, match="expired"):
+        verifier.verify(issuer.mint(iat=now - 7200, exp=now - 3600))
+
+
+def test_verify_rejects_tampered_token(verifier, issuer):
+    """Test that a modified payload fails the signature check."""
+    header, _, signature = issuer.mint(email="a@example.com").split(".")
+    _, payload, _ = issuer.mint(email="b@example.com").split(".")
+
+    with pytest.raises(ValueError, match="signature"):
+        verifier.verify(".".join([header, payload, signature]))
+
+
+def test_verify_rejects_unknown_key(verifier):
+    """Test that tokens signed by an unknown key are rejected."""
+    other_issuer = FakeGoogleIssuer(audience="test-client-id")
+
+    with pytest.raises(ValueError, match="not found"):
+        verifier.verify(other_issuer.mint())
+
+
+def test_verify_rejects_garbage(verifier):
+    """Test that malformed tokens raise ValueError."""
+    with pytest.raises(ValueError):
+        verifier.verify("not-a-jwt")
+
+
+def test_resubmitted_token_skips_verification(verifier, issuer):
+    """Test that a repeated token is served from the result cache."""
+    token = issuer.mint(email="repeat@example.com")
+    first = verifier.verify(token)
+
+    with patch.object(verifier, "_verify_with", side_effect=AssertionError("not cached")):
+        for _ in range(5):
+            assert verifier.verify(token) == first
+            assert asyncio.run(verifier.verify_async(token)) == first
+
+    stats = verifier.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 10
+
+
+def test_cached_claims_are_copies(verifier, issuer):
+    """Test that callers cannot mutate cached claims."""
+    token = issuer.mint(email="copy@example.com")
+    verifier.verify(token)["email"] = "mutated@example.com"
+
+    assert verifier.verify(token)["email"] == "copy@example.com"
+
+
+def test_rejected_token_is_negatively_cached(verifier):
+    """Test that a replayed garbage token is rejected without re-verification."""
+    with pytest.raises(ValueError):
+        verifier.verify("garbage.token.value")
+
+    with patch.object(verifier, "_verify_with", side_effect=AssertionError("not cached")):
+        with pytest.raises(ValueError, match="Malformed"):
+            verifier.verify("garbage.token.value")
+
+    assert verifier.stats()["negative_hits"] == 1
+
+
+def test_negative_entries_expire(issuer):
+    """Test that rejections are only remembered for negative_ttl seconds."""
+    with FakeCertServer(certs=issuer.certs) as server:
+        cache = GoogleCertCache(server.url, refresh_margin=0)
+        verifier = GoogleTokenVerifier(cache, audience="test-client-id", negative_ttl=0)
+
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                verifier.verify("garbage.token.value")
+
+    assert verifier.stats()["negative_hits"] == 0
+    assert verifier.stats()["misses"] == 3
+
+
+def test_result_cache_is_bounded(verifier, issuer):
+    """Test that the result cache evicts beyond its maximum size."""
+    verifier.results.maxsize = 5
+    for i in range(10):
+        verifier.verify(issuer.mint(email="bounded{}@example.com".format(i)))
+
+    stats = verifier.stats()
+    assert stats["size"] == 5
+    assert stats["evictions"] == 5
@@ -0,0 +1,225 @@
+"""
+Test cases for the JWT signing backends.
+"""
+
+import base64
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.core import security
+from app.core.config import settings
+from app.core.jwt_backends import InvalidTokenError, JWTBackend, build_backend
+from app.main import app
+
+
+def pem(private_key):
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def public_pem(private_key):
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+EC_KEY = ec.generate_private_key(ec.SECP256R1())
+ED_KEY = ed25519.Ed25519PrivateKey.generate()
+KEYS = {
+    "HS256": {"secret": "test-secret"},
+    "ES256": {"private_key": pem(EC_KEY)},
+    "EdDSA": {"private_key": pem(ED_KEY)},
+}
+
+
+def claims(lifetime=60):
+    return {"sub": "1", "email": "jwt@example.com", "exp": int(time.time()) + lifetime}
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "ES256", "EdDSA"])
+def test_native_round_trip(algorithm):
+    """Test that the native backend verifies the tokens it signs."""
+    backend = build_backend("native", algorithm, **KEYS[algorithm])
+
+    payload = backend.decode(backend.encode(claims()))
+
+    assert payload["sub"] == "1"
+    assert payload["email"] == "jwt@example.com"
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "ES256"])
+def test_backends_are_interchangeable(algorithm):
+    """Test that tokens signed by one backend verify with the other."""
+    native = build_backend("native", algorithm, **KEYS[algorithm])
+    jose_backend = build_backend("jose", algorithm, **KEYS[algorithm])
+
+    assert jose_backend.decode(native.encode(claims()))["sub"] == "1"
+    assert native.decode(jose_backend.encode(claims()))["sub"] == "1"
+
+
+def test_jose_rejects_eddsa():
+    """Test that python-jose is not offered for an algorithm it lacks."""
+    with pytest.raises(ValueError):
+        build_backend("jose", "EdDSA", **KEYS["EdDSA"])
+
+
+@pytest.mark.parametrize("backend_name", ["native", "jose"])
+def test_expired_token_rejected(backend_name):
+    """Test that tokens past their exp are rejected."""
+    backend = build_backend(backend_name, "HS256", secret="test-secret")
+
+    with pytest.raises(InvalidTokenError):
+        backend.decode(backend.encode(claims(lifetime=-10)))
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "ES256", "EdDSA"])
+def test_tampered_token_rejected(algorithm):
+    """Test that a modified payload fails signature verification."""
+    backend = build_backend("native", algorithm, **KEYS[algorithm])
+    header, payload, signature = backend.encode(claims()).split(".")
+    forged = build_backend("native", "HS256", secret="x").encode({**claims(), "sub": "2"}).split(".")[1]
+
+    with pytest.raises(InvalidTokenError):
+        backend.decode(f"{header}.{forged}.{signature}")
+    with pytest.raises(InvalidTokenError):
+        backend.decode(f"{header}.{payload}")
+
+
+def test_algorithm_confusion_rejected():
+    """Test that the token header cannot choose a weaker algorithm."""
+    es256 = build_backend("native", "ES256", public_key=public_pem(EC_KEY))
+    # HMAC keyed with the public key, the classic confusion attack
+    hs256 = build_backend("native", "HS256", secret=public_pem(EC_KEY))
+    forged = hs256.encode(claims())
+    payload = forged.split(".")[1]
+    none_header = base64.urlsafe_b64encode(b'{"alg":"none"}').rstrip(b"=").decode()
+    unsigned = f"{none_header}.{payload}."
+
+    with pytest.raises(InvalidTokenError):
+        es256.decode(forged)
+    with pytest.raises(InvalidTokenError):
+        es256.decode(unsigned)
+
+
+def test_verify_only_backend():
+    """Test that a public key alone verifies but cannot sign."""
+    signer = build_backend("native", "EdDSA", **KEYS["EdDSA"])
+    verifier = build_backend("native", "EdDSA", public_key=public_pem(ED_KEY))
+
+    assert verifier.decode(signer.encode(claims()))["sub"] == "1"
+    assert not verifier.can_sign
+    with pytest.raises(ValueError):
+        verifier.encode(claims())
+
+
+def test_mismatched_key_type_rejected():
+    """Test that a key for another algorithm is refused at startup."""
+    with pytest.raises(ValueError):
+        build_backend("native", "ES256", private_key=pem(ED_KEY))
+    with pytest.raises(ValueError):
+        build_backend("native", "ES384", private_key=pem(EC_KEY))
+
+
+def test_incomplete_backend_cannot_be_built():
+    """Test that a backend missing decode fails when built, not on the first token."""
+    class SignOnly(JWTBackend):
+        name = "sign-only"
+
+        def encode(self, claims, headers=None):
+            return ""
+
+    with pytest.raises(TypeError):
+        SignOnly("HS256", b"secret", b"secret")
+
+
+def test_settings_select_backend(monkeypatch):
+    """Test that create_access_token and verify_token follow Settings."""
+    monkeypatch.setattr(settings, "ALGORITHM", "EdDSA")
+    monkeypatch.setattr(settings, "JWT_PRIVATE_KEY", pem(ED_KEY).replace("\n", "\\n"))
+
+    token = security.create_access_token({"sub": "42"})
+
+    assert jwt.get_unverified_header(token)["alg"] == "EdDSA"
+    assert security.verify_token(token)["sub"] == "42"
+    assert security.get_jwt_backend() is security.get_jwt_backend()
+
+
+@pytest.mark.parametrize("backend_name", ["native", "jose"])
+def test_rotation_keeps_tokens_in_flight_valid(backend_name):
+    """Test that tokens signed with the previous key verify after a rotation."""
+    new_key = ec.generate_private_key(ec.SECP256R1())
+    before = build_backend(backend_name, "ES256", private_key=pem(EC_KEY))
+    after = build_backend(
+        backend_name, "ES256", private_key=pem(new_key), verification_keys=[public_pem(EC_KEY)]
+    )
+    in_flight = before.encode(claims())
+    issued = after.encode(claims())
+
+    assert jwt.get_unverified_header(in_flight)["kid"] == before.kid
+    assert jwt.get_unverified_header(issued)["kid"] == after.kid != before.kid
+    assert after.decode(in_flight)["sub"] == "1"
+    assert after.decode(issued)["sub"] == "1"
+    with pytest.raises(InvalidTokenError):
+        before.decode(issued)
+
+
+def test_token_without_kid_uses_current_key():
+    """Test that tokens issued before kids were stamped still verify."""
+    backend = build_backend("native", "HS256", secret="test-secret")
+    legacy = jwt.encode(claims(), "test-secret", algorithm="HS256")
+
+    assert "kid" not in jwt.get_unverified_header(legacy)
+    assert backend.decode(legacy)["sub"] == "1"
+
+
+def test_jwks_lists_public_keys_only():
+    """Test the JWK Set contents for asymmetric and shared-secret keys."""
+    upcoming = ed25519.Ed25519PrivateKey.generate()
+    rotating = build_backend("native", "EdDSA", private_key=pem(ED_KEY), verification_keys=[public_pem(upcoming)])
+    hmac_backend = build_backend("native", "HS256", secret="test-secret")
+
+    jwks = rotating.jwks["keys"]
+    assert [key["kid"] for key in jwks] == list(rotating.verifying_keys)
+    assert jwks[0]["kid"] == rotating.kid
+    assert all(key["kty"] == "OKP" and "d" not in key for key in jwks)
+    assert hmac_backend.jwks == {"keys": []}
+
+
+@pytest.fixture
+def es256_settings(monkeypatch):
+    retiring = ec.generate_private_key(ec.SECP256R1())
+    monkeypatch.setattr(settings, "ALGORITHM", "ES256")
+    monkeypatch.setattr(settings, "JWT_PRIVATE_KEY", pem(EC_KEY))
+    monkeypatch.setattr(settings, "JWT_VERIFICATION_KEYS", [public_pem(retiring)])
+    return retiring
+
+
+def test_jwks_endpoint_is_cacheable(es256_settings):
+    """Test that /.well-known/jwks.json carries caching headers and honours ETags."""
+    client = TestClient(app)
+
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}"
+    assert len(response.json()["keys"]) == 2
+
+    etag = response.headers["ETag"]
+    cached = client.get("/.well-known/jwks.json", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+
+def test_downstream_verifies_with_jwks(es256_settings):
+    """Test that a published JWK Set is enough to verify our tokens."""
+    token = security.create_access_token({"sub": "7"})
+    jwks = TestClient(app).get("/.well-known/jwks.json").json()
+
+    kid = jwt.get_unverified_header(token)["kid"]
+    key = next(key for key in jwks["keys"] if key["kid"] == kid)
+    assert jwt.decode(token, key, algorithms=["ES256"])["sub"] == "7"
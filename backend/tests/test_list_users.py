@@ -0,0 +1,151 @@
+"""
+Test cases for keyset-paginated user listing.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.core.dependencies import get_current_user
+from app.main import app
+from app.models.user import User
+from app.repositories.user_repository import (
+    AsyncUserRepository,
+    InvalidCursorError,
+    UserRepository,
+    _list_statement,
+)
+
+BASE = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def session_factory(session_factory):
+    with session_factory() as db:
+        # Ties on created_at, written by SQLAlchemy
+        db.execute(insert(User), [
+            {"email": f"user{i}@example.com", "created_at": BASE + timedelta(days=i // 3)}
+            for i in range(12)
+        ])
+        # Ties written by the server default, in SQLite's other timestamp format
+        db.execute(insert(User), [{"email": f"now{i}@example.com"} for i in range(4)])
+        db.commit()
+    return session_factory
+
+
+def walk(session_factory, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        with session_factory() as db:
+            users, cursor = UserRepository(db).list_users(limit, cursor, **filters)
+        pages.append([user.id for user in users])
+        if cursor is None:
+            return pages
+
+
+def expected_order(session_factory):
+    with session_factory() as db:
+        users = db.query(User).all()
+    return [user.id for user in sorted(users, key=lambda user: (user.created_at, user.id), reverse=True)]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 5, 16, 50])
+def test_pages_cover_every_user_once_in_order(session_factory, limit):
+    """Test that walking the cursors returns each user exactly once, newest first."""
+    pages = walk(session_factory, limit)
+
+    assert [user_id for page in pages for user_id in page] == expected_order(session_factory)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert pages[-1]
+
+
+def test_created_range_filters(session_factory):
+    """Test the creation time filters, across pages."""
+    pages = walk(session_factory, 2, created_after=BASE + timedelta(days=1), created_before=BASE + timedelta(days=3))
+
+    ids = [user_id for page in pages for user_id in page]
+    assert ids == [9, 8, 7, 6, 5, 4]
+
+
+def test_timezone_aware_filters(session_factory):
+    """Test that aware bounds are compared in UTC."""
+    bound = (BASE + timedelta(days=3)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=2)))
+    with session_factory() as db:
+        users, _ = UserRepository(db).list_users(50, created_after=bound, created_before=BASE + timedelta(days=4))
+
+    assert [user.id for user in users] == [12, 11, 10]
+
+
+def test_invalid_cursor(session_factory):
+    """Test that malformed cursors are rejected."""
+    with session_factory() as db:
+        for cursor in ("not-a-cursor", "W10", "WyJ4IiwieSJd"):
+            with pytest.raises(InvalidCursorError):
+                UserRepository(db).list_users(10, cursor)
+
+
+def test_page_query_seeks_on_index(session_factory):
+    """Test that deep pages seek on (created_at, id) instead of sorting."""
+    with session_factory() as db:
+        _, cursor = UserRepository(db).list_users(3)
+        stmt = _list_statement("sqlite", 3, cursor, None, None)
+        compiled = stmt.compile(bind=db.get_bind())
+        plan = db.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(compiled), tuple(compiled.params[name] for name in compiled.positiontup)
+        ).all()
+
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_users_created_at_id" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_async_list_users():
+    """Test the AsyncSession variant of the listing."""
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with factory() as db:
+            await db.execute(insert(User), [
+                {"email": f"a{i}@example.com", "created_at": BASE + timedelta(hours=i)} for i in range(5)
+            ])
+            await db.commit()
+            repo = AsyncUserRepository(db)
+            first, cursor = await repo.list_users(3)
+            second, last = await repo.list_users(3, cursor)
+        await engine.dispose()
+        return [user.id for user in first + second], last
+
+    ids, last = asyncio.run(run())
+    assert ids == [5, 4, 3, 2, 1]
+    assert last is None
+
+
+def test_list_users_endpoint(admin_client, session_factory):
+    """Test GET /users pagination over HTTP."""
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 5} if cursor is None else {"limit": 5, "cursor": cursor}
+        response = admin_client.get("/users", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        ids += [user["id"] for user in body["users"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert ids == expected_order(session_factory)
+
+
+def test_list_users_endpoint_errors(admin_client):
+    """Test input validation and admin gating."""
+    assert admin_client.get("/users", params={"cursor": "garbage"}).status_code == 400
+    assert admin_client.get("/users", params={"limit": 0}).status_code == 422
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=2, email="someone@example.com")
+    assert admin_client.get("/users").status_code == 403
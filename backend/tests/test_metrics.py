@@ -0,0 +1,125 @@
+"""
+Test cases for the Prometheus metrics.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import (
+    AUTH_STAGE_DURATION,
+    DB_QUERY_DURATION,
+    REQUEST_DURATION,
+    Histogram,
+    MetricsMiddleware,
+    instrument_queries,
+    render_metrics,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the text exposition of a labelled histogram."""
+    histogram = Histogram("demo_seconds", "Demo.", ("path",), (0.1, 1.0))
+    series = histogram.labels('a"b')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        series.observe(value)
+
+    lines = list(histogram.render())
+
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert 'demo_seconds_bucket{path="a\\"b",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{path="a\\"b",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{path="a\\"b",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{path="a\\"b"} 3.65' in lines
+    assert 'demo_seconds_count{path="a\\"b"} 4' in lines
+
+
+def test_histogram_rejects_wrong_label_count():
+    """Test that a series needs a value for every label."""
+    histogram = Histogram("demo_seconds", "Demo.", ("a", "b"), (1.0,))
+    with pytest.raises(ValueError):
+        histogram.labels("only-one")
+
+
+def test_middleware_labels_requests_by_route_template():
+    """Test that raw paths are folded into their route template."""
+    demo = FastAPI()
+    demo.add_middleware(MetricsMiddleware)
+
+    @demo.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    template = REQUEST_DURATION.labels("GET", "/items/{item_id}", "200")
+    unmatched = REQUEST_DURATION.labels("GET", "unmatched", "404")
+    before = template.count, unmatched.count
+
+    client = TestClient(demo)
+    for item_id in range(3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/nowhere").status_code == 404
+
+    assert template.count == before[0] + 3
+    assert unmatched.count == before[1] + 1
+
+
+def test_middleware_folds_unknown_methods():
+    """Test that arbitrary request methods share one "other" label."""
+    demo = FastAPI()
+    demo.add_middleware(MetricsMiddleware)
+    other = REQUEST_DURATION.labels("other", "unmatched", "404")
+    before = other.count
+
+    client = TestClient(demo)
+    for method in ("PROPFIND", "X-RANDOM-1", "X-RANDOM-2"):
+        assert client.request(method, "/nowhere").status_code == 404
+
+    assert other.count == before + 3
+    assert 'method="X-RANDOM-1"' not in render_metrics()
+
+
+def test_query_durations_by_operation():
+    """Test that cursor events record statement durations."""
+    engine = create_engine("sqlite://")
+    instrument_queries(engine, "test")
+    selects = DB_QUERY_DURATION.labels("test", "SELECT")
+    other = DB_QUERY_DURATION.labels("test", "OTHER")
+    before = selects.count, other.count
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("  select 2"))
+
+    assert selects.count == before[0] + 2
+    assert other.count == before[1] + 1
+    engine.dispose()
+
+
+@patch("app.routes.auth.google_token_verifier.verify_async")
+def test_metrics_endpoint_reports_login_stages(mock_verify, client):
+    """Test that a sign-in shows up in every stage and in /metrics."""
+    mock_verify.return_value = {"sub": "metrics-1", "email": "metrics@example.com", "given_name": "M"}
+    stages = ("verify_google_token", "user_upsert", "token_issue", "serialize")
+    before = {stage: AUTH_STAGE_DURATION.labels("google_auth", stage).count for stage in stages}
+
+    login = client.post("/auth/google", json={"token": "valid_google_token"})
+    me = client.get("/auth/me", headers={"Authorization": "Bearer " + login.json()["access_token"]})
+    response = client.get("/metrics")
+
+    assert login.status_code == 200
+    assert login.json()["user"]["email"] == "metrics@example.com"
+    assert me.status_code == 200
+    for stage in stages:
+        assert AUTH_STAGE_DURATION.labels("google_auth", stage).count == before[stage] + 1
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'auth_stage_duration_seconds_count{handler="google_auth",stage="user_upsert"}' in body
+    assert 'auth_stage_duration_seconds_count{handler="get_current_user",stage="user_load"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",route="/auth/google",status="200"}' in body
+    assert "# TYPE db_query_duration_seconds histogram" in body
@@ -0,0 +1,160 @@
+"""
+Test cases for connection pool configuration and instrumentation.
+"""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import settings
+from app.core.database import get_pool_limits, get_pool_options
+from app.core.dependencies import get_current_user
+from app.core.pool_stats import InstrumentedQueuePool, instrument_engine
+from app.main import app
+from app.models.user import User
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.2,
+    )
+    stats = instrument_engine(engine)
+    yield engine, stats
+    engine.dispose()
+
+
+@pytest.fixture
+def as_user():
+    """Authenticate requests as a given email without touching the database."""
+    def login(email):
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, email=email)
+        return TestClient(app)
+
+    yield login
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def test_pool_options_follow_settings(monkeypatch):
+    """Test that pool arguments come from Settings."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_USE_LIFO", False)
+
+    options = get_pool_options("postgresql://user:pass@db/app")
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_use_lifo"] is False
+    assert options["pool_pre_ping"] is True
+
+
+def test_pool_options_share_connection_budget(monkeypatch):
+    """Test that DB_MAX_CONNECTIONS is split across the workers."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 40)
+    monkeypatch.setattr(settings, "WEB_WORKERS", 4)
+
+    options = get_pool_options("postgresql://user:pass@db/app")
+    assert (options["pool_size"], options["max_overflow"]) == (5, 5)
+
+    assert get_pool_limits(16) == (2, 0)
+    assert get_pool_limits(64) == (1, 0)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 0)
+    assert get_pool_limits(16) == (5, 10)
+
+
+def test_pool_options_skip_sqlite():
+    """Test that SQLite keeps SQLAlchemy's default pool."""
+    assert get_pool_options("sqlite:///./test.db") == {}
+
+
+def test_checkouts_are_counted(pooled_engine):
+    """Test checkout, checkin and wait recording."""
+    engine, stats = pooled_engine
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 3
+    assert snapshot["checkins"] == 3
+    assert snapshot["connects"] == 1
+    assert snapshot["wait"]["count"] == 3
+    assert snapshot["in_use"] == 0
+    assert snapshot["size"] == 1
+
+
+def test_overflow_and_timeouts_are_visible(pooled_engine):
+    """Test that pool exhaustion shows up as overflow, peak usage and timeouts."""
+    engine, stats = pooled_engine
+    first = engine.connect()
+    second = engine.connect()
+
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["in_use"] == 2
+    assert snapshot["overflow"] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    first.close()
+    second.close()
+    snapshot = stats.snapshot(engine.pool)
+    assert snapshot["timeouts"] == 1
+    assert snapshot["peak_in_use"] == 2
+    assert snapshot["wait"]["max_seconds"] >= 0.2
+
+
+def test_waiting_checkout_is_timed(pooled_engine):
+    """Test that time spent queueing for a busy pool is measured."""
+    engine, stats = pooled_engine
+    first = engine.connect()
+    second = engine.connect()
+    threading.Timer(0.05, first.close).start()
+
+    with engine.connect():
+        pass
+    second.close()
+
+    assert stats.snapshot(engine.pool)["wait"]["max_seconds"] >= 0.04
+
+
+def test_stats_survive_pool_recreation(pooled_engine):
+    """Test that dispose() keeps recording into the same stats object."""
+    engine, stats = pooled_engine
+    engine.dispose()
+    with engine.connect():
+        pass
+
+    assert engine.pool.stats is stats
+    assert stats.snapshot(engine.pool)["wait"]["count"] == 1
+
+
+def test_internal_stats_requires_admin(as_user, monkeypatch):
+    """Test that /internal/stats is restricted to admins."""
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+
+    response = as_user("someone@example.com").get("/internal/stats")
+    assert response.status_code == 403
+
+
+def test_internal_stats_for_admin(as_user, monkeypatch):
+    """Test that admins can read pool and cache statistics."""
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+
+    response = as_user("Admin@Example.com").get("/internal/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["db_pool"]) == {"sync", "async"}
+    assert "checkouts" in data["db_pool"]["sync"]
+    assert "hit_rate" in data["google_certs"]
+    assert "negative_hits" in data["google_id_tokens"]
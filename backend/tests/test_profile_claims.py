@@ -0,0 +1,110 @@
+"""
+Test cases for the stateless /auth/me mode (JWT_PROFILE_CLAIMS).
+"""
+
+from dataclasses import replace
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.dependencies import get_current_user, get_token_user
+from app.core.security import create_access_token, profile_claims, user_from_profile_claims, verify_token
+from app.core.user_cache import CachedUser, user_cache
+from app.main import app
+from app.services.auth_service import AuthService
+
+USER = CachedUser(
+    id=7,
+    email="fat@example.com",
+    first_name="Fat",
+    last_name="Token",
+    profile_picture="https://example.com/fat.jpg",
+    google_id="google-fat",
+    created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    updated_at=None,
+    profile_version=3,
+)
+
+
+def fat_token(user=USER):
+    return create_access_token(data={"sub": str(user.id), "email": user.email, **profile_claims(user)})
+
+
+@pytest.fixture
+def stateless_client():
+    """Client whose /auth/me is served from token claims and has no database."""
+    def no_database():
+        raise AssertionError("database session requested")
+
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_current_user] = get_token_user
+    app.dependency_overrides[get_db] = no_database
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+    user_cache.clear()
+
+
+def test_profile_claims_round_trip():
+    """Test that profile claims rebuild the same user snapshot."""
+    payload = verify_token(fat_token())
+
+    assert payload["pv"] == 3
+    assert user_from_profile_claims(payload) == USER
+
+
+def test_thin_payload_has_no_profile():
+    """Test that tokens without profile claims are not accepted as profiles."""
+    assert user_from_profile_claims({"sub": "7", "email": "fat@example.com"}) is None
+    assert user_from_profile_claims({"sub": "7", "email": "x@example.com", "profile": {"v": 999}}) is None
+
+
+def test_authenticate_user_embeds_profile_when_enabled(monkeypatch):
+    """Test that the opt-in setting controls the claim set."""
+    service = AuthService(MagicMock())
+
+    thin = verify_token(service.authenticate_user(USER).access_token)
+    assert "profile" not in thin
+
+    monkeypatch.setattr(settings, "JWT_PROFILE_CLAIMS", True)
+    fat = verify_token(service.authenticate_user(USER).access_token)
+    assert fat["profile"]["first_name"] == "Fat"
+    assert fat["pv"] == 3
+
+
+def test_me_served_from_token_without_database(stateless_client):
+    """Test /auth/me built entirely from the verified payload."""
+    response = stateless_client.get("/auth/me", headers={"Authorization": f"Bearer {fat_token()}"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == 7
+    assert data["email"] == "fat@example.com"
+    assert data["google_id"] == "google-fat"
+    assert data["created_at"].startswith("2025-01-01")
+
+
+def test_me_rejects_thin_token_in_stateless_mode(stateless_client):
+    """Test that tokens issued without profile claims must be re-issued."""
+    token = create_access_token(data={"sub": "7", "email": "fat@example.com"})
+    response = stateless_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+
+
+def test_me_rejects_outdated_profile_version(stateless_client):
+    """Test that a worker that has seen a newer profile rejects older tokens (best-effort)."""
+    headers = {"Authorization": f"Bearer {fat_token()}"}
+    # Nothing newer known to this worker: the token's own profile is served
+    user_cache.clear()
+    assert stateless_client.get("/auth/me", headers=headers).status_code == 200
+
+    user_cache.put(replace(USER, profile_version=4))
+    response = stateless_client.get("/auth/me", headers=headers)
+
+    assert response.status_code == 401
+    assert "Profile has changed" in response.json()["detail"]
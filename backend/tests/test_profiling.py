@@ -0,0 +1,107 @@
+"""
+Test cases for request profiling.
+"""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.dependencies import get_current_user
+from app.core.profiling import ProfileStore, ProfilingMiddleware
+from app.main import app
+from app.models.user import User
+
+TOKEN = "t" * 32
+
+
+def busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def profiled_app(store: ProfileStore, **options) -> TestClient:
+    demo = FastAPI()
+    demo.add_middleware(ProfilingMiddleware, store=store, interval=0.001, **options)
+
+    @demo.get("/slow/{item_id}")
+    def read_slow(item_id: int):
+        busy_wait(0.05)
+        return {"id": item_id}
+
+    return TestClient(demo)
+
+
+def test_profiles_only_requests_with_the_token(tmp_path):
+    """Test that the header selects a request and a wrong token does not."""
+    store = ProfileStore(str(tmp_path), max_files=10)
+    client = profiled_app(store, token=TOKEN)
+
+    assert client.get("/slow/1").status_code == 200
+    assert client.get("/slow/1", headers={"X-Profile-Token": "wrong"}).status_code == 200
+    assert store.list() == []
+
+    assert client.get("/slow/1", headers={"X-Profile-Token": TOKEN}).status_code == 200
+    [profile] = store.list()
+    assert "-GET-slow_item_id-200-" in profile["name"]
+    with open(store.path(profile["name"])) as f:
+        lines = f.read().splitlines()
+    # Sync endpoints run in the threadpool, which the sampler covers too
+    assert any("read_slow" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_sampled_profiles_form_a_bounded_ring(tmp_path):
+    """Test sampling and that only the newest profiles are kept."""
+    store = ProfileStore(str(tmp_path), max_files=3)
+    client = profiled_app(store, sample_rate=1.0)
+
+    names = []
+    for item_id in range(5):
+        client.get(f"/slow/{item_id}")
+        names.append(store.list()[0]["name"])
+        time.sleep(0.002)
+
+    assert [profile["name"] for profile in store.list()] == names[:1:-1]
+
+
+def test_store_rejects_unsafe_names(tmp_path):
+    """Test that only plain profile file names resolve."""
+    store = ProfileStore(str(tmp_path / "profiles"), max_files=3)
+    store.write("20260101T000000.000-1-GET-x-200-1ms.folded", "main 1\n")
+    (tmp_path / "secret.folded").write_text("nope")
+
+    assert store.path("20260101T000000.000-1-GET-x-200-1ms.folded") is not None
+    assert store.path("../secret.folded") is None
+    assert store.path("missing.folded") is None
+
+
+@pytest.fixture
+def admin_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    monkeypatch.setattr(profiling.profile_store, "directory", str(tmp_path))
+    previous = dict(app.dependency_overrides)
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="admin@example.com")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(previous)
+
+
+def test_profile_endpoints(admin_client):
+    """Test listing and downloading profiles, admin only."""
+    name = profiling.profile_store.write("20260101T000000.000-1-POST-auth_google-200-12ms.folded", "main;f 3\n")
+
+    listing = admin_client.get("/internal/profiles").json()["profiles"]
+    assert [profile["name"] for profile in listing] == [name]
+
+    response = admin_client.get(f"/internal/profiles/{name}")
+    assert response.status_code == 200
+    assert response.text == "main;f 3\n"
+    assert admin_client.get("/internal/profiles/missing.folded").status_code == 404
+
+    app.dependency_overrides[get_current_user] = lambda: User(id=2, email="someone@example.com")
+    assert admin_client.get("/internal/profiles").status_code == 403
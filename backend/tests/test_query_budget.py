@@ -0,0 +1,124 @@
+"""
+Test cases for per-request SQL statement budgets.
+
+Each budget is the statement count the endpoint issues today; a change that
+adds a query to one of these paths has to raise the budget here on purpose.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.query_counter import count_queries
+from app.core.user_cache import user_cache
+from app.repositories.user_repository import AsyncUserRepository, UserRepository
+from tests.query_budget import max_queries
+
+CLAIMS = {"sub": "budget-1", "email": "budget@example.com", "given_name": "Budget"}
+
+
+@pytest.fixture
+def client(client):
+    with patch("app.routes.auth.google_token_verifier.verify_async") as verify:
+        verify.return_value = dict(CLAIMS)
+        yield client
+
+
+def sign_in(client):
+    response = client.post("/auth/google", json={"token": "valid_google_token"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_google_auth_budget(client):
+    """Test first and returning sign-ins: user upsert plus one refresh token."""
+    with max_queries(3):
+        sign_in(client)
+    with max_queries(2):
+        sign_in(client)
+
+
+def test_auth_me_budget(client):
+    """Test /auth/me: one user load when cold, none from the user cache."""
+    headers = {"Authorization": "Bearer " + sign_in(client)["access_token"]}
+    user_cache.clear()
+    with max_queries(1):
+        assert client.get("/auth/me", headers=headers).status_code == 200
+    with max_queries(0):
+        assert client.get("/auth/me", headers=headers).status_code == 200
+
+
+def test_refresh_budget(client):
+    """Test /auth/refresh: claim the old token, store its successor."""
+    refresh_token = sign_in(client)["refresh_token"]
+    with max_queries(2):
+        assert client.post("/auth/refresh", json={"refresh_token": refresh_token}).status_code == 200
+
+
+def test_budget_failure_lists_statements(client):
+    """Test that an exceeded budget names the statements."""
+    with pytest.raises(AssertionError, match=r"3 SQL statements executed, budget is 1:\n  1\. SELECT"):
+        with max_queries(1):
+            sign_in(client)
+
+
+def test_query_count_header(client, monkeypatch):
+    """Test the X-Query-Count debug header."""
+    assert "x-query-count" not in client.get("/health").headers
+
+    monkeypatch.setattr(settings, "QUERY_COUNT_HEADER", True)
+    response = client.post("/auth/google", json={"token": "valid_google_token"})
+    assert response.headers["x-query-count"] == "3"
+    assert client.get("/health").headers["x-query-count"] == "0"
+
+
+@max_queries(2)
+def test_create_and_update_skip_refresh(session_factory):
+    """Test that writes return server defaults without a follow-up SELECT."""
+    with session_factory() as db:
+        repo = UserRepository(db)
+        user = repo.create_user(email="new@example.com", first_name="New")
+        assert user.created_at is not None
+        user = repo.update_user(user, first_name="Renamed")
+        assert user.updated_at is not None
+        # Unchanged claims write nothing
+        repo.update_user(user, first_name="Renamed")
+
+
+def test_async_statements_are_counted():
+    """Test that the counter follows statements through the async driver."""
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        with count_queries() as counter:
+            async with factory() as db:
+                user = await AsyncUserRepository(db).create_user(email="async@example.com")
+                await AsyncUserRepository(db).get_user_by_id(user.id)
+        await engine.dispose()
+        return counter.count
+
+    user_cache.clear()
+    assert asyncio.run(run()) == 2
+    user_cache.clear()
+
+
+def test_nested_counters():
+    """Test that statements count towards every enclosing counter."""
+    engine = create_engine("sqlite://")
+    with count_queries() as outer:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+            with count_queries(record=True) as inner:
+                conn.exec_driver_sql("SELECT 2")
+    engine.dispose()
+
+    assert outer.count == 2
+    assert inner.count == 1
+    assert inner.statements == ["SELECT 2"]
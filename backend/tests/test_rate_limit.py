@@ -0,0 +1,161 @@
+"""
+Test cases for the sign-in rate limits and admission control.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.core.metrics import render_metrics
+from app.core.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimit,
+    RateLimitBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    build_backend,
+    rate_limiter,
+)
+from app.models.user import User
+
+UNLIMITED = RateLimit(per_minute=1e9, burst=10 ** 9)
+GOOGLE_CLAIMS = {"sub": "google-limited", "email": "Limited@example.com", "given_name": "Lim"}
+
+
+@pytest.fixture
+def client(client):
+    rate_limiter.backend.clear()
+    yield client
+    rate_limiter.backend.clear()
+
+
+def test_token_bucket_refills():
+    """Test burst, refill rate and the reported wait."""
+    clock = [0.0]
+    backend = MemoryRateLimitBackend(maxsize=10, clock=lambda: clock[0])
+    limit = RateLimit(per_minute=60, burst=2)
+
+    assert backend.take("k", limit) == 0.0
+    assert backend.take("k", limit) == 0.0
+    assert backend.take("k", limit) == pytest.approx(1.0)
+    clock[0] = 0.5
+    # A rejected request takes nothing, so the wait keeps shrinking
+    assert backend.take("k", limit) == pytest.approx(0.5)
+    clock[0] = 1.0
+    assert backend.take("k", limit) == 0.0
+    assert backend.take("other", limit) == 0.0
+
+
+def test_memory_backend_is_bounded():
+    """Test that the least recently used buckets are dropped."""
+    backend = MemoryRateLimitBackend(maxsize=2, clock=lambda: 0.0)
+    limit = RateLimit(per_minute=60, burst=1)
+    backend.take("a", limit)
+    backend.take("b", limit)
+    backend.take("a", limit)
+    backend.take("c", limit)
+
+    assert backend.stats() == {"backend": "memory", "keys": 2, "maxsize": 2, "evictions": 1}
+    # "a" was used more recently than "b" and kept its empty bucket
+    assert backend.take("a", limit) > 0
+    assert backend.take("b", limit) == 0.0
+
+    with pytest.raises(ValueError):
+        build_backend("unknown", 10)
+
+
+@patch('app.routes.auth.google_token_verifier.verify_async')
+def test_ip_limit_rejects_before_verification(mock_verify, client):
+    """Test 429 with Retry-After from the per-IP bucket, before Google verification runs."""
+    mock_verify.side_effect = ValueError("bad token")
+    with patch.object(rate_limiter, "ip_limit", RateLimit(per_minute=6, burst=1)):
+        assert client.post("/auth/google", json={"token": "t"}).status_code == 401
+        response = client.post("/auth/google", json={"token": "t"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert response.json() == {"detail": "Too many requests"}
+    assert mock_verify.call_count == 1
+    assert 'rate_limited_requests_total{route="/auth/google",reason="ip"}' in render_metrics()
+    # Other endpoints are not limited
+    assert client.get("/health").status_code == 200
+
+
+@patch('app.routes.auth.google_token_verifier.verify_async')
+def test_email_limit_rejects_before_database(mock_verify, client, session_factory):
+    """Test 429 from the per-email bucket once the token is verified."""
+    mock_verify.return_value = GOOGLE_CLAIMS
+    with patch.object(rate_limiter, "ip_limit", UNLIMITED), \
+            patch.object(rate_limiter, "email_limit", RateLimit(per_minute=1, burst=1)), \
+            patch("app.services.auth_service.AuthService.get_or_create_user", autospec=True) as upsert:
+        upsert.side_effect = lambda service, **fields: service.user_repo.upsert_from_google(**fields)
+        assert client.post("/auth/google", json={"token": "t"}).status_code == 200
+        mock_verify.return_value = dict(GOOGLE_CLAIMS, email="limited@EXAMPLE.com")
+        response = client.post("/auth/google", json={"token": "t"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+    assert upsert.call_count == 1
+    with session_factory() as db:
+        assert db.query(User).count() == 1
+
+
+def test_in_flight_cap():
+    """Test that requests beyond the in-flight cap get 503 while others run."""
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    limiter = RateLimiter(MemoryRateLimitBackend(maxsize=10), ip_limit=UNLIMITED, email_limit=UNLIMITED)
+    middleware = RateLimitMiddleware(slow_app, limiter, paths=["/auth/google"], max_in_flight=1)
+
+    async def request(method="POST"):
+        scope = {"type": "http", "method": method, "path": "/auth/google", "client": ("10.0.0.1", 1)}
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+        await middleware(scope, None, send)
+        return messages[0]
+
+    async def scenario():
+        first = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        second = await request()
+        assert middleware.in_flight == 1
+        release.set()
+        return (await first), second, (await request("GET"))
+
+    first, second, get = asyncio.run(scenario())
+    assert first["status"] == 200
+    assert second["status"] == 503
+    assert (b"retry-after", b"1") in second["headers"]
+    assert get["status"] == 200
+    assert middleware.in_flight == 0
+
+
+def test_backend_without_acquire_cannot_be_built():
+    """Test that a backend missing acquire fails when built, not on the first request."""
+    class NoStore(RateLimitBackend):
+        name = "none"
+
+    with pytest.raises(TypeError):
+        NoStore()
+
+
+def test_backend_failure_lets_requests_through():
+    """Test that an unreachable shared store does not block sign-ins."""
+    class BrokenBackend(RateLimitBackend):
+        name = "broken"
+
+        async def acquire(self, key, limit):
+            raise ConnectionError("store unreachable")
+
+    limiter = RateLimiter(BrokenBackend(), ip_limit=RateLimit(1, 1), email_limit=RateLimit(1, 1))
+
+    assert asyncio.run(limiter.check_ip("10.0.0.1", "/auth/google")) == 0.0
+    assert asyncio.run(limiter.check_email("a@example.com", "/auth/google")) == 0.0
@@ -0,0 +1,210 @@
+"""
+Test cases for rotating refresh tokens and /auth/refresh.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import Base
+from app.core.security import verify_token
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.repositories.refresh_token_repository import (
+    AsyncRefreshTokenRepository,
+    InvalidRefreshTokenError,
+    RefreshTokenRepository,
+    RefreshTokenReuseError,
+    hash_refresh_token,
+)
+from app.services.revocation_sync import purge_refresh_tokens
+
+GOOGLE_CLAIMS = {
+    "sub": "google-refresh",
+    "email": "refresh@example.com",
+    "given_name": "Re",
+    "family_name": "Fresh",
+}
+
+
+@pytest.fixture
+def user_id(session_factory):
+    with session_factory() as db:
+        user = User(email="refresh@example.com", google_id="google-refresh")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def test_tokens_are_stored_hashed(session_factory, user_id):
+    """Test that only the digest of an issued token is persisted."""
+    with session_factory() as db:
+        token = RefreshTokenRepository(db).create(user_id)
+        row = db.query(RefreshToken).one()
+
+    assert row.token_hash == hash_refresh_token(token)
+    assert token not in row.token_hash
+
+
+def test_rotate_issues_successor(session_factory, user_id):
+    """Test that rotation returns the owner and a new token in the same family."""
+    with session_factory() as db:
+        repo = RefreshTokenRepository(db)
+        first = repo.create(user_id)
+        owner, second = repo.rotate(first)
+        owner_again, third = repo.rotate(second)
+
+        families = {row.family_id for row in db.query(RefreshToken)}
+
+    assert owner == owner_again == user_id
+    assert len({first, second, third}) == 3
+    assert len(families) == 1
+
+
+def test_rotate_is_one_statement_before_insert(session_factory, user_id, engine):
+    """Test that the happy path claims the token with a single UPDATE."""
+    with session_factory() as db:
+        token = RefreshTokenRepository(db).create(user_id)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with session_factory() as db:
+        RefreshTokenRepository(db).rotate(token)
+
+    assert [s.split()[0].upper() for s in statements] == ["UPDATE", "INSERT"]
+
+
+def test_reuse_revokes_family(session_factory, user_id):
+    """Test that replaying a rotated token kills every token of the session."""
+    with session_factory() as db:
+        repo = RefreshTokenRepository(db)
+        stolen = repo.create(user_id)
+        _, current = repo.rotate(stolen)
+        other_session = repo.create(user_id)
+
+        with pytest.raises(RefreshTokenReuseError):
+            repo.rotate(stolen)
+        with pytest.raises(InvalidRefreshTokenError):
+            repo.rotate(current)
+
+        # Other logins of the same user are unaffected
+        assert repo.rotate(other_session)[0] == user_id
+
+
+def test_unknown_and_expired_tokens_rejected(session_factory, user_id):
+    """Test rejection of tokens that were never issued or have expired."""
+    with session_factory() as db:
+        repo = RefreshTokenRepository(db)
+        expired = repo.create(user_id)
+        row = db.query(RefreshToken).one()
+        row.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+        with pytest.raises(InvalidRefreshTokenError):
+            repo.rotate("never-issued")
+        with pytest.raises(InvalidRefreshTokenError) as excinfo:
+            repo.rotate(expired)
+        assert not isinstance(excinfo.value, RefreshTokenReuseError)
+
+
+def test_purge_keeps_spent_tokens_for_the_reuse_window(session_factory, user_id, monkeypatch):
+    """Test that expired rows go at once and used or revoked rows after the window."""
+    with session_factory() as db:
+        repo = RefreshTokenRepository(db)
+        stolen = repo.create(user_id)
+        _, current = repo.rotate(stolen)
+        expired = repo.create(user_id)
+        revoked = repo.create(user_id)
+        repo.revoke_session(revoked, user_id)
+        row = db.query(RefreshToken).filter_by(token_hash=hash_refresh_token(expired)).one()
+        row.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+        assert repo.purge_expired() == 1
+        # Replays inside the window are still caught as reuse
+        with pytest.raises(RefreshTokenReuseError):
+            repo.rotate(stolen)
+
+    monkeypatch.setattr(settings, "DATABASE_ASYNC", False)
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    assert asyncio.run(purge_refresh_tokens()) == 0
+
+    later = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_REUSE_WINDOW_DAYS + 1)
+    with session_factory() as db:
+        assert RefreshTokenRepository(db).purge_expired(later) == 3
+        assert db.query(RefreshToken).count() == 0
+
+
+def test_async_repository_rotation():
+    """Test issue, rotate and reuse detection on the async stack."""
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+                user = User(email="async-refresh@example.com")
+                db.add(user)
+                await db.commit()
+
+                repo = AsyncRefreshTokenRepository(db)
+                first = await repo.create(user.id)
+                owner, second = await repo.rotate(first)
+                assert owner == user.id
+                with pytest.raises(RefreshTokenReuseError):
+                    await repo.rotate(first)
+                with pytest.raises(InvalidRefreshTokenError):
+                    await repo.rotate(second)
+
+                later = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS + 1)
+                assert await repo.purge_expired() == 0
+                assert await repo.purge_expired(later) == 2
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+@patch('app.routes.auth.google_token_verifier.verify_async')
+def test_refresh_endpoint_without_google(mock_verify, client):
+    """Test that a session is renewed through /auth/refresh without Google."""
+    mock_verify.return_value = GOOGLE_CLAIMS
+    login = client.post("/auth/google", json={"token": "google-id-token"}).json()
+    assert login["refresh_token"]
+
+    mock_verify.reset_mock()
+    response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["token_type"] == "bearer"
+    assert data["refresh_token"] != login["refresh_token"]
+    assert verify_token(data["access_token"])["email"] == "refresh@example.com"
+    mock_verify.assert_not_called()
+
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {data['access_token']}"})
+    assert me.status_code == 200
+
+
+@patch('app.routes.auth.google_token_verifier.verify_async')
+def test_refresh_endpoint_rejects_reuse(mock_verify, client):
+    """Test that replaying a refresh token returns 401 and ends the session."""
+    mock_verify.return_value = GOOGLE_CLAIMS
+    first = client.post("/auth/google", json={"token": "google-id-token"}).json()["refresh_token"]
+    second = client.post("/auth/refresh", json={"refresh_token": first}).json()["refresh_token"]
+
+    assert client.post("/auth/refresh", json={"refresh_token": first}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": second}).status_code == 401
+
+
+def test_refresh_endpoint_validation(client):
+    """Test /auth/refresh input validation and unknown tokens."""
+    assert client.post("/auth/refresh", json={}).status_code == 422
+    assert client.post("/auth/refresh", json={"refresh_token": "nope"}).status_code == 401
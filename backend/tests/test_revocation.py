@@ -0,0 +1,202 @@
+"""
+Test cases for access token revocation: /auth/logout, admin revoke and the
+per-worker revocation list.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import Base
+from app.core.revocation import Revocation, RevocationList, revocation_list
+from app.core.security import create_access_token, verify_token
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.repositories.revocation_repository import AsyncRevocationRepository, RevocationRepository
+from app.services.revocation_sync import sync_revocations
+
+GOOGLE_CLAIMS = {
+    "sub": "google-logout",
+    "email": "logout@example.com",
+    "given_name": "Log",
+    "family_name": "Out",
+}
+
+
+@pytest.fixture
+def client(client):
+    yield client
+    revocation_list.clear()
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_access_tokens_carry_jti_and_iat():
+    """Test that every access token is individually identifiable."""
+    first = verify_token(create_access_token({"sub": "1"}))
+    second = verify_token(create_access_token({"sub": "1"}))
+
+    assert len(first["jti"]) == 32
+    assert first["jti"] != second["jti"]
+    assert first["iat"] <= first["exp"]
+
+
+@patch('app.routes.auth.google_token_verifier.verify_async')
+def test_logout_revokes_tokens(mock_verify, client, session_factory):
+    """Test that logout ends the access token, even when cached, and the session."""
+    mock_verify.return_value = GOOGLE_CLAIMS
+    login = client.post("/auth/google", json={"token": "google-id-token"}).json()
+    other = client.post("/auth/google", json={"token": "google-id-token"}).json()
+    # Verified once, so the next check is served from the access token cache
+    assert client.get("/auth/me", headers=bearer(login["access_token"])).status_code == 200
+    jti = verify_token(login["access_token"])["jti"]
+
+    response = client.post(
+        "/auth/logout", json={"refresh_token": login["refresh_token"]}, headers=bearer(login["access_token"])
+    )
+
+    assert response.status_code == 204
+    assert client.get("/auth/me", headers=bearer(login["access_token"])).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]}).status_code == 401
+    assert client.post("/auth/logout", headers=bearer(login["access_token"])).status_code == 401
+    # Other sessions of the user are untouched
+    assert client.get("/auth/me", headers=bearer(other["access_token"])).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": other["refresh_token"]}).status_code == 200
+    with session_factory() as db:
+        assert db.query(RevokedToken.jti).one() == (jti,)
+
+
+def test_logout_without_body(client, session_factory):
+    """Test that the refresh token is optional."""
+    with session_factory() as db:
+        user = User(email="nobody@example.com")
+        db.add(user)
+        db.commit()
+    token = create_access_token({"sub": str(user.id), "email": user.email})
+
+    assert client.post("/auth/logout", headers=bearer(token)).status_code == 204
+    assert verify_token(token) is None
+
+
+def test_admin_revokes_user(client, session_factory, monkeypatch):
+    """Test POST /users/{id}/revoke and its admin gating."""
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    with session_factory() as db:
+        admin, target = User(email="admin@example.com"), User(email="target@example.com")
+        db.add_all([admin, target])
+        db.commit()
+    admin_token = create_access_token({"sub": str(admin.id), "email": admin.email})
+    target_token = create_access_token({"sub": str(target.id), "email": target.email})
+
+    assert client.post(f"/users/{admin.id}/revoke", headers=bearer(target_token)).status_code == 403
+    assert client.post("/users/999/revoke", headers=bearer(admin_token)).status_code == 404
+    assert client.post(f"/users/{target.id}/revoke", headers=bearer(admin_token)).status_code == 204
+
+    assert client.get("/auth/me", headers=bearer(target_token)).status_code == 401
+    assert client.get("/auth/me", headers=bearer(admin_token)).status_code == 200
+
+
+def test_sync_pulls_revocations_incrementally(session_factory, monkeypatch):
+    """Test that a worker picks up other workers' revocations, reading only new rows."""
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    monkeypatch.setattr(settings, "DATABASE_ASYNC", False)
+    now = datetime.now(timezone.utc)
+    expires = now + timedelta(minutes=30)
+    with session_factory() as db:
+        db.add_all([
+            RevokedToken(jti="a" * 32, user_id=1, revoked_at=now - timedelta(minutes=10), expires_at=expires),
+            RevokedToken(jti="b" * 32, user_id=1, revoked_at=now - timedelta(minutes=5), expires_at=expires),
+            # Already expired: never loaded
+            RevokedToken(jti="c" * 32, user_id=1, revoked_at=now - timedelta(minutes=40), expires_at=now),
+        ])
+        db.commit()
+    state = RevocationList()
+
+    assert asyncio.run(sync_revocations(state)) == 2
+    assert state.is_revoked({"sub": "1", "jti": "a" * 32})
+    assert not state.is_revoked({"sub": "1", "jti": "c" * 32})
+
+    with session_factory() as db:
+        RevocationRepository(db).revoke_user(2)
+    # The second pull starts just before the newest row already applied
+    assert asyncio.run(sync_revocations(state)) == 2
+    assert state.is_revoked({"sub": "2", "jti": "d" * 32, "iat": int(now.timestamp())})
+    assert not state.is_revoked({"sub": "2", "jti": "d" * 32, "iat": int(now.timestamp()) + 3600})
+    assert state.stats()["tokens"] == 2
+    assert state.stats()["users"] == 1
+
+
+def test_entries_expire_with_their_tokens():
+    """Test that entries are dropped once the tokens they cover have expired."""
+    clock = [1000.0]
+    state = RevocationList(clock=lambda: clock[0])
+
+    def at(ts):
+        return datetime.fromtimestamp(ts, timezone.utc)
+
+    state.apply([
+        Revocation("t" * 32, 1, at(900), at(1100)),
+        Revocation(None, 2, at(950), at(2000)),
+        Revocation("x" * 32, 3, at(500), at(999)),
+    ])
+
+    assert len(state) == 2
+    assert state.cursor == at(950)
+    assert state.is_revoked({"sub": "1", "jti": "t" * 32})
+    assert state.is_revoked({"sub": "2", "jti": "u" * 32, "iat": 950})
+    assert not state.is_revoked({"sub": "2", "jti": "u" * 32, "iat": 951})
+
+    clock[0] = 1100.0
+    assert state.prune() == 1
+    assert not state.is_revoked({"sub": "1", "jti": "t" * 32})
+    assert state.is_revoked({"sub": "2", "jti": "u" * 32, "iat": 900})
+
+
+def test_token_issued_in_the_second_of_a_revocation(client, session_factory):
+    """Test that a "revoke all" rejects earlier tokens of its second but not later ones."""
+    with session_factory() as db:
+        user = User(email="same-second@example.com")
+        db.add(user)
+        db.commit()
+        # Usually all within one second, which whole-second iats cannot order
+        before = create_access_token({"sub": str(user.id)})
+        revocation_list.apply([RevocationRepository(db).revoke_user(user.id)])
+        after = create_access_token({"sub": str(user.id)})
+
+    assert client.get("/auth/me", headers=bearer(before)).status_code == 401
+    assert client.get("/auth/me", headers=bearer(after)).status_code == 200
+
+
+def test_async_repository():
+    """Test revoke, incremental read and purge on the async stack."""
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+                user = User(email="async-revoke@example.com")
+                db.add(user)
+                await db.commit()
+
+                repo = AsyncRevocationRepository(db)
+                now = datetime.now(timezone.utc)
+                revoked = await repo.revoke_token("j" * 32, user.id, now + timedelta(minutes=5))
+                # Revoking the same token twice is not an error
+                await repo.revoke_token("j" * 32, user.id, now + timedelta(minutes=5))
+                changes = await repo.changes_since(now - timedelta(seconds=1))
+                assert [change.jti for change in changes] == [revoked.jti]
+                assert await repo.changes_since(now + timedelta(minutes=1)) == []
+                assert await repo.purge_expired(now + timedelta(minutes=10)) == 1
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
@@ -2,9 +2,15 @@
 Test cases for security utilities (JWT tokens).
 """
 
+import time
 import pytest
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core import security
+from app.core.cache import TTLCache
 from app.core.security import create_access_token, verify_token
+from app.core.jwt_backends import InvalidTokenError
 from jose import jwt
 from app.core.config import settings
 
@@ -112,3 +118,73 @@ def test_token_preserves_custom_data():
     assert payload["email"] == "custom@example.com"
     assert payload["custom_field"] == "custom_value"
     assert payload["role"] == "admin"
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    """Fresh access token cache driven by a controllable clock."""
+    now = [time.time()]
+    cache = TTLCache(maxsize=100, clock=lambda: now[0])
+    monkeypatch.setattr(security, "access_token_cache", cache)
+    monkeypatch.setattr(security, "time", SimpleNamespace(time=lambda: now[0]))
+    return cache, now
+
+
+def test_verify_token_is_cached(token_cache):
+    """Test that repeated verification of one token decodes it once."""
+    cache, _ = token_cache
+    token = create_access_token(data={"sub": "333"})
+
+    backend = security.get_jwt_backend()
+    with patch.object(backend, "decode", wraps=backend.decode) as decode:
+        first = verify_token(token)
+        second = verify_token(token)
+
+    assert first == second
+    assert decode.call_count == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_cached_payload_is_not_shared(token_cache):
+    """Test that callers mutating a payload do not alter the cached copy."""
+    token = create_access_token(data={"sub": "334"})
+
+    verify_token(token)["sub"] = "tampered"
+
+    assert verify_token(token)["sub"] == "334"
+
+
+def test_cached_token_expires_at_exp(token_cache):
+    """Test that a cached payload is not served past the token's exp."""
+    cache, now = token_cache
+    token = create_access_token(data={"sub": "335"})
+    exp = verify_token(token)["exp"]
+
+    now[0] = exp - 1
+    backend = security.get_jwt_backend()
+    with patch.object(backend, "decode", wraps=backend.decode) as decode:
+        assert verify_token(token) is not None
+    assert decode.call_count == 0
+
+    now[0] = exp
+    with patch.object(backend, "decode", side_effect=InvalidTokenError("expired")) as decode:
+        assert verify_token(token) is None
+    assert decode.call_count == 1
+
+
+def test_cache_bypassed_after_key_rotation(token_cache, monkeypatch):
+    """Test that tokens cached under an old signing key are verified again."""
+    token = create_access_token(data={"sub": "336"})
+    assert verify_token(token) is not None
+
+    monkeypatch.setattr(settings, "SECRET_KEY", "rotated-secret")
+
+    assert verify_token(token) is None
+
+
+def test_rejected_tokens_are_not_cached(token_cache):
+    """Test that only verified payloads enter the cache."""
+    cache, _ = token_cache
+
+    assert verify_token("invalid.token.here") is None
+    assert len(cache) == 0
@@ -0,0 +1,80 @@
+"""
+Test cases for production server sizing and gunicorn.conf.py.
+"""
+
+import os
+import runpy
+
+import pytest
+
+from app.core import config as config_module
+from app.core import server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def cgroup(tmp_path, monkeypatch):
+    """Write cgroup files under a temporary root on a machine with 8 CPUs."""
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+
+    def write(files):
+        for name, content in files.items():
+            path = tmp_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content + "\n")
+        return str(tmp_path)
+    return write
+
+
+def test_cgroup_v2_quota(cgroup):
+    """Test that cpu.max limits the CPUs."""
+    assert server.available_cpus(cgroup({"cpu.max": "150000 100000"})) == 1.5
+
+
+def test_cgroup_v1_quota(cgroup):
+    """Test the cgroup v1 CFS quota."""
+    root = cgroup({"cpu/cpu.cfs_quota_us": "200000", "cpu/cpu.cfs_period_us": "100000"})
+    assert server.available_cpus(root) == 2.0
+
+
+@pytest.mark.parametrize("files", [
+    {"cpu.max": "max 100000"},
+    {"cpu/cpu.cfs_quota_us": "-1", "cpu/cpu.cfs_period_us": "100000"},
+    {},
+])
+def test_unlimited_quota_uses_affinity(cgroup, files):
+    """Test that without a quota every CPU in the affinity mask counts."""
+    assert server.available_cpus(cgroup(files)) == 8.0
+
+
+def test_quota_above_affinity(cgroup):
+    """Test that a quota larger than the usable CPUs is capped."""
+    assert server.available_cpus(cgroup({"cpu.max": "1600000 100000"})) == 8.0
+
+
+def test_worker_count():
+    """Test one worker per CPU, rounding fractions up."""
+    assert server.worker_count(0.5) == 1
+    assert server.worker_count(1.5) == 2
+    assert server.worker_count(4.0) == 4
+
+
+def test_gunicorn_config(monkeypatch):
+    """Test the gunicorn settings and that the worker count reaches pool sizing."""
+    # Looked up now: other tests reload app.core.config
+    settings = config_module.settings
+    monkeypatch.setattr(settings, "WEB_WORKERS", 0)
+    monkeypatch.setenv("WEB_WORKERS", "0")
+    monkeypatch.setattr(server, "available_cpus", lambda: 3.0)
+    monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "10.0.0.1,10.0.0.2")
+
+    config = runpy.run_path(os.path.join(BACKEND_DIR, "gunicorn.conf.py"))
+
+    assert config["workers"] == 3
+    assert config["worker_class"] == "uvicorn.workers.UvicornWorker"
+    assert config["preload_app"] is True
+    assert config["max_requests"] == settings.WEB_MAX_REQUESTS
+    assert config["forwarded_allow_ips"] == "10.0.0.1,10.0.0.2"
+    assert settings.WEB_WORKERS == 3
+    assert os.environ["WEB_WORKERS"] == "3"
@@ -0,0 +1,120 @@
+"""
+Test cases for the read-through user cache.
+"""
+
+import dataclasses
+
+import pytest
+from sqlalchemy import event
+
+from app.core.user_cache import CachedUser, UserCache, user_cache
+from app.repositories.user_repository import UserRepository
+from app.services.auth_service import AuthService
+
+
+@pytest.fixture
+def select_count(session_factory):
+    """Count SELECT statements issued through the test engine."""
+    engine = session_factory.kw["bind"]
+    counter = {"selects": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            counter["selects"] += 1
+
+    yield counter
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def create_user(session_factory, email="cache@example.com"):
+    with session_factory() as db:
+        user = UserRepository(db).create_user(email=email, google_id="g-" + email, first_name="Cache")
+        user_id = user.id
+    user_cache.clear()
+    return user_id
+
+
+def test_get_user_by_id_reads_through_cache(session_factory, select_count):
+    """Test that only the first lookup queries the database."""
+    user_id = create_user(session_factory)
+    select_count["selects"] = 0
+
+    for _ in range(5):
+        with session_factory() as db:
+            user = AuthService(db).get_user_by_id(user_id)
+            assert user.email == "cache@example.com"
+
+    assert select_count["selects"] == 1
+    assert user_cache.stats()["hits"] >= 4
+
+
+def test_cached_user_is_detached_snapshot(session_factory):
+    """Test that cached users are immutable and outlive their session."""
+    user_id = create_user(session_factory)
+    with session_factory() as db:
+        user = AuthService(db).get_user_by_id(user_id)
+
+    assert isinstance(user, CachedUser)
+    assert user.first_name == "Cache"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        user.first_name = "Changed"
+
+
+def test_missing_user_is_not_cached(session_factory):
+    """Test that unknown IDs return None and are not stored."""
+    with session_factory() as db:
+        assert AuthService(db).get_user_by_id(12345) is None
+
+    assert user_cache.get(12345) is None
+
+
+def test_update_user_refreshes_cache(session_factory):
+    """Test that repository writes refresh the cached snapshot."""
+    user_id = create_user(session_factory)
+    with session_factory() as db:
+        AuthService(db).get_user_by_id(user_id)
+
+    with session_factory() as db:
+        repo = UserRepository(db)
+        repo.update_user(repo.get_user_by_id(user_id), first_name="Updated")
+
+    with session_factory() as db:
+        assert AuthService(db).get_user_by_id(user_id).first_name == "Updated"
+
+
+def test_upsert_refreshes_cache(session_factory):
+    """Test that a login with changed claims refreshes the cached snapshot."""
+    user_id = create_user(session_factory)
+    with session_factory() as db:
+        AuthService(db).get_user_by_id(user_id)
+
+    with session_factory() as db:
+        AuthService(db).get_or_create_user(
+            email="cache@example.com",
+            google_id="g-cache@example.com",
+            first_name="Relogged",
+            last_name=None,
+            profile_picture=None,
+        )
+
+    assert user_cache.get(user_id).first_name == "Relogged"
+
+
+def test_user_cache_is_bounded():
+    """Test LRU eviction beyond the configured size."""
+    cache = UserCache(maxsize=2, ttl=60)
+    for user_id in range(1, 4):
+        cache.put(CachedUser(user_id, f"u{user_id}@example.com", None, None, None, None, None, None))
+
+    assert cache.get(1) is None
+    assert cache.get(3).email == "u3@example.com"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disabled_user_cache():
+    """Test that a zero-sized cache stores nothing."""
+    cache = UserCache(maxsize=0, ttl=60)
+    cache.put(CachedUser(1, "u@example.com", None, None, None, None, None, None))
+
+    assert cache.get(1) is None
@@ -0,0 +1,139 @@
+"""
+Test cases for the user repository.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from app.repositories import user_repository
+from app.repositories.user_repository import UserRepository
+
+CLAIMS = {
+    "google_id": "google-1",
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "profile_picture": "https://example.com/ada.jpg",
+}
+
+
+@pytest.fixture
+def statements(engine):
+    """Record every SQL statement sent to the database."""
+    executed = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_upsert_creates_new_user(session_factory):
+    """Test that a first login inserts the user."""
+    with session_factory() as db:
+        user = UserRepository(db).upsert_from_google(email="ada@example.com", **CLAIMS)
+
+        assert user.id is not None
+        assert user.email == "ada@example.com"
+        assert user.first_name == "Ada"
+        assert user.created_at is not None
+
+
+def test_upsert_unchanged_claims_is_single_read(session_factory, statements):
+    """Test that a returning user with unchanged claims costs one SELECT."""
+    with session_factory() as db:
+        created = UserRepository(db).upsert_from_google(email="ada@example.com", **CLAIMS)
+
+    statements.clear()
+    with session_factory() as db:
+        user = UserRepository(db).upsert_from_google(email="ada@example.com", **CLAIMS)
+
+    assert user.id == created.id
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("SELECT")
+
+
+def test_upsert_updates_changed_claims(session_factory, statements):
+    """Test that changed claims are written with a single upsert statement."""
+    with session_factory() as db:
+        created = UserRepository(db).upsert_from_google(email="ada@example.com", **CLAIMS)
+
+    statements.clear()
+    with session_factory() as db:
+        user = UserRepository(db).upsert_from_google(
+            email="ada@example.com", **{**CLAIMS, "first_name": "Augusta"}
+        )
+
+    assert user.id == created.id
+    assert user.first_name == "Augusta"
+    assert user.updated_at is not None
+    assert [s.split()[0].upper() for s in statements] == ["SELECT", "INSERT"]
+
+
+def test_upsert_keeps_values_for_missing_claims(session_factory):
+    """Test that absent claims do not erase stored values."""
+    with session_factory() as db:
+        UserRepository(db).upsert_from_google(email="ada@example.com", **CLAIMS)
+
+    with session_factory() as db:
+        user = UserRepository(db).upsert_from_google(
+            email="ada@example.com", google_id="google-1", first_name="Augusta"
+        )
+
+    assert user.first_name == "Augusta"
+    assert user.last_name == "Lovelace"
+    assert user.profile_picture == "https://example.com/ada.jpg"
+
+
+def test_upsert_survives_concurrent_first_login(session_factory):
+    """Test that two first logins for one email do not raise IntegrityError."""
+    with session_factory() as first, session_factory() as second:
+        first_repo = UserRepository(first)
+        second_repo = UserRepository(second)
+
+        # Both requests see no user before either one writes
+        original = UserRepository.get_user_by_email
+        calls = {"count": 0}
+
+        def racing_lookup(self, email):
+            calls["count"] += 1
+            return None if calls["count"] <= 2 else original(self, email)
+
+        with patch.object(UserRepository, "get_user_by_email", racing_lookup):
+            user_a = first_repo.upsert_from_google(email="race@example.com", **CLAIMS)
+            user_b = second_repo.upsert_from_google(email="race@example.com", **CLAIMS)
+
+    assert user_a.id == user_b.id
+
+
+def test_upsert_without_on_conflict_support(session_factory, monkeypatch):
+    """Test the select-then-write fallback for dialects without ON CONFLICT."""
+    monkeypatch.setattr(user_repository, "_UPSERT_INSERTS", {})
+
+    with session_factory() as db:
+        repo = UserRepository(db)
+        created = repo.upsert_from_google(email="ada@example.com", **CLAIMS)
+        updated = repo.upsert_from_google(email="ada@example.com", **{**CLAIMS, "last_name": "King"})
+
+    assert updated.id == created.id
+    assert updated.last_name == "King"
+
+
+def test_profile_version_bumps_only_on_change(session_factory):
+    """Test that profile_version tracks claim changes for stateless tokens."""
+    with session_factory() as db:
+        repo = UserRepository(db)
+        created = repo.upsert_from_google(email="ada@example.com", **CLAIMS)
+        assert created.profile_version == 1
+
+        same = repo.upsert_from_google(email="ada@example.com", **CLAIMS)
+        assert same.profile_version == 1
+
+        changed = repo.upsert_from_google(email="ada@example.com", **{**CLAIMS, "last_name": "King"})
+        assert changed.profile_version == 2
+
+        updated = repo.update_user(changed, first_name="Augusta")
+        assert updated.profile_version == 3
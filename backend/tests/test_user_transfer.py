@@ -0,0 +1,245 @@
+"""
+Test cases for bulk user import and export.
+"""
+
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import cli
+from app.core import database
+from app.core.database import Base
+from app.core.dependencies import get_current_user
+from app.main import app
+from app.models.user import User
+from app.repositories.user_bulk_repository import UserBulkRepository
+from app.repositories.user_repository import UserRepository
+from app.services import user_transfer
+
+
+def ndjson(*records):
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+
+def users(session_factory):
+    with session_factory() as db:
+        return {user.email: user for user in db.query(User).order_by(User.id)}
+
+
+def test_import_creates_users_in_batches(session_factory, engine):
+    """Test that an import writes with one statement per batch."""
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    stream = ndjson(*({"email": f"user{i}@example.com", "first_name": f"U{i}"} for i in range(25)))
+
+    with session_factory() as db:
+        result = user_transfer.import_users(db, stream, batch_size=10)
+
+    assert (result.rows, result.written, result.skipped, result.failed) == (25, 25, 0, 0)
+    assert len(users(session_factory)) == 25
+    assert sum(s.lstrip().upper().startswith("INSERT") for s in statements) == 3
+
+
+def test_import_follows_login_upsert_rules(session_factory):
+    """Test that imports match on email, keep stored values for empty fields and skip no-ops."""
+    with session_factory() as db:
+        UserRepository(db).upsert_from_google(
+            email="ada@example.com", google_id="g-ada", first_name="Ada", last_name="Lovelace"
+        )
+
+    with session_factory() as db:
+        result = user_transfer.import_users(db, ndjson(
+            {"email": "ada@example.com", "first_name": "Augusta", "last_name": ""},
+            {"email": "new@example.com", "google_id": "g-new"},
+        ))
+    assert result.written == 2
+    stored = users(session_factory)
+    assert stored["ada@example.com"].first_name == "Augusta"
+    assert stored["ada@example.com"].last_name == "Lovelace"
+    assert stored["ada@example.com"].profile_version == 2
+
+    with session_factory() as db:
+        again = user_transfer.import_users(db, ndjson({"email": "ada@example.com", "first_name": "Augusta"}))
+    assert again.written == 0
+    assert users(session_factory)["ada@example.com"].profile_version == 2
+
+
+def test_import_merges_repeated_emails(session_factory):
+    """Test that repeated emails in one batch apply in file order."""
+    with session_factory() as db:
+        user_transfer.import_users(db, ndjson(
+            {"email": "dup@example.com", "first_name": "First", "last_name": "Kept"},
+            {"email": "dup@example.com", "first_name": "Second"},
+        ))
+
+    stored = users(session_factory)["dup@example.com"]
+    assert (stored.first_name, stored.last_name) == ("Second", "Kept")
+
+
+def test_import_reports_invalid_and_conflicting_rows(session_factory):
+    """Test that bad rows are counted without failing the rest of their batch."""
+    with session_factory() as db:
+        UserRepository(db).upsert_from_google(email="owner@example.com", google_id="taken")
+
+    stream = io.StringIO(
+        json.dumps({"email": "ok@example.com"}) + "\n"
+        + "not json\n"
+        + json.dumps({"first_name": "No email"}) + "\n"
+        + json.dumps({"email": "thief@example.com", "google_id": "taken"}) + "\n"
+    )
+    with session_factory() as db:
+        result = user_transfer.import_users(db, stream)
+
+    assert (result.rows, result.written, result.skipped, result.failed) == (4, 1, 2, 1)
+    assert result.errors[0].startswith("line 2:")
+    assert set(users(session_factory)) == {"owner@example.com", "ok@example.com"}
+
+
+def test_import_rejects_emails_the_api_cannot_serve(admin_client, session_factory):
+    """Test that invalid addresses fail instead of breaking GET /users afterwards."""
+    stream = ndjson({"email": "bob@localhost"}, {"email": "a@@b.com"}, {"email": "fine@example.com"})
+    with session_factory() as db:
+        result = user_transfer.import_users(db, stream)
+
+    assert (result.rows, result.written, result.skipped, result.failed) == (3, 1, 0, 2)
+    assert result.errors == ["line 1: invalid email 'bob@localhost'", "line 2: invalid email 'a@@b.com'"]
+    response = admin_client.get("/users")
+    assert response.status_code == 200
+    assert [user["email"] for user in response.json()["users"]] == ["fine@example.com"]
+
+
+@pytest.mark.parametrize("fmt, source", [
+    ("ndjson", b'{"email": "a@example.com"}\n\xff\xfe\n'),
+    ("csv", b"email\na@example.com\n\xff\xfe\n"),
+])
+def test_import_stops_at_undecodable_input(session_factory, fmt, source):
+    """Test that bytes that are not UTF-8 end the import with an error rather than an exception."""
+    stream = io.TextIOWrapper(io.BytesIO(source), encoding="utf-8", newline="")
+    with session_factory() as db:
+        result = user_transfer.import_users(db, stream, fmt)
+
+    assert result.skipped == 1
+    assert result.errors == ["line 1: not valid utf-8, import stopped"]
+
+
+def test_csv_round_trip(session_factory):
+    """Test that a CSV export can be imported into an empty database."""
+    source = "email,first_name,google_id\na@example.com,A,g-a\nb@example.com,,g-b\n"
+    with session_factory() as db:
+        assert user_transfer.import_users(db, io.StringIO(source), "csv").written == 2
+        exported = "".join(user_transfer.export_users(db, "csv", batch_size=1))
+
+    rows = list(csv.DictReader(io.StringIO(exported)))
+    assert list(rows[0]) == list(user_transfer.EXPORT_COLUMNS)
+    assert [row["email"] for row in rows] == ["a@example.com", "b@example.com"]
+    assert rows[1]["first_name"] == ""
+    assert rows[0]["created_at"]
+
+    target = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=target)
+    with sessionmaker(bind=target)() as db:
+        result = user_transfer.import_users(db, io.StringIO(exported), "csv")
+        assert result.written == 2
+        assert db.query(User).filter(User.email == "b@example.com").one().google_id == "g-b"
+
+
+def test_export_is_chunked(session_factory):
+    """Test that exports are produced one bounded chunk at a time."""
+    with session_factory() as db:
+        user_transfer.import_users(db, ndjson(*({"email": f"u{i}@example.com"} for i in range(7))))
+        chunks = list(user_transfer.export_users(db, "ndjson", batch_size=3))
+
+    assert [chunk.count("\n") for chunk in chunks] == [3, 3, 1]
+    assert json.loads(chunks[0].splitlines()[0])["email"] == "u0@example.com"
+
+
+def test_import_and_export_endpoints(admin_client, session_factory, monkeypatch):
+    """Test the streaming admin endpoints."""
+    # The export opens its own session
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    body = "".join(json.dumps({"email": f"api{i}@example.com"}) + "\n" for i in range(5))
+
+    imported = admin_client.post("/internal/users/import", content=body.encode())
+    assert imported.status_code == 200
+    assert imported.json()["written"] == 5
+
+    exported = admin_client.get("/internal/users/export?format=csv")
+    assert exported.status_code == 200
+    assert exported.headers["content-type"].startswith("text/csv")
+    assert len(exported.text.strip().splitlines()) == 6
+
+    assert admin_client.get("/internal/users/export?format=xml").status_code == 422
+
+
+def test_import_endpoint_rejects_non_utf8(admin_client, session_factory):
+    """Test 400 before anything is written when the body is not UTF-8."""
+    body = json.dumps({"email": "early@example.com"}).encode() + b"\n\xff\n"
+
+    response = admin_client.post("/internal/users/import", content=body)
+
+    assert response.status_code == 400
+    assert users(session_factory) == {}
+
+
+def test_transfer_endpoints_require_admin(admin_client):
+    """Test that non-admins cannot export users."""
+    app.dependency_overrides[get_current_user] = lambda: User(id=2, email="someone@example.com")
+
+    assert admin_client.get("/internal/users/export").status_code == 403
+    assert admin_client.post("/internal/users/import", content=b"").status_code == 403
+
+
+def test_cli_import_and_export(session_factory, tmp_path, monkeypatch):
+    """Test the import-users and export-users commands."""
+    monkeypatch.setattr(cli, "SessionLocal", session_factory)
+    source = tmp_path / "users.csv"
+    source.write_text("email,last_name\ncli@example.com,Line\n")
+    target = tmp_path / "out.ndjson"
+
+    assert cli.main(["import-users", str(source)]) == 0
+    assert cli.main(["export-users", str(target)]) == 0
+
+    record = json.loads(target.read_text())
+    assert record["email"] == "cli@example.com"
+    assert record["last_name"] == "Line"
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_POSTGRES_URL"), reason="the COPY paths need PostgreSQL; set TEST_POSTGRES_URL"
+)
+def test_copy_import_and_export_on_postgres():
+    """Test the COPY import and CSV export paths in a scratch schema."""
+    url = os.environ["TEST_POSTGRES_URL"]
+    schema = "test_transfer_" + uuid.uuid4().hex[:8]
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine, expire_on_commit=False)
+        with factory() as db:
+            assert UserBulkRepository(db).supports_copy
+            result = user_transfer.import_users(
+                db, ndjson(*({"email": f"pg{i}@example.com", "first_name": f"Pg {i}"} for i in range(5))), batch_size=2
+            )
+            assert (result.written, result.failed) == (5, 0)
+            exported = "".join(user_transfer.export_users(db, "csv", batch_size=2))
+
+        rows = list(csv.DictReader(io.StringIO(exported)))
+        assert [row["email"] for row in rows] == [f"pg{i}@example.com" for i in range(5)]
+        assert rows[0]["first_name"] == "Pg 0"
+        assert datetime.fromisoformat(rows[0]["created_at"]).tzinfo is not None
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+        admin.dispose()
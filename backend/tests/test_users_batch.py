@@ -0,0 +1,159 @@
+"""
+Test cases for batch user lookups.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.dependencies import get_current_user
+from app.core.user_cache import user_cache
+from app.main import app
+from app.models.user import User
+from app.repositories import user_repository
+from app.repositories.user_repository import AsyncUserRepository, UserRepository
+from app.services.user_service import AsyncUserService, UserService
+
+
+@pytest.fixture
+def session_factory(session_factory):
+    with session_factory() as db:
+        repo = UserRepository(db)
+        for i in range(1, 6):
+            repo.create_user(email=f"user{i}@example.com", google_id=f"g-{i}", first_name=f"User {i}")
+    user_cache.clear()
+    return session_factory
+
+
+@pytest.fixture
+def statements(session_factory):
+    """Record SELECT statements issued through the test engine."""
+    engine = session_factory.kw["bind"]
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_get_users_by_ids_uses_one_query(session_factory, statements):
+    """Test that many IDs are resolved with a single SELECT."""
+    with session_factory() as db:
+        users = UserRepository(db).get_users_by_ids([3, 1, 3, 99, 5])
+
+    assert sorted(user.id for user in users) == [1, 3, 5]
+    assert len(statements) == 1
+
+
+def test_get_users_by_ids_chunks_on_sqlite(session_factory, statements, monkeypatch):
+    """Test that SQLite lookups are split into bounded IN lists."""
+    monkeypatch.setattr(user_repository, "LOOKUP_CHUNK_SIZE", 2)
+    with session_factory() as db:
+        users = UserRepository(db).get_users_by_google_ids(["g-1", "g-2", "g-3", "g-4", "g-404"])
+
+    assert sorted(user.google_id for user in users) == ["g-1", "g-2", "g-3", "g-4"]
+    assert len(statements) == 3
+
+
+def test_batch_keeps_request_order_and_reports_missing(session_factory):
+    """Test ordering, de-duplication and missing keys."""
+    with session_factory() as db:
+        result = UserService(db).get_users_batch([4, 2, 404, 4], ["g-1", "g-2", "g-missing"])
+
+    assert [user.id for user in result.users] == [4, 2, 1]
+    assert result.missing_ids == [404]
+    assert result.missing_google_ids == ["g-missing"]
+
+
+def test_batch_serves_cached_users_without_querying(session_factory, statements):
+    """Test that only users missing from the cache are loaded."""
+    with session_factory() as db:
+        UserService(db).get_users_batch([1, 2], [])
+    statements.clear()
+
+    with session_factory() as db:
+        result = UserService(db).get_users_batch([2, 1, 3], [])
+
+    assert [user.id for user in result.users] == [2, 1, 3]
+    assert len(statements) == 1
+    assert "IN" in statements[0].upper()
+
+
+def test_async_batch_matches_sync(session_factory):
+    """Test the AsyncSession variant of the lookup."""
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with factory() as db:
+            repo = AsyncUserRepository(db)
+            for i in range(1, 4):
+                await repo.create_user(email=f"async{i}@example.com", google_id=f"ag-{i}")
+            user_cache.clear()
+            result = await AsyncUserService(db).get_users_batch([3, 7], ["ag-1"])
+        await engine.dispose()
+        return result
+
+    result = asyncio.run(run())
+    assert [user.email for user in result.users] == ["async3@example.com", "async1@example.com"]
+    assert result.missing_ids == [7]
+    assert not issubclass(AsyncUserService, UserService)
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["user1@example.com"])
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="user1@example.com")
+    return client
+
+
+def test_batch_endpoint(client):
+    """Test POST /users/batch."""
+    response = client.post("/users/batch", json={"ids": [2, 42], "google_ids": ["g-5"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [user["email"] for user in body["users"]] == ["user2@example.com", "user5@example.com"]
+    assert body["missing_ids"] == [42]
+    assert body["missing_google_ids"] == []
+
+
+def test_batch_endpoint_limits_request_size(client, monkeypatch):
+    """Test that oversized batches are rejected."""
+    monkeypatch.setattr(settings, "USER_BATCH_MAX_IDS", 3)
+
+    response = client.post("/users/batch", json={"ids": [1, 2], "google_ids": ["g-1", "g-2"]})
+
+    assert response.status_code == 422
+
+
+def test_batch_endpoint_rejects_out_of_range_ids(client):
+    """Test that ids outside the id column's range are a 422, not a database error."""
+    for bad_id in (2**70, 2**31, 0, -1):
+        assert client.post("/users/batch", json={"ids": [bad_id]}).status_code == 422
+
+
+def test_batch_endpoint_requires_admin(client, monkeypatch):
+    """Test that signed-in users who are not admins cannot look up other users."""
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["someone-else@example.com"])
+
+    response = client.post("/users/batch", json={"ids": [2]})
+
+    assert response.status_code == 403
+
+
+def test_batch_endpoint_requires_authentication():
+    """Test that the endpoint rejects anonymous callers."""
+    response = TestClient(app).post("/users/batch", json={"ids": [1]})
+
+    assert response.status_code in (401, 403)
@@ -0,0 +1,133 @@
+"""
+Test cases for the start-up warm-up, /ready and lazy imports.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from app.core import warmup
+from app.core.config import settings
+from app.core.google_certs import GoogleCertCache
+from app.core.google_verifier import GoogleTokenVerifier
+from app.main import app
+from tests.fake_google import FakeCertServer, FakeGoogleIssuer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_ready_after_warm_up(monkeypatch):
+    """Test that /ready answers 503 until the warm-up has run."""
+    calls = []
+
+    async def step():
+        calls.append("step")
+
+    monkeypatch.setattr(warmup, "STEPS", [("step", step)])
+    monkeypatch.setattr(warmup.readiness, "ready", False)
+    monkeypatch.setattr(warmup.readiness, "durations_ms", {})
+    monkeypatch.setattr(warmup.readiness, "errors", {})
+    client = TestClient(app)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming_up"
+
+    asyncio.run(warmup.warm_up())
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    assert list(response.json()["warm_up_ms"]) == ["step"]
+    assert calls == ["step"]
+
+
+def test_failed_step_still_marks_ready(monkeypatch):
+    """Test that a failing step is reported without blocking the others."""
+    calls = []
+
+    async def broken():
+        raise ConnectionError("database unreachable")
+
+    async def fine():
+        calls.append("fine")
+
+    monkeypatch.setattr(warmup, "STEPS", [("broken", broken), ("fine", fine)])
+    state = warmup.Readiness()
+    asyncio.run(warmup.warm_up(state))
+
+    assert state.ready
+    assert state.errors == {"broken": "database unreachable"}
+    assert set(state.durations_ms) == {"broken", "fine"}
+    assert calls == ["fine"]
+
+
+def test_required_step_is_retried_before_ready(monkeypatch):
+    """Test that the worker stays not ready until the revocation list has loaded."""
+    attempts = []
+
+    async def load_revocations():
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(warmup, "STEPS", [("revocations", load_revocations)])
+    monkeypatch.setattr(warmup, "RETRY_SECONDS", 0.01)
+    state = warmup.Readiness()
+
+    async def scenario():
+        task = asyncio.create_task(warmup.warm_up(state))
+        await asyncio.sleep(0)
+        assert not state.ready
+        assert state.errors == {"revocations": "database unreachable"}
+        await task
+
+    asyncio.run(scenario())
+    assert state.ready
+    assert state.errors == {}
+    assert len(attempts) == 3
+
+
+def test_lifespan_without_warm_up(monkeypatch):
+    """Test that a disabled warm-up leaves the worker ready at once."""
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(warmup.readiness, "ready", False)
+
+    with TestClient(app) as client:
+        assert client.get("/ready").status_code == 200
+
+
+def test_default_steps_run_offline(engine, session_factory, monkeypatch):
+    """Test the real steps against SQLite and the fake certificate server."""
+    issuer = FakeGoogleIssuer(audience="test-client-id")
+    with FakeCertServer(certs=issuer.certs) as server:
+        verifier = GoogleTokenVerifier(GoogleCertCache(server.url, refresh_margin=0), audience="test-client-id")
+        monkeypatch.setattr(warmup, "google_token_verifier", verifier)
+        monkeypatch.setattr(warmup.database, "engine", engine)
+        monkeypatch.setattr(warmup.database, "SessionLocal", session_factory)
+        monkeypatch.setattr(settings, "DATABASE_ASYNC", False)
+        state = warmup.Readiness()
+        asyncio.run(warmup.warm_up(state))
+
+        assert state.errors == {}
+        assert server.request_count == 1
+        assert asyncio.run(verifier.preload_async()) == 1
+        # The parsed keys serve the first real token without another fetch
+        assert verifier.verify(issuer.mint(email="first@example.com"))["email"] == "first@example.com"
+        assert server.request_count == 1
+
+
+def test_import_skips_http_and_crypto_modules():
+    """Test that importing the app leaves HTTP clients and RSA code for first use."""
+    code = (
+        "import json, sys; import app.main; "
+        "print(json.dumps([m for m in ('httpx', 'requests', 'google.auth.crypt', 'jose') if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+
+    assert json.loads(output) == []
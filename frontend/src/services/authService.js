@@ -30,6 +30,13 @@ export const getCurrentUser = async () => {
 };
 
 export const logout = () => {
+  // Revoke the token server-side; the header is set here because the
+  // interceptor would run after the token is removed below
+  const token = localStorage.getItem('access_token');
+  if (token) {
+    api.post('/auth/logout', {}, { headers: { Authorization: `Bearer ${token}` } })
+      .catch(() => {});
+  }
   localStorage.removeItem('access_token');
   localStorage.removeItem('user');
 };